@@ -0,0 +1,75 @@
+"""Time moving a hub node with many connections.
+
+Usage: python benchmarks/bench_connections.py [CONNECTIONS]
+Runs offscreen; prints ms per setPos of the hub node, which updates the
+paths of all its connections, and ms per frame of a drag delivering
+EVENTS_PER_FRAME moves, with path updates coalesced by path_scheduler.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from qtpy.QtWidgets import QApplication, QGraphicsScene
+
+import bezier
+from node_loader import SceneBuilder
+from node_parts.connection import path_scheduler
+
+REPEAT = 5
+EVENTS_PER_FRAME = 8
+
+
+def hub_scene(count):
+    nodes = {"Hub0": {"id": 0, "name": "Hub0", "posx": 0, "posy": 0}}
+    connections = []
+    for i in range(1, count + 1):
+        name = "Node%d" % i
+        nodes[name] = {"id": i, "name": name, "posx": 300, "posy": i * 30}
+        connections.append(
+            {
+                "id": count + i,
+                "name": "Connection%d" % i,
+                "parent": 0,
+                "child": i,
+            }
+        )
+    return {"nodes": nodes, "connections": connections}
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 500
+    _app = QApplication.instance() or QApplication([])
+    scene = QGraphicsScene()
+    SceneBuilder(None, scene).build(hub_scene(count))
+    import node_utils
+
+    hub = node_utils.options.nodes[0]
+    pos = [0]
+
+    def move():
+        pos[0] += 1
+        hub.setPos(pos[0], 0)
+
+    def frame():
+        path_scheduler.begin()
+        for _ in range(EVENTS_PER_FRAME):
+            move()
+        path_scheduler.end()
+
+    best = min(timeit.repeat(move, number=10, repeat=REPEAT)) / 10 * 1000
+    drag = min(timeit.repeat(frame, number=10, repeat=REPEAT)) / 10 * 1000
+    print(
+        "%d connections: %.2f ms per hub move, %.2f ms per drag frame of"
+        " %d moves (numpy: %s)"
+        % (count, best, drag, EVENTS_PER_FRAME, bezier.numpy is not None)
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
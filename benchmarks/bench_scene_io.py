@@ -0,0 +1,77 @@
+"""Compare scene load and save times of the YAML and binary formats.
+
+Usage: python benchmarks/bench_scene_io.py [FILE ...]
+Defaults to the scenes in nods/. Times are the best of several runs, in
+milliseconds, and include sanitizing for YAML.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import sys
+import timeit
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from node_io import binary
+from node_io.scene_file import dumps_yaml, loads_yaml, sanitize
+from node_io.stream import iter_scene
+
+REPEAT = 5
+
+
+def best(func, number=1):
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) * 1000
+
+
+def bench(filename):
+    with open(filename, "r", encoding="utf-8") as f:
+        text = f.read()
+    dump = loads_yaml(text)
+    data = binary.encode(dump)
+    yaml_text = dumps_yaml(dump)
+    row = {
+        "file": os.path.basename(filename),
+        "yaml KB": len(yaml_text.encode("utf-8")) / 1024,
+        "nodb KB": len(data) / 1024,
+        "load py": best(lambda: yaml.safe_load(sanitize(text))),
+        "load yaml": best(lambda: loads_yaml(text)),
+        "load stream": best(lambda: list(iter_scene(filename))),
+        "load nodb": best(lambda: binary.decode(data)),
+        "save py": best(
+            lambda: yaml.safe_dump(
+                dump,
+                default_flow_style=False,
+                sort_keys=False,
+                allow_unicode=True,
+            )
+        ),
+        "save yaml": best(lambda: dumps_yaml(dump)),
+        "save nodb": best(lambda: binary.encode(dump)),
+    }
+    return row
+
+
+def main(argv):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    files = argv or sorted(glob.glob(os.path.join(root, "nods", "*.nod")))
+    rows = [bench(f) for f in files]
+    columns = list(rows[0].keys())
+    print("  ".join("%12s" % c for c in columns))
+    for row in rows:
+        cells = []
+        for c in columns:
+            v = row[c]
+            cells.append("%12s" % v if isinstance(v, str) else "%12.2f" % v)
+        print("  ".join(cells))
+    print(
+        "\n'py' is pure-Python PyYAML, 'yaml' is the codec used by node_io"
+        " (libyaml: %s)." % yaml.__with_libyaml__
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
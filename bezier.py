@@ -1,5 +1,15 @@
 from __future__ import division
-from math import factorial
+from functools import lru_cache
+from math import comb
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # optional dependency
+
+# batches smaller than this are evaluated in pure Python, numpy call
+# overhead outweighs the vectorized product for a few curves
+NUMPY_MIN_CURVES = 4
 
 
 def _unzip(zipped):
@@ -58,15 +68,11 @@ class Bezier(object):
         return point on bezier curve at t
         """
 
-        def _C(n, k):
-            # binomial coefficient == n! / (i!(n - i)!)
-            return factorial(n) / float(factorial(k) * factorial(n - k))
-
         assert 0 <= t <= 1  # t in [0, 1]
         X, Y, _n = self.X, self.Y, self._n
         x, y, n = 0, 0, _n[-1]  # initial x, y return values and n
         for i in _n:
-            b_i = _C(n, i) * t**i * (1 - t) ** (n - i)  # bernstein polynomial
+            b_i = comb(n, i) * t**i * (1 - t) ** (n - i)  # bernstein polynomial
             # mult ith control point by ith bernsteim polynomial
             # t = 0 maps to first control point
             # t = 1 maps to nth control point
@@ -75,6 +81,64 @@ class Bezier(object):
         return x, y
 
 
+@lru_cache(maxsize=32)
+def bernstein_basis(degree, steps):
+    """
+    Bernstein weights of a degree curve sampled at t = i / steps
+
+    Returns steps + 1 rows of degree + 1 weights, row i is
+    comb(degree, k) * t**k * (1 - t)**(degree - k) for each k.
+    """
+    rows = []
+    for i in range(steps + 1):
+        t = i / float(steps)
+        rows.append(
+            tuple(
+                comb(degree, k) * t**k * (1 - t) ** (degree - k)
+                for k in range(degree + 1)
+            )
+        )
+    return tuple(rows)
+
+
+@lru_cache(maxsize=32)
+def _numpy_basis(degree, steps):
+    return numpy.array(bernstein_basis(degree, steps))
+
+
+def evaluate_curves(curves, steps):
+    """
+    Sample bezier curves of the same degree at steps + 1 even t values
+
+    curves == list of control point lists [(x, y), ...]
+    Returns for each curve a list of (x, y) points, t = 0 to 1.
+    Uses numpy for larger batches when it's available.
+    """
+    if not curves:
+        return []
+    degree = len(curves[0]) - 1
+    if numpy is not None and len(curves) >= NUMPY_MIN_CURVES:
+        # (steps + 1, n) @ (curves, n, 2) -> (curves, steps + 1, 2)
+        points = _numpy_basis(degree, steps) @ numpy.asarray(
+            curves, dtype=float
+        )
+        return points.tolist()
+    basis = bernstein_basis(degree, steps)
+    result = []
+    for P in curves:
+        X, Y = _unzip(P)
+        result.append(
+            [
+                (
+                    sum(b * x for b, x in zip(row, X)),
+                    sum(b * y for b, y in zip(row, Y)),
+                )
+                for row in basis
+            ]
+        )
+    return result
+
+
 def catmull_rom_one_point(x, v0, v1, v2, v3):
     """Computes interpolated y-coord for given x-coord using Catmull-Rom.
 
@@ -3,7 +3,6 @@ from __future__ import annotations
 import sys
 import logging
 import os
-import yaml
 import inspect
 import subprocess
 from copy import deepcopy
@@ -14,17 +13,13 @@ from operator import methodcaller
 from qtpy.QtGui import (
     QAction,
     QShortcut,
+    QFont,
     QFontMetrics,
-    QImage,
     QPainter,
     QBrush,
     QColor,
     QCursor,
     QKeySequence,
-    qRed,
-    qGreen,
-    qBlue,
-    qRgb,
     QPainterPath,
     QDrag,
 )
@@ -48,7 +43,6 @@ from qtpy.QtWidgets import (
     QFileDialog,
     QFileIconProvider,
     QGraphicsItem,
-    QGraphicsPixmapItem,
     QGraphicsRectItem,
     QGraphicsScene,
     QGraphicsView,
@@ -60,10 +54,12 @@ from qtpy.QtWidgets import (
     QMenu,
     QMenuBar,
     QMessageBox,
+    QProgressBar,
     QPushButton,
     QRubberBand,
     QSlider,
     QSplitter,
+    QStyleOptionGraphicsItem,
     QSystemTrayIcon,
     QVBoxLayout,
     QWidget,
@@ -81,15 +77,33 @@ from node_command import (
     CommandCreateConnection,
     CommandDeleteNodes,
     CommandDeleteConnections,
+    journal_record,
+)
+from node_parts.connection import Connection, update_paths
+from node_parts.connection_layer import ConnectionLayer
+from node_parts.grid import BackgroundGrid
+from node_parts.icon_atlas import icon_atlas
+from node_loader import SceneBuilder, SceneLoader, SceneSaver
+from node_io import (
+    Journal,
+    SceneCache,
+    SceneEncoder,
+    has_changes,
+    journal_path,
+    make_dump,
 )
-from node_parts.connection import Connection
 
-from node_types import Node, NodeGroup, NodeBookmark
+from node_types import (
+    LITE_TYPES,
+    LiteBookmark,
+    NodeBase,
+    NodeBookmark,
+    NodeGroup,
+)
 
 from node_plugins.shader import (
     NodeShader,
     get_plugin_shaders,
-    load_context,
 )
 from node_plugins.shader.settings import load as load_shader_settings
 from node_plugins.shader.settings import save as save_shader_settings
@@ -110,6 +124,10 @@ logging.basicConfig(
 log = logging.getLogger("NodeEditor")
 log.setLevel(logging.DEBUG)
 RECENT_FILES_COUNT = 5
+# journal records before the journal is compacted into a scene snapshot
+JOURNAL_LIMIT = 500
+# ms the "Saved" status stays visible
+SAVE_STATUS_TIMEOUT = 3000
 
 
 def _eventPos(event: Any) -> QPoint:
@@ -252,18 +270,8 @@ class OptionsDialog(QDialog):
 
     def brightChanged(self, z):
         p = cast(Any, self.parent())
-        if p is None or getattr(p, "backImage", None) is None:
-            return
-        img = p.backImage
-        fmt = cast(Any, getattr(QImage, "Format_Indexed8", 3))
-        img = img.convertToFormat(fmt)
-        for i in range(img.colorCount()):
-            r = qRed(img.color(i)) * z * 0.02
-            g = qGreen(img.color(i)) * z * 0.02
-            b = qBlue(img.color(i)) * z * 0.02
-            img.setColor(i, qRgb(int(r), int(g), int(b)))
-        if getattr(p, "viewport", None) is not None:
-            p.viewport.setBackgroundBrush(QBrush(img))
+        if p is not None and getattr(p, "viewport", None) is not None:
+            p.viewport.setBrightness(z)
 
     def readSettings(self):
         p = cast(Any, self.parent())
@@ -374,6 +382,26 @@ class NodeDialog(QWidget):
         colorButton.setToolTip("Set Color (c)")
         self.toolLayout.addWidget(colorButton)
         self.toolLayout.addStretch()
+        self.saveStatus = QLabel()
+        self.saveStatus.hide()
+        self.toolLayout.addWidget(self.saveStatus)
+        self.saveStatusTimer = QTimer(self)
+        self.saveStatusTimer.setSingleShot(True)
+        self.saveStatusTimer.setInterval(SAVE_STATUS_TIMEOUT)
+        self.saveStatusTimer.timeout.connect(self.saveStatus.hide)
+        self.loadProgress = QProgressBar()
+        self.loadProgress.setFixedSize(QSize(150, 16))
+        self.loadProgress.setTextVisible(False)
+        self.loadProgress.hide()
+        self.toolLayout.addWidget(self.loadProgress)
+        self.cancelLoadButton = QPushButton(
+            node_utils.options.get_awesome_icon("fa6s.xmark"), ""
+        )
+        self.cancelLoadButton.setFlat(True)
+        self.cancelLoadButton.setFixedSize(toolSize)
+        self.cancelLoadButton.setToolTip("Cancel loading")
+        self.cancelLoadButton.hide()
+        self.toolLayout.addWidget(self.cancelLoadButton)
         self.searchEdit = QLineEdit()
         self.searchEdit.setFixedSize(QSize(250, 25))
         self.toolLayout.addWidget(self.searchEdit)
@@ -437,6 +465,30 @@ class NodeDialog(QWidget):
         self.showShadowsAction.setCheckable(True)
         self.showShadowsAction.setChecked(True)
         self.showShadowsAction.triggered.connect(self.showShadows)
+        self.connectionLayerAction = QAction("Single connection layer", self)
+        self.connectionLayerAction.setCheckable(True)
+        self.connectionLayerAction.setStatusTip(
+            "Draw all connections from one item, faster for dense graphs"
+        )
+        self.connectionLayerAction.triggered.connect(self.useConnectionLayer)
+        self.liteNodesMenu = QMenu("Lightweight nodes", self)
+        self.liteNodeActions = {}
+        for typ in LITE_TYPES:
+            action = QAction(typ, self)
+            action.setCheckable(True)
+            action.setStatusTip(
+                "Create %s nodes as single items, faster for large files" % typ
+            )
+            action.triggered.connect(self.useLiteNodes)
+            self.liteNodesMenu.addAction(action)
+            self.liteNodeActions[typ] = action
+        self.perfHudAction = QAction("Performance HUD", self)
+        self.perfHudAction.setCheckable(True)
+        self.perfHudAction.setShortcut(QKeySequence(Qt.Key.Key_F12))
+        self.perfHudAction.setStatusTip(
+            "Show frame rate, paint times and counters over the view"
+        )
+        self.perfHudAction.triggered.connect(self.showPerfHud)
 
         editConnectionAction = QAction("Connection options...", self)
         editConnectionAction.triggered.connect(self.connectionOptions)
@@ -445,6 +497,9 @@ class NodeDialog(QWidget):
             optionsMenu.addAction(self.showNamesAction)
             optionsMenu.addAction(self.showUrlsAction)
             optionsMenu.addAction(self.showShadowsAction)
+            optionsMenu.addAction(self.connectionLayerAction)
+            optionsMenu.addMenu(self.liteNodesMenu)
+            optionsMenu.addAction(self.perfHudAction)
             optionsMenu.addAction(editConnectionAction)
 
         if hasattr(self._main_layout, "setMenuBar"):
@@ -484,6 +539,7 @@ class NodeDialog(QWidget):
         redoButton.clicked.connect(self.redo)
         colorButton.clicked.connect(self.switchColorPicker)
         searchButton.clicked.connect(self.search)
+        self.cancelLoadButton.clicked.connect(self.cancelLoad)
         newButton.setFocusPolicy(Qt.FocusPolicy.NoFocus)
         # global scene
         self.scene = QGraphicsScene(0, 0, 10, 10, self)
@@ -492,7 +548,6 @@ class NodeDialog(QWidget):
         self.viewport.setViewportUpdateMode(
             QGraphicsView.ViewportUpdateMode.BoundingRectViewportUpdate
         )  # BoundingRectViewportUpdate#FullViewportUpdate
-        self.backImage = QImage("resources/icons/grid.png")
         rh = getattr(QPainter, "RenderHint", type("_", (), {}))
         hints = (
             getattr(rh, "Antialiasing", 0x01)
@@ -500,7 +555,6 @@ class NodeDialog(QWidget):
             | getattr(rh, "SmoothPixmapTransform", 0x04)
         )
         self.viewport.setRenderHints(cast(Any, hints))
-        self.viewport.setBackgroundBrush(QBrush(self.backImage))
 
         self.attrView = QGraphicsView(self)
         self.attrView.setMinimumWidth(200)
@@ -539,6 +593,15 @@ class NodeDialog(QWidget):
         load_shader_settings()
         self.shaders = get_plugin_shaders()
 
+        self.loader = None
+        self.builder = None
+        self.sceneEncoder = SceneEncoder()
+        self.journal = None
+        self.journalIndex = 0
+        self.saver = None
+        self.saveAgain = False
+        self.sceneCache = SceneCache()
+        node_utils.options.undoStack.indexChanged.connect(self.journalEdits)
         self.rebuildRecentFiles()
         if self.recentFiles:
             self.openFile(self.recentFiles[0])
@@ -622,7 +685,7 @@ class NodeDialog(QWidget):
             return
         r = QRectF()
         selected = [
-            x for x in node_utils.options.selected if isinstance(x, Node)
+            x for x in node_utils.options.selected if isinstance(x, NodeBase)
         ]
         for s in selected:
             r = r.united(s.boundingRect().translated(s.pos()))
@@ -635,9 +698,10 @@ class NodeDialog(QWidget):
         self.viewport.scale(
             1 / self.viewport.scaleFactor, 1 / self.viewport.scaleFactor
         )
+        self.viewport.zoomChanged()
 
     def keyMove(self, offset):
-        sel = node_utils.options.get_selected_class(Node)
+        sel = node_utils.options.get_selected_class(NodeBase)
         if len(sel) == 0:
             return
         positions = []
@@ -709,21 +773,12 @@ class NodeDialog(QWidget):
         # Use options.nodes (source of truth); nodes are the same objects as in the scene.
         # Do setRect first (layout), then set visibility so NodeBookmark.setRect doesn't overwrite us.
         for n in node_utils.options.nodes.values():
-            if not isinstance(n, NodeBookmark):
+            if not isinstance(n, (NodeBookmark, LiteBookmark)):
                 continue
             n.prepareGeometryChange()
             n.setRect(n._rect)
             # Apply visibility after setRect so it isn't overwritten by setRect reading action state.
-            # Hide all pixmap children in the icon zone (top-left); catches iconItem and any duplicate.
-            for child in n.childItems():
-                if isinstance(child, QGraphicsPixmapItem):
-                    try:
-                        p = child.pos()
-                        if p.x() < 40 and p.y() < 40:
-                            child.setVisible(show_icons)
-                            child.update()
-                    except Exception:
-                        pass
+            n.iconVisible = show_icons
             name_item = getattr(n, "nameItem", None)
             if name_item is not None:
                 name_item.setVisible(show_names)
@@ -732,6 +787,9 @@ class NodeDialog(QWidget):
             if url_item is not None:
                 url_item.setVisible(show_urls)
                 url_item.update()
+            if isinstance(n, LiteBookmark):
+                n.nameVisible = show_names
+                n.urlVisible = show_urls
             n.update()
         self.scene.update(self.scene.sceneRect())
         vp = self.viewport.viewport()
@@ -757,12 +815,41 @@ class NodeDialog(QWidget):
         self._applyOptionsVisibilityToScene(show_urls=checked)
 
     def showShadows(self, checked):
-        if checked:
-            for n in node_utils.options.nodes.values():
+        for n in node_utils.options.nodes.values():
+            if checked:
                 n.addShadow()
+            else:
+                n.removeShadow()
+
+    def showPerfHud(self, checked):
+        self.viewport.setHud(checked)
+
+    def useConnectionLayer(self, checked):
+        """Move all connections into a ConnectionLayer or back to the scene."""
+        opts = node_utils.options
+        layer = opts.connectionLayer
+        if checked == (layer is not None):
+            return
+        connections = list(opts.connections.values())
+        if checked:
+            for c in connections:
+                self.scene.removeItem(c)
+            opts.connectionLayer = layer = ConnectionLayer()
+            self.scene.addItem(layer)
+            for c in connections:
+                layer.addConnection(c)
         else:
-            for n in node_utils.options.nodes.values():
-                n.shadow.setColor(QColor(0, 0, 0, 0))
+            opts.connectionLayer = None
+            layer.clear()
+            self.scene.removeItem(layer)
+            for c in connections:
+                self.scene.addItem(c)
+
+    def useLiteNodes(self, checked=None):
+        """Types created as lite nodes, used by nodes created from now on."""
+        node_utils.options.liteNodes = {
+            typ for typ, a in self.liteNodeActions.items() if a.isChecked()
+        }
 
     def setStyleSheet(self, fname):  # pyright: ignore[reportIncompatibleMethodOverride]
         if not fname or not os.path.isfile(fname):
@@ -780,6 +867,12 @@ class NodeDialog(QWidget):
         self.settings.setValue(
             "show_shadows", self.showShadowsAction.isChecked()
         )
+        self.settings.setValue(
+            "connection_layer", self.connectionLayerAction.isChecked()
+        )
+        self.settings.setValue(
+            "lite_nodes", sorted(node_utils.options.liteNodes)
+        )
         self.settings.setValue("splitter", self.splitter.sizes())
         self.settings.endGroup()
         self.settings.setValue("recent", self.recentFiles)
@@ -802,6 +895,13 @@ class NodeDialog(QWidget):
         self.showUrlsAction.setChecked(c)
         c = bool(self.settings.value("show_shadows", True))
         self.showShadowsAction.setChecked(c)
+        c = self.settings.value("connection_layer", False, type=bool)
+        self.useConnectionLayer(c)
+        self.connectionLayerAction.setChecked(c)
+        lite = self.settings.value("lite_nodes", [], type=list)
+        for typ, action in self.liteNodeActions.items():
+            action.setChecked(typ in lite)
+        self.useLiteNodes()
 
         if self.settings.value("use_proxy", 0):
             proxy_name = self.settings.value("proxy_name", "")
@@ -810,17 +910,9 @@ class NodeDialog(QWidget):
         node_utils.options.nodeRadius = int(
             self.settings.value("Options.nodeRadius", 5) or 5
         )
-        z = int(self.settings.value("back_brightness", 50) or 50)
-        if z != 50:
-            img = self.backImage
-            fmt = cast(Any, getattr(QImage, "Format_Indexed8", 3))
-            img = img.convertToFormat(fmt)
-            for i in range(img.colorCount()):
-                r = qRed(img.color(i)) * z * 0.02
-                g = qGreen(img.color(i)) * z * 0.02
-                b = qBlue(img.color(i)) * z * 0.02
-                img.setColor(i, qRgb(int(r), int(g), int(b)))
-            self.viewport.setBackgroundBrush(QBrush(img))
+        self.viewport.setBrightness(
+            int(self.settings.value("back_brightness", 50) or 50)
+        )
         self.outline = bool(self.settings.value("outline", True))
         self.settings.endGroup()
         self.recentFiles = self.settings.value("recent", [])
@@ -832,7 +924,7 @@ class NodeDialog(QWidget):
         node_utils.options.undoStack.redo()
 
     def alignH(self):
-        sel = node_utils.options.get_selected_class(Node)
+        sel = node_utils.options.get_selected_class(NodeBase)
         if len(sel) == 0:
             return
         y = sel[0].pos().y()
@@ -845,7 +937,7 @@ class NodeDialog(QWidget):
         node_utils.options.undoStack.push(CommandMoveNode(sel, positions))
 
     def alignV(self):
-        sel = node_utils.options.get_selected_class(Node)
+        sel = node_utils.options.get_selected_class(NodeBase)
         if len(sel) == 0:
             return
         x = sel[0].pos().x()
@@ -938,7 +1030,7 @@ class NodeDialog(QWidget):
                 self,
                 "Open File",
                 "",
-                "Node Files (*.nod);;Context Files (*.rxt);;",
+                "Node Files (*.nod *.nodb);;Context Files (*.rxt);;",
             )
         if f and os.path.isfile(f):
             if f not in self.recentFiles:
@@ -946,128 +1038,200 @@ class NodeDialog(QWidget):
                     self.recentFiles.pop()
                 self.recentFiles.insert(0, f)
                 self.rebuildRecentFiles()
+            self.cancelLoad()
             self.filename = str(f)
             # global nodes
             # global connections
 
-            self.clear()
-            op_file = None
-            if os.path.splitext(self.filename)[-1] == ".rxt":
-                dump = load_context(self.filename)
-            else:
-                with open(self.filename, "r", encoding="utf-8") as op_file:
-                    text = op_file.read()
-
-                # Strip control chars that PyYAML rejects (e.g. 0x009b / ANSI remnants)
-                def _yaml_safe(c):
-                    o = ord(c)
-                    if o in (9, 10, 13):
-                        return True
-                    if o < 32 or o == 0x7F:
-                        return False
-                    if 0x80 <= o <= 0x9F:
-                        return False
-                    if 0xD800 <= o <= 0xDFFF or o in (0xFFFE, 0xFFFF):
-                        return False
-                    return True
-
-                text = "".join(c for c in text if _yaml_safe(c))
-                dump = yaml.safe_load(text)
-            ids = -1
-            if isinstance(dump["nodes"], dict):
-                for key in dump["nodes"].keys():
-                    d = dump["nodes"][key]
-                    ids = max(ids, d["id"])
-                    # d['display_name'] = d['name'].rstrip("0123456789")
-                    node_utils.options.undoStack.push(
-                        CommandCreateNode(self, d)
-                    )
-            elif isinstance(dump["nodes"], list):
-                for d in dump["nodes"]:
-                    ids = max(ids, d["id"])
-                    # d['display_name'] = d['name'].rstrip("0123456789")
-                    node_utils.options.undoStack.push(
-                        CommandCreateNode(self, d)
-                    )
-            if "connections" in dump.keys():
-                for d in dump["connections"]:
-                    ids = max(ids, d["id"])
-                    node_utils.options.undoStack.push(
-                        CommandCreateConnection(self.scene, d)
-                    )
-            for n in node_utils.options.nodes.values():
-                if n.collapsed is True:
-                    n.setCollapsed(False)
-            self._refreshOptionsVisibility()
-            node_utils.options.set_ids(ids)
-            # if 'ids' in dump.keys():
-            #     self.ids = dump['ids']
-            # else:
-            #     self.ids = len(nodes)+len(connections)
-            if "viewport" in dump.keys():
-                self.viewport.setSceneRect(
-                    dump["viewport"]["left"],
-                    dump["viewport"]["top"],
-                    dump["viewport"]["width"],
-                    dump["viewport"]["height"],
+            self.clearScene()
+            recover = False
+            if has_changes(self.filename):
+                ret = QMessageBox.question(
+                    self,
+                    "Recover Changes",
+                    "Recover unsaved changes to\n%s ?" % self.filename,
                 )
-                self.viewport.scaleFactor = dump["viewport"]["scaleFactor"]
-                self.viewport.scale(
-                    1 / self.viewport.scaleFactor, 1 / self.viewport.scaleFactor
-                )
-            if op_file:
-                op_file.close()
-            self.setWindowTitle("Node Editor - %s" % self.filename)
+                recover = ret == QMessageBox.StandardButton.Yes
+                if not recover:
+                    os.remove(journal_path(self.filename))
+            self.builder = SceneBuilder(self)
+            self.builder.begin()
+            self.loader = SceneLoader(
+                self.filename, self, recover, self.sceneCache
+            )
+            self.loader.nodesLoaded.connect(self.onNodesLoaded)
+            self.loader.connectionsLoaded.connect(self.onConnectionsLoaded)
+            self.loader.progress.connect(self.onLoadProgress)
+            self.loader.loaded.connect(self.onFileLoaded)
+            self.loader.failed.connect(self.onLoadFailed)
+            self.loader.finished.connect(self.loader.deleteLater)
+            self.loadProgress.setRange(0, 0)
+            self.loadProgress.show()
+            self.cancelLoadButton.show()
+            self.setWindowTitle("Node Editor - %s (loading)" % self.filename)
+            self.loader.start()
+
+    def isLoading(self):
+        return self.loader is not None
+
+    def onNodesLoaded(self, records):
+        if self.sender() is self.loader and self.builder is not None:
+            self.builder.addNodes(records)
+
+    def onConnectionsLoaded(self, records):
+        if self.sender() is self.loader and self.builder is not None:
+            self.builder.addConnections(records)
+
+    def onLoadProgress(self, done, total):
+        if self.sender() is self.loader:
+            self.loadProgress.setRange(0, total)
+            self.loadProgress.setValue(done)
+
+    def onFileLoaded(self, dump):
+        if self.sender() is not self.loader or self.builder is None:
+            return
+        self._endLoad()
+        for n in node_utils.options.nodes.values():
+            if n.collapsed is True:
+                n.setCollapsed(False)
+        self._refreshOptionsVisibility()
+        # if 'ids' in dump.keys():
+        #     self.ids = dump['ids']
+        # else:
+        #     self.ids = len(nodes)+len(connections)
+        if "viewport" in dump.keys():
+            self.viewport.setSceneRect(
+                dump["viewport"]["left"],
+                dump["viewport"]["top"],
+                dump["viewport"]["width"],
+                dump["viewport"]["height"],
+            )
+            self.viewport.scaleFactor = dump["viewport"]["scaleFactor"]
+            self.viewport.scale(
+                1 / self.viewport.scaleFactor, 1 / self.viewport.scaleFactor
+            )
+        self.viewport.zoomChanged()
+        recovered = dump.get("recovered", False)
+        self.setWindowTitle(
+            "Node Editor - %s%s"
+            % (self.filename, " (recovered)" if recovered else "")
+        )
+        self.journal = Journal(self.filename, keep=recovered)
+
+    def onLoadFailed(self, message):
+        if self.sender() is not self.loader:
+            return
+        self._endLoad()
+        self.filename = None
+        self.clear()
+        QMessageBox.critical(self, "Error", "Can't open file !\n%s" % message)
+
+    def _endLoad(self):
+        if self.builder is not None:
+            self.builder.finish()
+        self.builder = None
+        self.loader = None
+        self.loadProgress.hide()
+        self.cancelLoadButton.hide()
+
+    def cancelLoad(self):
+        """Stop loading a file; the partially loaded scene is discarded."""
+        if self.loader is None:
+            return
+        self.loader.requestInterruption()
+        self._endLoad()
+        self.filename = None
+        self.clear()
 
     def saveFile(self):
-        if not self.filename:
+        """Save the scene in the background, see SceneSaver."""
+        if not self.filename or self.isLoading():
             return
-        try:
-            save_nodes = {}
-            for nv in node_utils.options.nodes.values():
-                d = nv.toDict()
-                save_nodes[d["name"]] = d
-            save_connections = []
-            for nc in node_utils.options.connections.values():
-                save_connections += [nc.toDict()]
-            rect = self.viewport.sceneRect()
-            r = {
-                "left": rect.left(),
-                "top": rect.top(),
-                "width": rect.width(),
-                "height": rect.height(),
-                "scaleFactor": self.viewport.scaleFactor,
-            }
-            dump = {
-                "nodes": save_nodes,
-                "viewport": r,
-                "connections": save_connections,
-            }
-            data = yaml.dump(
-                dump,
-                default_flow_style=False,
-                sort_keys=False,
-                allow_unicode=True,
-            )
-            with open(self.filename, "w", encoding="utf-8") as f:
-                f.write(data)
+        if self.isSaving():
+            # save again once the running save is written
+            self.saveAgain = True
+            return
+        save_nodes = {}
+        for nv in node_utils.options.nodes.values():
+            save_nodes[nv.id] = nv.serialize()
+        save_connections = {}
+        for nc in node_utils.options.connections.values():
+            save_connections[nc.id] = nc.serialize()
+        viewport = self.viewportDict()
+        # the history is cleared once the file is written, see onFileSaved
+        node_utils.options.undoStack.setClean()
+        if self.journal is None or self.journal.filename != self.filename:
+            self.closeJournal()
+            self.journal = Journal(self.filename)
+        # until the file is written the snapshot is only in the journal,
+        # has_changes offers it for recovery after a crash or failed save
+        self.journal.compact(make_dump(save_nodes, save_connections, viewport))
+        self.saver = SceneSaver(
+            self.sceneEncoder,
+            self.filename,
+            save_nodes,
+            save_connections,
+            viewport,
+            self,
+            self.sceneCache,
+        )
+        self.saver.saved.connect(self.onFileSaved)
+        self.saver.failed.connect(self.onSaveFailed)
+        self.saver.finished.connect(self.saver.deleteLater)
+        self.saveStatusTimer.stop()
+        self.saveStatus.setText("Saving...")
+        self.saveStatus.show()
+        self.saver.start()
+
+    def isSaving(self):
+        return self.saver is not None
+
+    def onFileSaved(self, filename):
+        if self.sender() is not self.saver:
+            return
+        self.saver = None
+        stack = node_utils.options.undoStack
+        if stack.isClean():
+            # nothing was done while saving
+            stack.clear()
+        journal = self.journal
+        if (
+            journal is not None
+            and journal.filename == filename
+            and journal.count == 1
+        ):
+            # nothing but the saved snapshot
+            journal.reset()
+        self.saveStatus.setText("Saved")
+        self.saveStatusTimer.start()
+        if self.saveAgain:
+            self.saveAgain = False
+            self.saveFile()
 
-            node_utils.options.undoStack.clear()
-        except Exception as e:
-            messageBox = QMessageBox()
-            messageBox.critical(self, "Error", "An error has occured !\n%s" % e)
-            messageBox.setFixedSize(500, 200)
+    def onSaveFailed(self, message):
+        if self.sender() is not self.saver:
+            return
+        self.saver = None
+        self.saveAgain = False
+        self.saveStatus.hide()
+        messageBox = QMessageBox()
+        messageBox.critical(
+            self, "Error", "An error has occured !\n%s" % message
+        )
+        messageBox.setFixedSize(500, 200)
 
     def saveFileAs(self):
         self.filename, pattern = QFileDialog.getSaveFileName(
-            self, "Save File", "", "NodeBookmark Files (*.nod)"
+            self,
+            "Save File",
+            "",
+            "NodeBookmark Files (*.nod);;Binary NodeBookmark Files (*.nodb)",
         )
         if self.filename:
             self.saveFile()
             self.setWindowTitle("NodeBookmark Editor - %s" % self.filename)
-            node_utils.options.undoStack.clear()
 
-    def clear(self):
+    def clearScene(self):
         self.setWindowTitle("NodeBookmark Editor")
         # global connections
 
@@ -1075,10 +1239,67 @@ class NodeDialog(QWidget):
         node_utils.options.clear_nodes()
         # self.ids = -1
         node_utils.options.set_ids(-1)
+        node_utils.options.names.clear()
         node_utils.options.clear_connections()
         node_utils.options.undoStack.clear()
+        self.closeJournal()
+        # a running save keeps its own encoder
+        self.saver = None
+        self.saveAgain = False
+        self.sceneEncoder = SceneEncoder()
         self.scene.clear()
+        icon_atlas.clear()
+        if node_utils.options.connectionLayer is not None:
+            node_utils.options.connectionLayer = ConnectionLayer()
+            self.scene.addItem(node_utils.options.connectionLayer)
+
+    def journalEdits(self, index):
+        """Append commands done or undone since the last call to the journal."""
+        stack = node_utils.options.undoStack
+        last, self.journalIndex = self.journalIndex, index
+        if self.journal is None or stack.count() == 0:
+            return
+        if index > last:
+            commands = [(stack.command(i), True) for i in range(last, index)]
+        else:
+            commands = [
+                (stack.command(i), False)
+                for i in range(last - 1, index - 1, -1)
+            ]
+        for cmd, redo in commands:
+            if cmd is not None and hasattr(cmd, "journalIds"):
+                self.journal.append(journal_record(cmd, redo))
+        if self.journal.count > JOURNAL_LIMIT:
+            self.journal.compact(self.sceneDump())
+
+    def viewportDict(self):
+        rect = self.viewport.sceneRect()
+        return {
+            "left": rect.left(),
+            "top": rect.top(),
+            "width": rect.width(),
+            "height": rect.height(),
+            "scaleFactor": self.viewport.scaleFactor,
+        }
+
+    def sceneDump(self):
+        return make_dump(
+            {n.id: n.serialize() for n in node_utils.options.nodes.values()},
+            {
+                c.id: c.serialize()
+                for c in node_utils.options.connections.values()
+            },
+            self.viewportDict(),
+        )
+
+    def closeJournal(self, keep=False):
+        """Stop journaling; the journal file is removed unless keep."""
+        if self.journal is not None:
+            self.journal.close(remove=not keep)
+            self.journal = None
 
+    def clear(self):
+        self.clearScene()
         # Create a simple node in the middle of the view
         center = self.viewport.visibleRect().center()
         nodeWidth = 90
@@ -1095,7 +1316,7 @@ class NodeDialog(QWidget):
         )
 
     def delete(self):
-        del_nodes = node_utils.options.get_selected_class(Node)
+        del_nodes = node_utils.options.get_selected_class(NodeBase)
         if len(del_nodes) > 0:
             node_utils.options.clear_selection()
             node_utils.options.undoStack.push(
@@ -1124,6 +1345,13 @@ class NodeDialog(QWidget):
             elif QMessageBox.Cancel == ret:
                 event.ignore()
         """
+        for loader in self.findChildren(SceneLoader):
+            loader.requestInterruption()
+            loader.wait()
+        for saver in self.findChildren(SceneSaver):
+            saver.wait()
+        # unsaved edits are offered for recovery when the file is opened
+        self.closeJournal(keep=not node_utils.options.undoStack.isClean())
         save_shader_settings()
         node_utils.options.undoStack.clear()
         self.writeSettings()
@@ -1257,6 +1485,19 @@ class View(QGraphicsView):
         )
         self.rubberband = QRubberBand(rb_shape, self)
         self.temp_connection = None
+        # items that don't move during a drag, painted once into snapshot
+        self.snapshot = None
+        self.snapshotRect = QRectF()
+        self.snapshotItems = []
+        # the viewport is grabbed for the snapshot, not shown
+        self.grabbing = False
+        self.grid = BackgroundGrid()
+        # performance overlay, see setHud
+        self.hudFont = QFont("monospace", 8)
+        self.hudFont.setStyleHint(QFont.StyleHint.TypeWriter)
+        self.hudTimer = QTimer(self)
+        self.hudTimer.setInterval(250)
+        self.hudTimer.timeout.connect(self.updateHud)
         self.setAcceptDrops(True)
 
     def visibleRect(self):
@@ -1265,6 +1506,190 @@ class View(QGraphicsView):
         br = vp.rect().bottomRight() if vp else QPoint()
         return self.mapToScene(QRect(tl, br)).boundingRect()
 
+    def beginDragSnapshot(self, moving):
+        """
+        Paint the scene without the moving items once and draw that as
+        the background while dragging; the other nodes and connections
+        get zero opacity, so only moving items are painted per frame.
+        Fully transparent items aren't found by items(), so the drop
+        ends the snapshot before looking for its target.
+        """
+        self.endDragSnapshot()
+        opts = node_utils.options
+        scene = self.scene()
+        moving = set(moving)
+        for n in list(moving):
+            moving.update(getattr(n, "connections", ()))
+        static = [
+            x
+            for x in list(opts.nodes.values()) + list(opts.connections.values())
+            if x not in moving
+            and x.scene() is scene
+            and x.isVisible()
+            and x.opacity() > 0
+        ]
+        if len(static) < opts.dragSnapshotItems:
+            return
+        live = [x for x in moving if x.scene() is scene and x.opacity() > 0]
+        if opts.connectionLayer is not None:
+            live.append(opts.connectionLayer)
+        saved = [(x, x.opacity()) for x in live]
+        for x in live:
+            x.setOpacity(0)
+        vp = self.viewport()
+        self.grabbing = True
+        try:
+            self.snapshot = vp.grab()
+        finally:
+            self.grabbing = False
+        for x, opacity in saved:
+            x.setOpacity(opacity)
+        self.snapshotRect = (
+            self.viewportTransform().inverted()[0].mapRect(QRectF(vp.rect()))
+        )
+        self.snapshotItems = [(x, x.opacity()) for x in static]
+        for x in static:
+            x.setOpacity(0)
+
+    def endDragSnapshot(self):
+        if self.snapshot is None:
+            return
+        for x, opacity in self.snapshotItems:
+            x.setOpacity(opacity)
+        self.snapshotItems = []
+        self.snapshot = None
+        self.viewport().update()
+
+    def drawBackground(self, painter, rect):
+        if self.snapshot is not None:
+            if self.snapshotRect.contains(self.visibleRect()):
+                painter.drawPixmap(
+                    self.snapshotRect,
+                    self.snapshot,
+                    QRectF(self.snapshot.rect()),
+                )
+                return
+            # scrolled out of the snapshot
+            QTimer.singleShot(0, self.endDragSnapshot)
+        self.grid.draw(painter, rect, self.transform().m11())
+
+    # performance HUD
+
+    hudClasses = 5
+    hudLine = 14
+    hudGraph = 40
+
+    def setHud(self, visible):
+        """Show the frame rate and the counters of options.perf."""
+        perf = node_utils.options.perf
+        perf.enabled = visible
+        perf.clear()
+        if visible:
+            self.hudTimer.start()
+        else:
+            self.hudTimer.stop()
+        vp = self.viewport()
+        if vp is not None:
+            vp.update()
+
+    def hudRect(self):
+        rows = 3 + self.hudClasses
+        return QRect(8, 8, 260, rows * self.hudLine + self.hudGraph + 12)
+
+    def updateHud(self):
+        vp = self.viewport()
+        if vp is not None:
+            vp.update(self.hudRect())
+
+    def paintEvent(self, event):
+        perf = node_utils.options.perf
+        # repaints of the HUD alone and the drag snapshot aren't frames
+        if (
+            not perf.enabled
+            or self.grabbing
+            or event is None
+            or self.hudRect().contains(event.rect())
+        ):
+            super().paintEvent(event)
+            return
+        perf.beginFrame()
+        try:
+            super().paintEvent(event)
+        finally:
+            perf.endFrame()
+
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        # the scrolled pixels moved the HUD with them
+        if node_utils.options.perf.enabled:
+            self.updateHud()
+
+    def drawForeground(self, painter, rect):
+        super().drawForeground(painter, rect)
+        if node_utils.options.perf.enabled and not self.grabbing:
+            self.drawHud(painter)
+
+    def drawHud(self, painter):
+        perf = node_utils.options.perf
+        r = QRectF(self.hudRect())
+        painter.save()
+        painter.resetTransform()
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 170))
+        painter.drawRect(r)
+        painter.setFont(self.hudFont)
+        painter.setPen(QColor(220, 220, 220))
+        undo = node_utils.options.undoStack
+        lines = [
+            "%3d fps %7.2f ms" % (perf.fps(), perf.frameTime() * 1000),
+            "%d items painted" % sum(perf.lastPaintCount.values()),
+            "%d path updates, %d undo"
+            % (
+                perf.lastCounters.get("updatePath", 0),
+                undo.count() if undo is not None else 0,
+            ),
+        ]
+        times = sorted(perf.lastPaintTime.items(), key=lambda x: -x[1])
+        for name, t in times[: self.hudClasses]:
+            lines.append(
+                "%-18s %5d %7.2f ms"
+                % (name[:18], perf.lastPaintCount[name], t * 1000)
+            )
+        y = r.top() + self.hudLine
+        for line in lines:
+            painter.drawText(QPointF(r.left() + 6, y), line)
+            y += self.hudLine
+
+        # frame times of the ring buffer, 1/30 s at the top
+        bottom = r.bottom() - 6
+        scale = self.hudGraph * 30
+        painter.setPen(QColor(90, 160, 90))
+        target = bottom - scale / 60
+        painter.drawLine(
+            QPointF(r.left() + 6, target), QPointF(r.right() - 6, target)
+        )
+        step = (r.width() - 12) / max(1, perf.frames.maxlen - 1)
+        path = QPainterPath()
+        for i, (_, duration) in enumerate(perf.frames):
+            p = QPointF(
+                r.left() + 6 + i * step,
+                bottom - min(self.hudGraph, duration * scale),
+            )
+            if i:
+                path.lineTo(p)
+            else:
+                path.moveTo(p)
+        painter.setPen(QColor(240, 200, 80))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawPath(path)
+        painter.restore()
+
+    def setBrightness(self, brightness):
+        if brightness != self.grid.brightness:
+            self.grid.setBrightness(brightness)
+            self.resetCachedContent()
+            self.viewport().update()
+
     def updateColorPicker(self):
         if node_utils.options.colorPicker:
             z = self.mapToScene(QPoint(0, self.height()))
@@ -1280,7 +1705,7 @@ class View(QGraphicsView):
 
     def wheelEvent(self, event):
         if len(node_utils.options.selected) == 1 and isinstance(
-            node_utils.options.selected[0], Node
+            node_utils.options.selected[0], NodeBase
         ):
             n = node_utils.options.selected[0]
             n.prepareGeometryChange()
@@ -1309,10 +1734,7 @@ class View(QGraphicsView):
                     n.setRotation(n.rotation() + 10)
                 else:
                     n.setRotation(n.rotation() - 10)
-                for c in n.connections:
-                    c.prepareGeometryChange()
-                    c.updatePath()
-                    c.update()
+                update_paths(n.connections)
                 return
 
         scalingFactor = 1.15
@@ -1328,6 +1750,36 @@ class View(QGraphicsView):
             scalingFactor = 1.0 / scalingFactor
             self.scale(scalingFactor, scalingFactor)
         self.updateColorPicker()
+        self.zoomChanged()
+
+    def zoomChanged(self):
+        self.updateFlattenZoom()
+        self.updateNodeDetail()
+
+    def updateNodeDetail(self):
+        """Hide node child items when zoomed out below nodeDetailLevel."""
+        opts = node_utils.options
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(
+            self.transform()
+        )
+        detail = lod >= opts.nodeDetailLevel
+        if detail != opts.nodeDetail:
+            opts.nodeDetail = detail
+            for n in opts.nodes.values():
+                n.setDetailed(detail)
+
+    def updateFlattenZoom(self):
+        """Re-flatten connections when the zoom crosses a level threshold."""
+        opts = node_utils.options
+        zoom = self.transform().m11()
+        level = None
+        for z in opts.flattenZoomLevels:
+            if zoom <= z:
+                level = z
+                break
+        if level != opts.flattenZoom:
+            opts.flattenZoom = level
+            update_paths(opts.connections.values())
 
     def mousePressEvent(self, event):
         if event is None:
@@ -1362,13 +1814,14 @@ class View(QGraphicsView):
 
         if mime.hasFormat("node/connect"):
             n = cast(NodeMimeData, mime).getObject()
-            if n is None or not getattr(n, "connector", None):
+            start = n.connectorPos() if n is not None else None
+            if start is None:
                 log.error("dragEnterEvent: node '%r' has no connector", n)
             else:
                 ep = _eventPos(event)
                 self.temp_connection = Connection(
                     {
-                        "parent": n.pos() + n.connector.pos(),
+                        "parent": n.pos() + start,
                         "child": self.mapToScene(cast(Any, ep)),
                         "constrain": False,
                     }
@@ -1399,10 +1852,17 @@ class View(QGraphicsView):
                     else []
                 )
                 sel_.childs = [
-                    x for x in childs_list if isinstance(x, Node) and x != sel
+                    x
+                    for x in childs_list
+                    if isinstance(x, NodeBase) and x != sel
                 ]
                 for x in sel_.childs:
                     cast(Any, x).old_pos = x.pos()
+            moving = list(node_utils.options.selected)
+            for x in node_utils.options.selected:
+                if type(x) is NodeGroup:
+                    moving += cast(Any, x).childs
+            self.beginDragSnapshot(moving)
             nmime = cast(NodeMimeData, mime)
             if getattr(nmime, "origin", None) is not None:
                 self.origin = nmime.origin
@@ -1483,7 +1943,7 @@ class View(QGraphicsView):
                         pos = pos - origin_pt
                         pos = pos + cast(Any, x).old_pos
                         x.setPos(pos.x(), pos.y())
-                if isinstance(sel, Node):
+                if isinstance(sel, NodeBase):
                     p_pt = (
                         self.mapToScene(cast(Any, ep))
                         - origin_pt
@@ -1497,7 +1957,7 @@ class View(QGraphicsView):
 
         # Disconnect node behavior
         if len(node_utils.options.selected) == 1 and isinstance(
-            node_utils.options.selected[0], Node
+            node_utils.options.selected[0], NodeBase
         ):
             sel = node_utils.options.selected[0]
             self.mouse_stack.append((event.pos() - self.old_pos))
@@ -1524,6 +1984,7 @@ class View(QGraphicsView):
 
     def dragLeaveEvent(self, event):
         self.rubberband.hide()
+        self.endDragSnapshot()
         if self.temp_connection:
             scene = self.scene()
             if scene is not None:
@@ -1532,6 +1993,7 @@ class View(QGraphicsView):
         super().dragLeaveEvent(event)
 
     def dropEvent(self, event):
+        self.endDragSnapshot()
         if event is None:
             return
         mime = event.mimeData()
@@ -1547,7 +2009,7 @@ class View(QGraphicsView):
         elif mime.hasFormat("node/move"):
             positions = []
             sel_nodes = []
-            for sel in node_utils.options.get_selected_class(Node):
+            for sel in node_utils.options.get_selected_class(NodeBase):
                 sel_nodes += [sel]
                 positions += [sel.pos()]
             if len(sel_nodes) > 0:
@@ -1557,7 +2019,7 @@ class View(QGraphicsView):
             ep = _eventPos(event)
             for item in self.items(ep):
                 if (
-                    not isinstance(item, Node)
+                    not isinstance(item, NodeBase)
                     or (item in node_utils.options.selected)
                     or type(item) is NodeGroup
                 ):
@@ -1566,7 +2028,7 @@ class View(QGraphicsView):
                 node_utils.options.clear_selection()
                 node_utils.options.undoStack.undo()
                 for s in selected:
-                    if not isinstance(s, Node):
+                    if not isinstance(s, NodeBase):
                         continue
                     d = {
                         "name": "Connection",
@@ -1583,14 +2045,21 @@ class View(QGraphicsView):
             sel = [
                 x
                 for x in self.items(rect)
-                if isinstance(x, Node) or type(x) is Connection
+                if isinstance(x, NodeBase) or type(x) is Connection
             ]
+            layer = node_utils.options.connectionLayer
+            if layer is not None:
+                path = QPainterPath()
+                path.addPolygon(self.mapToScene(rect))
+                sel += layer.connectionsIn(path)
             node_utils.options.set_selection(sel)
             return
         elif mime.hasFormat("node/connect"):
             item = cast(NodeMimeData, mime).getObject()
             ep = _eventPos(event)
-            s = self.items(ep)
+            s = [
+                x for x in self.items(ep) if not isinstance(x, ConnectionLayer)
+            ]
             if s and len(s) > 0:
                 first = s[0]
                 d = {
@@ -1611,7 +2080,9 @@ class View(QGraphicsView):
             return
         ep = _eventPos(event)
         for item in self.items(ep):
-            if isinstance(item, Node) or type(item) is Connection:
+            if isinstance(item, (NodeBase, ConnectionLayer)) or (
+                type(item) is Connection
+            ):
                 super().contextMenuEvent(event)
                 return
         menu = QMenu(self)
@@ -1696,7 +2167,7 @@ class ColorPickerItem(QGraphicsRectItem):
 
         node_utils.options.undoStack.push(
             CommandSetNodeAttribute(
-                node_utils.options.get_selected_class(Node),
+                node_utils.options.get_selected_class(NodeBase),
                 {"rgb": self.brush().color().name()},
             )
         )
@@ -1964,6 +2435,7 @@ def run():
     app = QApplication(sys.argv)
     QApplication.setDoubleClickInterval(400)
     QApplication.setStartDragTime(200)
+    node_utils.options.warm_up_pixmaps()
     window = NodeDialog()
     window.show()
     sys.exit(app.exec())
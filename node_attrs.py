@@ -33,7 +33,6 @@ from qtpy.QtCore import (
 from qtpy.QtWidgets import (
     QApplication,
     QFileDialog,
-    QGraphicsDropShadowEffect,
     QGraphicsItem,
     QGraphicsPixmapItem,
     QGraphicsSceneMouseEvent,
@@ -62,8 +61,9 @@ except ImportError:
 if TYPE_CHECKING:
     from qtpy.QtWidgets import QWidget
 
-from node_utils import NodeMimeData
+from node_utils import NodeMimeData, timed_paint
 from node_parts.parts import DropDown
+from node_parts.shadow import ShadowItem
 from random import random
 
 
@@ -400,10 +400,8 @@ class NodeAttr(QGraphicsWidget):
         if "label" in attr.keys():
             self.label = self.attr["label"]
 
-        self.shadow = QGraphicsDropShadowEffect()
-        self.shadow.setOffset(4, 4)
-        self.shadow.setBlurRadius(8)
-        self.setGraphicsEffect(self.shadow)
+        self.shadow = ShadowItem(self)
+        self.geometryChanged.connect(self.shadow.sync)
         self.setGraphicsItem(self)
         if _is_node_shader(self.parent()):
             self.setAcceptDrops(True)
@@ -475,6 +473,7 @@ class NodeAttr(QGraphicsWidget):
     def value(self, value):
         self._value = value
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         if painter is None:
             return
@@ -550,6 +549,7 @@ class NodeAttrEnum(NodeAttr):
         self.height = self._rect.height()
         super().resize(width, height)
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         painter.setBrush(self.brush)
         painter.setPen(self.pen)
@@ -692,6 +692,7 @@ class NodeAttrFloat(NodeAttr):  # (QGraphicsObject, NodeAttr):
             self.numericText.setPlainText("%.2f" % self._value)
             self.numericText.setAlignment(Qt.AlignmentFlag.AlignRight)
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         painter.setBrush(self.darkBrush)
         painter.setPen(self.pen)
@@ -822,6 +823,7 @@ class NodeAttrVector(NodeAttrFloat):
             self.numericTexts[i].setPlainText("%.2f" % self._value[i])
             self.numericTexts[i].setAlignment(Qt.AlignmentFlag.AlignRight)
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         for i in range(self.dimension):
             painter.setBrush(self.darkBrush)
@@ -929,6 +931,7 @@ class NodeAttrMatrix(NodeAttrFloat):
                     Qt.AlignmentFlag.AlignRight
                 )
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         if painter is None:
             return
@@ -1071,6 +1074,7 @@ class NodeAttrBool(NodeAttr):
         )
         # self.label = self.attr['name']
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         painter.setPen(self.pen)
         painter.setBrush(self.brush)
@@ -1194,6 +1198,7 @@ class NodeAttrImage(NodeAttr):
 
         event.accept()
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         painter.setPen(self.pen)
         painter.setBrush(self.brush)
@@ -1268,6 +1273,7 @@ class NodeAttrString(NodeAttr):
 
         event.accept()
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         painter.setPen(self.pen)
         painter.setBrush(self.brush)
@@ -1431,6 +1437,7 @@ class NodeAttrArray(NodeAttr):
         super().resize(width, h)
         # self.update()
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         painter.setBrush(self.brush)
         painter.setPen(self.pen)
@@ -1487,6 +1494,7 @@ class SplinePoint(QGraphicsItem):
     def boundingRect(self):
         return self._rect
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         if painter is None:
             return
@@ -1608,6 +1616,7 @@ class RampRect(NodeAttr):
             self.points[-1].setPos(self._rect.right(), height / 2)
         super().resize(width, height)
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         painter.setBrush(QBrush(self.gradient))
         painter.setPen(self.pen)
@@ -1793,6 +1802,7 @@ class SplineRect(NodeAttr):
             self.points[-1].setPos(self._rect.topRight())
         super().resize(width, height)
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         painter.setBrush(self.darkBrush)
         painter.setPen(self.pen)
@@ -1985,6 +1995,7 @@ class NodeAttrSpline(NodeAttr):
             self.widget.updateGeometry()
         super().resize(width, height)
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         painter.setBrush(self.darkBrush)
         painter.setPen(self.pen)
@@ -2096,6 +2107,7 @@ class NodeAttrRamp(NodeAttr):
         )
         super().resize(width, height)
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         painter.setBrush(self.darkBrush)
         painter.setPen(self.pen)
@@ -2318,6 +2330,7 @@ class NodePanel(NodeAttr):
     def updateGeometry(self):
         super().updateGeometry()
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         if painter is None:
             return
@@ -2669,6 +2682,7 @@ class NodeAttrRgb(NodeAttr):
         self.gradientHSV.setCenter(self.circleCenter)
         super().resize(width, height)
 
+    @timed_paint
     def paint(self, painter, option, widget=None):
         painter.setBrush(self.darkBrush)
         painter.setPen(self.pen)
@@ -0,0 +1,337 @@
+"""Command line interface of the nodes script.
+
+Without arguments the editor is started. Subcommands work on scene
+files without Qt, one file per worker process:
+
+    nodes validate scenes/
+    nodes convert --to binary a.nod b.nod -o out/
+    nodes stats --json scenes/
+    nodes rewrite-paths --old /mnt/old --new /mnt/new scenes/
+
+Directories are searched recursively for scene files; JSON files there
+are only used when they hold a scene.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import yaml
+
+from node_io import (
+    BINARY_EXT,
+    JSON_EXT,
+    YAML_EXT,
+    read_scene,
+    scene_nodes,
+    write_scene,
+)
+from node_model import SceneModel
+
+FORMAT_EXT = {"yaml": YAML_EXT, "json": JSON_EXT, "binary": BINARY_EXT}
+SCENE_EXTS = tuple(FORMAT_EXT.values())
+# node fields holding file paths or urls, see rewrite_paths
+PATH_FIELDS = ("icon", "url", "values")
+# errors of unreadable files and malformed scenes, reported per file
+SCENE_ERRORS = (
+    OSError,
+    ValueError,
+    LookupError,
+    TypeError,
+    AttributeError,
+    yaml.YAMLError,
+)
+
+
+def is_scene(dump: Any) -> bool:
+    """True for a dump with nodes by name or as a list, see scene_nodes."""
+    return isinstance(dump, dict) and isinstance(
+        dump.get("nodes"), (dict, list)
+    )
+
+
+def _is_scene_file(filename: str) -> bool:
+    """True unless filename is JSON of something else, like package.json."""
+    if not filename.lower().endswith(JSON_EXT):
+        return True
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            return is_scene(json.load(f))
+    except (OSError, ValueError):
+        return False
+
+
+def scene_files(paths: Iterable[str]) -> list[str]:
+    """Files of paths, directories expanded to the scene files they hold."""
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            files += [
+                os.path.join(root, x)
+                for x in sorted(names)
+                if x.lower().endswith(SCENE_EXTS)
+                and _is_scene_file(os.path.join(root, x))
+            ]
+    return files
+
+
+def validate_scene(filename: str) -> list[str]:
+    """Problems found in a scene file, empty if it's valid."""
+    try:
+        dump = read_scene(filename)
+    except SCENE_ERRORS as e:
+        return ["can't read: %s" % e]
+    if not is_scene(dump):
+        return ["not a scene"]
+    errors = []
+    nodes = scene_nodes(dump)
+    ids = set()
+    names = set()
+    for d in nodes:
+        if not isinstance(d, dict) or "id" not in d or "name" not in d:
+            errors.append("node without id or name: %r" % (d,))
+            continue
+        if d["id"] in ids:
+            errors.append("duplicate node id %r" % d["id"])
+        if d["name"] in names:
+            errors.append("duplicate node name %r" % d["name"])
+        ids.add(d["id"])
+        names.add(d["name"])
+    for d in dump.get("connections") or []:
+        if not isinstance(d, dict) or "parent" not in d or "child" not in d:
+            errors.append("connection without parent or child: %r" % (d,))
+            continue
+        for end in ("parent", "child"):
+            if d[end] not in ids:
+                errors.append(
+                    "connection %r: missing %s node %r"
+                    % (d.get("id"), end, d[end])
+                )
+    return errors
+
+
+def convert_file(filename: str, fmt: str, outdir: str | None) -> str:
+    """Convert a scene to fmt, returns the written file name."""
+    base = os.path.splitext(filename)[0]
+    if outdir is not None:
+        base = os.path.join(outdir, os.path.basename(base))
+    dst = base + FORMAT_EXT[fmt]
+    if os.path.abspath(dst) == os.path.abspath(filename):
+        return dst
+    write_scene(dst, read_scene(filename))
+    return dst
+
+
+def scene_stats(filename: str) -> dict[str, Any]:
+    model = SceneModel.load(filename)
+    return {
+        "nodes": len(model.nodes),
+        "connections": len(model.edges),
+        "types": dict(Counter(n.type for n in model)),
+        "bytes": os.path.getsize(filename),
+    }
+
+
+def _rewrite(value: Any, old: str, new: str) -> tuple[Any, int]:
+    if isinstance(value, str):
+        if value.startswith(old):
+            return new + value[len(old) :], 1
+        return value, 0
+    if isinstance(value, dict):
+        count = 0
+        for k, v in value.items():
+            value[k], n = _rewrite(v, old, new)
+            count += n
+        return value, count
+    if isinstance(value, list):
+        count = 0
+        for i, v in enumerate(value):
+            value[i], n = _rewrite(v, old, new)
+            count += n
+        return value, count
+    return value, 0
+
+
+def rewrite_paths(filename: str, old: str, new: str, dry_run=False) -> int:
+    """Replace the prefix old by new in the PATH_FIELDS of nodes.
+
+    Returns the number of values replaced.
+    """
+    dump = read_scene(filename)
+    count = 0
+    for d in scene_nodes(dump):
+        for key in PATH_FIELDS:
+            if key in d:
+                d[key], n = _rewrite(d[key], old, new)
+                count += n
+    if count and not dry_run:
+        write_scene(filename, dump)
+    return count
+
+
+def _run(job: tuple[Callable, tuple]) -> tuple[bool, Any]:
+    func, args = job
+    try:
+        return True, func(*args)
+    except SCENE_ERRORS as e:
+        return False, "%s: %s" % (type(e).__name__, e)
+
+
+def run_jobs(func: Callable, jobs: list[tuple], workers: int | None):
+    """(ok, result) of func(*args) for each args, in order.
+
+    Jobs run on a pool of worker processes, a single job or workers=1
+    runs in this process.
+    """
+    tasks = [(func, args) for args in jobs]
+    if workers == 1 or len(tasks) < 2:
+        return [_run(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run, tasks, chunksize=1))
+
+
+def _cmd_validate(args) -> int:
+    files = scene_files(args.files)
+    failed = 0
+    results = run_jobs(validate_scene, [(f,) for f in files], args.jobs)
+    for f, (ok, errors) in zip(files, results):
+        if not ok:
+            errors = [errors]
+        if errors:
+            failed += 1
+            for e in errors:
+                print("%s: %s" % (f, e))
+        elif args.verbose:
+            print("%s: ok" % f)
+    print("%d of %d files valid" % (len(files) - failed, len(files)))
+    return 1 if failed else 0
+
+
+def _cmd_convert(args) -> int:
+    files = scene_files(args.files)
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+    jobs = [(f, args.to, args.output) for f in files]
+    status = 0
+    for f, (ok, result) in zip(files, run_jobs(convert_file, jobs, args.jobs)):
+        if ok:
+            print("%s -> %s" % (f, result))
+        else:
+            print("%s: %s" % (f, result), file=sys.stderr)
+            status = 1
+    return status
+
+
+def _cmd_stats(args) -> int:
+    files = scene_files(args.files)
+    results = run_jobs(scene_stats, [(f,) for f in files], args.jobs)
+    total: dict[str, Any] = {
+        "files": 0,
+        "nodes": 0,
+        "connections": 0,
+        "bytes": 0,
+        "types": Counter(),
+    }
+    per_file = {}
+    status = 0
+    for f, (ok, stats) in zip(files, results):
+        if not ok:
+            print("%s: %s" % (f, stats), file=sys.stderr)
+            status = 1
+            continue
+        per_file[f] = stats
+        total["files"] += 1
+        for k in ("nodes", "connections", "bytes"):
+            total[k] += stats[k]
+        total["types"].update(stats["types"])
+    total["types"] = dict(total["types"].most_common())
+    if args.json:
+        print(json.dumps({"files": per_file, "total": total}, indent=1))
+        return status
+    for f, stats in per_file.items():
+        print(
+            "%s: %d nodes, %d connections, %d bytes"
+            % (f, stats["nodes"], stats["connections"], stats["bytes"])
+        )
+    print(
+        "total: %d files, %d nodes, %d connections, %d bytes"
+        % (total["files"], total["nodes"], total["connections"], total["bytes"])
+    )
+    for t, n in total["types"].items():
+        print("  %s: %d" % (t, n))
+    return status
+
+
+def _cmd_rewrite_paths(args) -> int:
+    files = scene_files(args.files)
+    jobs = [(f, args.old, args.new, args.dry_run) for f in files]
+    status = 0
+    changed = 0
+    for f, (ok, count) in zip(files, run_jobs(rewrite_paths, jobs, args.jobs)):
+        if not ok:
+            print("%s: %s" % (f, count), file=sys.stderr)
+            status = 1
+        elif count:
+            changed += 1
+            print("%s: %d values" % (f, count))
+    print("%d files %s" % (changed, "to change" if args.dry_run else "changed"))
+    return status
+
+
+def parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="nodes", description="Node editor; run without arguments"
+    )
+    sub = p.add_subparsers(dest="command")
+    sub.add_parser("gui", help="start the editor")
+
+    def command(name, func, help):
+        c = sub.add_parser(name, help=help)
+        c.add_argument("files", nargs="+", help="scene files or directories")
+        c.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=None,
+            help="worker processes (default: number of CPUs)",
+        )
+        c.set_defaults(func=func)
+        return c
+
+    c = command("validate", _cmd_validate, "check scene files")
+    c.add_argument("-v", "--verbose", action="store_true")
+    c = command("convert", _cmd_convert, "convert scene files")
+    c.add_argument("--to", choices=sorted(FORMAT_EXT), required=True)
+    c.add_argument("-o", "--output", help="output directory")
+    c = command("stats", _cmd_stats, "node and connection counts")
+    c.add_argument("--json", action="store_true")
+    c = command("rewrite-paths", _cmd_rewrite_paths, "replace path prefixes")
+    c.add_argument("--old", required=True, help="prefix to replace")
+    c.add_argument("--new", required=True, help="replacement")
+    c.add_argument("-n", "--dry-run", action="store_true")
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parser().parse_args(sys.argv[1:] if argv is None else argv)
+    if args.command in (None, "gui"):
+        from main import run
+
+        run()
+        return 0
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
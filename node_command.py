@@ -9,9 +9,14 @@ from qtpy.QtGui import QUndoCommand
 
 import node_utils
 from node_utils import list_remove, increment_name
-from node_parts.connection import Connection
+from node_parts.connection import (
+    Connection,
+    add_connection_item,
+    remove_connection_item,
+    update_paths,
+)
 from node_utils import get_node_class
-from node_types import Node
+from node_types import LiteNode, Node
 import bezier
 
 
@@ -31,10 +36,7 @@ class NodeAnimationBridge(QObject):  # type: ignore[misc]
         self._pos = value
         if self._item is not None:
             self._item.setPos(value.x(), value.y())
-            for c in self._item.connections:
-                c.prepareGeometryChange()
-                c.updatePath()
-                c.update()
+            update_paths(self._item.connections)
 
     pos = Property(QPointF, get_pos, set_pos)
 
@@ -87,6 +89,27 @@ def _createNodeAnimations(item, old_pos, new_pos, duration_ms, fade_out):
     return group, bridge
 
 
+def journal_record(command, redo=True):
+    """Journal record of the items command touched, in their current state.
+
+    Items that no longer exist are recorded as None (deleted).
+    """
+    opts = node_utils.options
+    node_ids, conn_ids = command.journalIds()
+    nodes = {}
+    connections = {}
+    for x in node_ids:
+        n = opts.nodes.get(x)
+        nodes[x] = None if n is None else n.serialize()
+    for x in conn_ids:
+        c = opts.connections.get(x)
+        connections[x] = None if c is None else c.serialize()
+    record = {"op": command.text(), "nodes": nodes, "connections": connections}
+    if redo and hasattr(command, "journalPatch"):
+        command.journalPatch(record)
+    return record
+
+
 class CommandMoveNode(QUndoCommand):  # type: ignore[misc]
     def __init__(self, sel, pos):
         super().__init__()
@@ -95,6 +118,9 @@ class CommandMoveNode(QUndoCommand):  # type: ignore[misc]
         self.old_positions = [x.old_pos for x in sel]
         self.setText("move node")
 
+    def journalIds(self):
+        return self.node_ids, []
+
     def undo(self):
         n = [node_utils.options.nodes[x] for x in self.node_ids]
         for i in range(len(n)):
@@ -118,6 +144,19 @@ class CommandMoveAnimNode(QUndoCommand):  # type: ignore[misc]
         self.old_positions = [x.old_pos for x in sel]
         self.setText("node move")
 
+    def journalIds(self):
+        return self.node_ids, []
+
+    def journalPatch(self, record):
+        # positions are still animating, record where the nodes end up
+        for x, pos in zip(self.node_ids, self.positions):
+            d = record["nodes"].get(x)
+            if d is not None:
+                d = dict(d)
+                d["posx"] = round(pos.x(), 2)
+                d["posy"] = round(pos.y(), 2)
+                record["nodes"][x] = d
+
     def undo(self):
         n = [node_utils.options.nodes[x] for x in self.node_ids]
         for i in range(len(n)):
@@ -160,6 +199,9 @@ class CommandSetNodeAttribute(QUndoCommand):  # type: ignore[misc]
         self.undo_dict = []
         self.setText("set node attribute")
 
+    def journalIds(self):
+        return self.node_ids, []
+
     def undo(self):
         nodes = [node_utils.options.nodes[x] for x in self.node_ids]
         if "name" in self.dict.keys():
@@ -167,6 +209,7 @@ class CommandSetNodeAttribute(QUndoCommand):  # type: ignore[misc]
                 node = nodes[i]
                 node.fromDict(self.undo_dict[i])
                 node.name = self.old_names[i]
+                node.markDirty()
         else:
             for i in range(len(nodes)):
                 node = nodes[i]
@@ -180,6 +223,7 @@ class CommandSetNodeAttribute(QUndoCommand):  # type: ignore[misc]
                 self.undo_dict += [node.toDict()]
                 node.fromDict(self.dict)
                 node.name = self.new_names[i]
+                node.markDirty()
         else:
             self.undo_dict = []
             for node in nodes:
@@ -196,6 +240,9 @@ class CommandSetColor(QUndoCommand):  # type: ignore[misc]
         self.undo_colors = [x.color for x in sel]
         self.setText("set color")
 
+    def journalIds(self):
+        return self.node_ids, []
+
     def undo(self):
         n = [node_utils.options.nodes[x] for x in self.node_ids]
         for i in range(len(n)):
@@ -226,6 +273,9 @@ class CommandCreateNode(QUndoCommand):  # type: ignore[misc]
     def getName(self):
         return self.dict["id"]
 
+    def journalIds(self):
+        return [self.dict["id"]], []
+
     def undo(self):
         n = node_utils.options.nodes[self.dict["id"]]
         node_utils.options.delete_node(n.id)
@@ -262,6 +312,9 @@ class CommandCreateConnection(QUndoCommand):  # type: ignore[misc]
     def getName(self):
         return self.dict["id"]
 
+    def journalIds(self):
+        return [], [self.dict["id"]]
+
     def undo(self):
         c = node_utils.options.connections[self.dict["id"]]
         parent = node_utils.options.nodes[self.dict["parent"]]
@@ -270,7 +323,7 @@ class CommandCreateConnection(QUndoCommand):  # type: ignore[misc]
         list_remove(parent.connections, c)
         list_remove(parent.childs, child)
         node_utils.options.delete_connection(c.id)
-        self.scene.removeItem(c)
+        remove_connection_item(self.scene, c)
 
     def redo(self):
         d = {}
@@ -285,7 +338,7 @@ class CommandCreateConnection(QUndoCommand):  # type: ignore[misc]
         parent.childs += [child]
         parent.connections += [c]
         child.connections += [c]
-        self.scene.addItem(c)
+        add_connection_item(self.scene, c)
 
 
 class CommandDeleteConnections(QUndoCommand):  # type: ignore[misc]
@@ -296,6 +349,9 @@ class CommandDeleteConnections(QUndoCommand):  # type: ignore[misc]
         self.saved_conns = []
         self.setText("delete connection")
 
+    def journalIds(self):
+        return [], self.conn_ids
+
     def undo(self):
         for i in range(len(self.conn_ids)):
             parent = node_utils.options.nodes[self.saved_conns[i]["parent"]]
@@ -307,7 +363,7 @@ class CommandDeleteConnections(QUndoCommand):  # type: ignore[misc]
             parent.connections += [c]
             parent.childs += [child]
             child.connections += [c]
-            self.scene.addItem(c)
+            add_connection_item(self.scene, c)
 
     def redo(self):
         self.saved_conns = []
@@ -318,7 +374,7 @@ class CommandDeleteConnections(QUndoCommand):  # type: ignore[misc]
             list_remove(c.parent_node.connections, c)
             list_remove(c.parent_node.childs, c.child)
             node_utils.options.delete_connection(c.id)
-            self.scene.removeItem(c)
+            remove_connection_item(self.scene, c)
 
 
 class CommandDeleteNodes(QUndoCommand):  # type: ignore[misc]
@@ -330,6 +386,9 @@ class CommandDeleteNodes(QUndoCommand):  # type: ignore[misc]
         self.saved_conns = []
         self.setText("delete node")
 
+    def journalIds(self):
+        return self.node_ids, [d["id"] for d in self.saved_conns]
+
     def undo(self):
         for n in self.saved_nodes:
             node = get_node_class(n["type"])(n, self.dialog)
@@ -348,14 +407,14 @@ class CommandDeleteNodes(QUndoCommand):  # type: ignore[misc]
             parent.connections += [c]
             parent.childs += [child]
             child.connections += [c]
-            self.dialog.scene.addItem(c)
+            add_connection_item(self.dialog.scene, c)
 
     def redo(self):
         self.saved_conns = []
         self.saved_nodes = []
         ns = [node_utils.options.nodes[x] for x in self.node_ids]
         for n in ns:
-            if type(n) is Node and n.collapsed:
+            if type(n) in (Node, LiteNode) and n.collapsed:
                 n.setCollapsed(True)
             for c in n.connections:
                 self.saved_conns += [c.toDict()]
@@ -363,7 +422,7 @@ class CommandDeleteNodes(QUndoCommand):  # type: ignore[misc]
                 list_remove(c.parent_node.connections, c)
                 list_remove(c.parent_node.childs, c.child)
                 node_utils.options.delete_connection(c.id)
-                self.dialog.scene.removeItem(c)
+                remove_connection_item(self.dialog.scene, c)
             self.saved_nodes += [n.toDict()]
             node_utils.options.delete_node(n.id)
             self.dialog.scene.removeItem(n)
@@ -0,0 +1,65 @@
+"""Scene file input/output.
+
+Reading, sanitizing, parsing and writing of scene files. This package
+has no Qt dependency so it can be used from worker threads and without
+a GUI.
+"""
+
+from .binary import BinarySceneError
+from .cache import SceneCache
+from .journal import (
+    JOURNAL_EXT,
+    Journal,
+    has_changes,
+    journal_path,
+    read_journal,
+    recover_scene,
+    replay,
+)
+from .names import increment_name, register_name
+from .scene_file import (
+    BINARY_EXT,
+    JSON_EXT,
+    YAML_EXT,
+    SceneEncoder,
+    convert_scene,
+    load_context,
+    make_dump,
+    read_scene,
+    sanitize,
+    scene_format,
+    scene_nodes,
+    write_scene,
+    write_scene_data,
+)
+from .stream import SanitizedReader, iter_scene, iter_stream
+
+__all__ = [
+    "BINARY_EXT",
+    "JOURNAL_EXT",
+    "JSON_EXT",
+    "YAML_EXT",
+    "BinarySceneError",
+    "Journal",
+    "SanitizedReader",
+    "SceneCache",
+    "SceneEncoder",
+    "convert_scene",
+    "has_changes",
+    "increment_name",
+    "iter_scene",
+    "iter_stream",
+    "journal_path",
+    "load_context",
+    "make_dump",
+    "read_journal",
+    "read_scene",
+    "recover_scene",
+    "register_name",
+    "replay",
+    "sanitize",
+    "scene_format",
+    "scene_nodes",
+    "write_scene",
+    "write_scene_data",
+]
@@ -0,0 +1,157 @@
+"""Binary scene files (.nodb).
+
+A compact, length-prefixed encoding of the plain data a scene dump is
+made of: dicts, lists, strings, ints, floats, bools and None. Every value
+starts with a one byte tag; containers and strings carry their length
+as a little-endian uint32. Dict keys are interned in a string table so
+repeated keys ("name", "id", "posx", ...) are stored once per file.
+
+Layout: MAGIC, uint8 version, then a single encoded value.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import Any
+
+MAGIC = b"NODB"
+VERSION = 1
+
+_NONE = b"N"
+_TRUE = b"T"
+_FALSE = b"F"
+_INT = b"i"
+_BIGINT = b"I"
+_FLOAT = b"d"
+_STR = b"s"
+_KEY = b"k"
+_KEYREF = b"r"
+_LIST = b"l"
+_DICT = b"m"
+
+_u32 = struct.Struct("<I")
+_i64 = struct.Struct("<q")
+_f64 = struct.Struct("<d")
+_INT_MIN = -(1 << 63)
+_INT_MAX = (1 << 63) - 1
+
+
+class BinarySceneError(ValueError):
+    """Raised when data isn't a valid binary scene."""
+
+
+def encode(value: Any) -> bytes:
+    """Encode a scene dump (or any plain value) to bytes."""
+    out = [MAGIC, bytes((VERSION,))]
+    keys: dict[str, int] = {}
+    append = out.append
+    pack_u32 = _u32.pack
+
+    def enc(v):
+        # bool before int: bool is an int subclass
+        if v is None:
+            append(_NONE)
+        elif v is True:
+            append(_TRUE)
+        elif v is False:
+            append(_FALSE)
+        elif isinstance(v, int):
+            if _INT_MIN <= v <= _INT_MAX:
+                append(_INT + _i64.pack(v))
+            else:
+                b = str(v).encode("ascii")
+                append(_BIGINT + pack_u32(len(b)) + b)
+        elif isinstance(v, float):
+            append(_FLOAT + _f64.pack(v))
+        elif isinstance(v, str):
+            b = v.encode("utf-8")
+            append(_STR + pack_u32(len(b)) + b)
+        elif isinstance(v, dict):
+            append(_DICT + pack_u32(len(v)))
+            for k, item in v.items():
+                if isinstance(k, str):
+                    idx = keys.get(k)
+                    if idx is None:
+                        keys[k] = len(keys)
+                        b = k.encode("utf-8")
+                        append(_KEY + pack_u32(len(b)) + b)
+                    else:
+                        append(_KEYREF + pack_u32(idx))
+                else:
+                    enc(k)
+                enc(item)
+        elif isinstance(v, (list, tuple)):
+            append(_LIST + pack_u32(len(v)))
+            for item in v:
+                enc(item)
+        else:
+            raise TypeError("Can't encode %s" % type(v).__name__)
+
+    enc(value)
+    return b"".join(out)
+
+
+def decode(data: bytes) -> Any:
+    """Decode bytes produced by encode()."""
+    if data[:4] != MAGIC:
+        raise BinarySceneError("Not a binary scene file")
+    if len(data) < 5 or data[4] != VERSION:
+        raise BinarySceneError("Unsupported binary scene version")
+    view = memoryview(data)
+    keys: list[str] = []
+    unpack_u32 = _u32.unpack_from
+    unpack_i64 = _i64.unpack_from
+    unpack_f64 = _f64.unpack_from
+
+    def dec(pos):
+        tag = data[pos : pos + 1]
+        pos += 1
+        if tag == _STR or tag == _KEY:
+            (n,) = unpack_u32(data, pos)
+            pos += 4
+            s = str(view[pos : pos + n], "utf-8")
+            if tag == _KEY:
+                keys.append(s)
+            return s, pos + n
+        if tag == _KEYREF:
+            (idx,) = unpack_u32(data, pos)
+            return keys[idx], pos + 4
+        if tag == _INT:
+            return unpack_i64(data, pos)[0], pos + 8
+        if tag == _FLOAT:
+            return unpack_f64(data, pos)[0], pos + 8
+        if tag == _DICT:
+            (n,) = unpack_u32(data, pos)
+            pos += 4
+            d = {}
+            for _ in range(n):
+                k, pos = dec(pos)
+                d[k], pos = dec(pos)
+            return d, pos
+        if tag == _LIST:
+            (n,) = unpack_u32(data, pos)
+            pos += 4
+            li = []
+            for _ in range(n):
+                item, pos = dec(pos)
+                li.append(item)
+            return li, pos
+        if tag == _NONE:
+            return None, pos
+        if tag == _TRUE:
+            return True, pos
+        if tag == _FALSE:
+            return False, pos
+        if tag == _BIGINT:
+            (n,) = unpack_u32(data, pos)
+            pos += 4
+            return int(str(view[pos : pos + n], "ascii")), pos + n
+        raise BinarySceneError("Unknown tag %r at %d" % (tag, pos - 1))
+
+    try:
+        value, pos = dec(5)
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise BinarySceneError("Truncated or corrupt binary scene") from e
+    if pos != len(data):
+        raise BinarySceneError("Trailing data in binary scene")
+    return value
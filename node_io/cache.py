@@ -0,0 +1,154 @@
+"""On-disk cache of parsed scenes.
+
+Parsing a large YAML scene takes far longer than loading the same data
+with marshal, so parsed dumps are kept in a cache directory, one entry
+per scene file. An entry is keyed by the absolute path of the scene and
+only used while the file's size and mtime are unchanged. The least
+recently used entries are dropped once the cache exceeds maxSize bytes;
+the mtime of an entry file records its last use.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import marshal
+import os
+import tempfile
+from typing import Any
+
+log = logging.getLogger("NodeEditor")
+
+CACHE_EXT = ".scene"
+_VERSION = 1
+
+
+def cache_dir() -> str:
+    """Default cache directory, $XDG_CACHE_HOME/pynodz/scenes."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "pynodz", "scenes")
+
+
+def _signature(st: os.stat_result) -> tuple[int, int]:
+    return st.st_size, st.st_mtime_ns
+
+
+class SceneCache:
+    """Parsed scene dumps cached by file path, size and mtime."""
+
+    maxSize = 64 * 1024 * 1024
+
+    def __init__(
+        self, directory: str | None = None, maxSize: int | None = None
+    ):
+        self.directory = directory or cache_dir()
+        if maxSize is not None:
+            self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+
+    def entryPath(self, filename: str) -> str:
+        key = hashlib.sha1(os.path.abspath(filename).encode("utf-8"))
+        return os.path.join(self.directory, key.hexdigest() + CACHE_EXT)
+
+    def get(self, filename: str) -> dict[str, Any] | None:
+        """Cached dump of filename, None if missing or out of date."""
+        path = self.entryPath(filename)
+        try:
+            signature = _signature(os.stat(filename))
+            with open(path, "rb") as f:
+                version, cached, dump = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            self.misses += 1
+            return None
+        if version != _VERSION or tuple(cached) != signature:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return dump
+
+    def put(
+        self,
+        filename: str,
+        dump: dict[str, Any],
+        st: os.stat_result | None = None,
+    ) -> None:
+        """Cache dump as the content of filename.
+
+        st is the stat of filename taken before it was read, so a file
+        changed while being parsed isn't cached under its new mtime.
+        """
+        try:
+            if st is None:
+                st = os.stat(filename)
+            data = marshal.dumps((_VERSION, _signature(st), dump))
+        except (OSError, ValueError) as e:
+            # ValueError: values marshal can't store, e.g. YAML dates
+            log.debug("Not caching %s: %s", filename, e)
+            return
+        if len(data) > self.maxSize:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.entryPath(filename))
+        except OSError as e:
+            log.warning("Can't write scene cache %s: %s", self.directory, e)
+            return
+        self.evict()
+
+    def remove(self, filename: str) -> None:
+        try:
+            os.remove(self.entryPath(filename))
+        except OSError:
+            pass
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """(last use, size, path) of all entries, least recent first."""
+        result = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return result
+        for name in names:
+            if not name.endswith(CACHE_EXT):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            result.append((st.st_mtime, st.st_size, path))
+        result.sort()
+        return result
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> None:
+        """Drop least recently used entries until the cache fits maxSize."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.maxSize:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,24 @@
+"""Convert scene files between formats.
+
+Usage: python -m node_io.convert SRC DST
+The formats are picked by extension (.nod YAML, .json, .nodb binary).
+"""
+
+from __future__ import annotations
+
+import sys
+
+from .scene_file import convert_scene
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 2:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    convert_scene(args[0], args[1])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
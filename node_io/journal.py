@@ -0,0 +1,239 @@
+"""Append-only edit journal for crash recovery.
+
+Every executed edit is appended to a sidecar file (scene.nod.journal) as
+a record of the nodes and connections it touched:
+
+    {"op": "move node", "nodes": {id: record or None}, "connections": {}}
+
+where None marks a deleted item. Records are node_io.binary values
+prefixed with their uint32 length, so a record torn by a crash is
+detected and dropped. The first record is a header holding the mtime of
+the scene file the journal applies to; compact() replaces the journal by
+a header and a "base" record holding the whole scene.
+
+Writes are buffered and done by a background thread.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import threading
+from typing import Any
+
+from . import binary
+from .scene_file import make_dump, read_scene, scene_nodes
+
+log = logging.getLogger("NodeEditor")
+
+JOURNAL_EXT = ".journal"
+_u32 = struct.Struct("<I")
+
+
+def journal_path(filename: str) -> str:
+    return filename + JOURNAL_EXT
+
+
+def _mtime(filename: str) -> int | None:
+    try:
+        return os.stat(filename).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _pack(record: dict[str, Any]) -> bytes:
+    data = binary.encode(record)
+    return _u32.pack(len(data)) + data
+
+
+def read_journal(path: str) -> list[dict[str, Any]]:
+    """Records of a journal file; a torn or corrupt tail is ignored."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+    records = []
+    pos = 0
+    while pos + 4 <= len(data):
+        (n,) = _u32.unpack_from(data, pos)
+        chunk = data[pos + 4 : pos + 4 + n]
+        if len(chunk) < n:
+            log.warning("Journal %s: dropping torn record", path)
+            break
+        try:
+            records.append(binary.decode(chunk))
+        except binary.BinarySceneError:
+            log.warning("Journal %s: dropping corrupt record", path)
+            break
+        pos += 4 + n
+    return records
+
+
+def replay(dump: dict[str, Any], records: list[dict[str, Any]]) -> dict:
+    """Apply edit records to a scene dump, returns the new dump."""
+    nodes = {d["id"]: d for d in scene_nodes(dump)}
+    connections = {d["id"]: d for d in dump.get("connections") or []}
+    for record in records:
+        if "op" not in record or record["op"] in ("header", "base"):
+            continue
+        for items, changes in (
+            (nodes, record.get("nodes") or {}),
+            (connections, record.get("connections") or {}),
+        ):
+            for item_id, d in changes.items():
+                if d is None:
+                    items.pop(item_id, None)
+                else:
+                    items[item_id] = d
+    return make_dump(nodes, connections, dump.get("viewport"))
+
+
+def has_changes(filename: str) -> bool:
+    """True if the journal of filename holds edits not saved to the file."""
+    # a base record is a snapshot that may not have reached the file
+    records = read_journal(journal_path(filename))
+    return any(r.get("op") != "header" for r in records)
+
+
+def recover_scene(filename: str) -> dict[str, Any]:
+    """Scene of filename with its journal replayed on top.
+
+    The journal applies to the file as it was when the journal started;
+    if the file was saved since (by another instance), the journal is
+    ignored unless it was compacted into a base record.
+    """
+    records = read_journal(journal_path(filename))
+    base = None
+    header_mtime = None
+    for r in records:
+        if r.get("op") == "header":
+            header_mtime = r.get("mtime")
+        elif r.get("op") == "base":
+            base = r.get("scene")
+    if base is not None:
+        return replay(base, records)
+    dump = read_scene(filename)
+    if header_mtime is not None and header_mtime != _mtime(filename):
+        log.warning("Journal of %s is stale, ignoring it", filename)
+        return dump
+    return replay(dump, records)
+
+
+class Journal:
+    """Buffered journal writer for one scene file.
+
+    append() only queues the record; a writer thread encodes and writes
+    queued records every flushInterval seconds. reset() and compact()
+    are queued as well, so they apply in order with appended records.
+    """
+
+    flushInterval = 0.5
+
+    def __init__(self, filename: str, keep: bool = False):
+        self.filename = filename
+        self.path = journal_path(filename)
+        self.count = 0
+        self._queue: list[tuple[str, Any]] = []
+        self._lock = threading.Condition()
+        self._closed = False
+        if keep and os.path.isfile(self.path):
+            records = read_journal(self.path)
+            self.count = sum(1 for r in records if r.get("op") != "header")
+        else:
+            self._queue.append(("reset", None))
+        self._thread = threading.Thread(
+            target=self._run, name="Journal", daemon=True
+        )
+        self._thread.start()
+
+    def append(self, record: dict[str, Any]) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._queue.append(("append", record))
+            self.count += 1
+
+    def reset(self) -> None:
+        """Start over from the file as saved on disk."""
+        with self._lock:
+            self._queue.append(("reset", None))
+            self.count = 0
+            self._lock.notify()
+
+    def compact(self, dump: dict[str, Any]) -> None:
+        """Replace the journal with a single base record holding dump."""
+        with self._lock:
+            self._queue.append(("compact", dump))
+            self.count = 1
+            self._lock.notify()
+
+    def flush(self) -> None:
+        """Write queued records now and wait until they are written."""
+        with self._lock:
+            if self._closed:
+                return
+            self._queue.append(("flush", threading.Event()))
+            event = self._queue[-1][1]
+            self._lock.notify()
+        event.wait()
+
+    def close(self, remove: bool = False) -> None:
+        """Flush and stop the writer; remove deletes the journal file."""
+        with self._lock:
+            if self._closed:
+                return
+            if remove:
+                self._queue.append(("remove", None))
+            self._closed = True
+            self._lock.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._closed and not self._wantsFlush():
+                    self._lock.wait(self.flushInterval)
+                queue, self._queue = self._queue, []
+                closed = self._closed
+            try:
+                self._write(queue)
+            except Exception:
+                log.exception("Failed to write journal %s", self.path)
+            if closed:
+                return
+
+    def _wantsFlush(self):
+        return any(op != "append" for op, _ in self._queue)
+
+    def _write(self, queue):
+        pending = []
+        for op, value in queue:
+            if op == "append":
+                pending.append(_pack(value))
+                continue
+            self._appendData(pending)
+            pending = []
+            if op == "reset":
+                self._rewrite([])
+            elif op == "compact":
+                self._rewrite([{"op": "base", "scene": value}])
+            elif op == "remove":
+                if os.path.isfile(self.path):
+                    os.remove(self.path)
+            elif op == "flush":
+                value.set()
+        self._appendData(pending)
+
+    def _appendData(self, chunks):
+        if chunks:
+            with open(self.path, "ab") as f:
+                f.write(b"".join(chunks))
+
+    def _rewrite(self, records):
+        header = {"op": "header", "mtime": _mtime(self.filename)}
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"".join(_pack(r) for r in [header] + records))
+        os.replace(tmp, self.path)
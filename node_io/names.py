@@ -0,0 +1,42 @@
+"""Node names with a running index, e.g. Node0, Node1.
+
+Shared by the editor (options.names) and node_model.SceneModel.
+"""
+
+from __future__ import annotations
+
+import re
+
+_NAME_INDEX = re.compile(r"\d+$")
+
+
+def increment_name(name, dic):
+    """
+    Increments name index by given dictinary
+    Dictinary keys are names, values are number of instances
+    Values of dict are updated
+    """
+    res = _NAME_INDEX.sub("", name)
+    if res in dic:
+        d = dic[res] + 1
+        dic[res] = d
+        res += "%d" % d
+    else:
+        dic[res] = 0
+        res += "0"
+    return res
+
+
+def register_name(name, dic):
+    """
+    Registers an existing name in dictinary used by increment_name
+    Name is kept as is, later increments continue after its index
+    """
+    m = _NAME_INDEX.search(name)
+    if m is None:
+        base, index = name, 0
+    else:
+        base, index = name[: m.start()], int(m.group())
+    if dic.get(base, -1) < index:
+        dic[base] = index
+    return name
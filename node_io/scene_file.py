@@ -0,0 +1,256 @@
+"""Scene files.
+
+Scenes are stored as YAML (.nod), JSON (.json) or in the binary format
+of node_io.binary (.nodb); Rez context files (.rxt) can be read when the
+optional rezContext module is available. The format is picked by file
+extension.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from typing import Any
+
+import yaml
+
+from . import binary
+
+try:
+    from rezContext import load_context  # type: ignore[import-untyped]
+except ImportError:  # optional dependency
+
+    def load_context(filename: str) -> dict[str, Any]:
+        """Stub when rezContext is not available."""
+        return {}
+
+
+# process umask for the mode of new files, read once at import because
+# reading it means setting it, which isn't safe while other threads
+# create files
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# libyaml bindings are an order of magnitude faster when available
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class YamlDumper(getattr(yaml, "CSafeDumper", yaml.SafeDumper)):
+    # SceneEncoder joins records dumped one by one, anchors like &id001
+    # would be repeated in the joined document
+    def ignore_aliases(self, data):
+        return True
+
+
+YamlDumper.add_representer(tuple, YamlDumper.represent_list)
+
+YAML_EXT = ".nod"
+BINARY_EXT = ".nodb"
+JSON_EXT = ".json"
+CONTEXT_EXT = ".rxt"
+
+
+# characters PyYAML rejects: C0/C1 controls except tab and newlines,
+# surrogates and the non-characters U+FFFE/U+FFFF
+_UNSAFE_CHARS = dict.fromkeys(
+    [c for c in range(32) if c not in (9, 10, 13)]
+    + list(range(0x7F, 0xA0))
+    + list(range(0xD800, 0xE000))
+    + [0xFFFE, 0xFFFF]
+)
+
+
+def sanitize(text: str) -> str:
+    """Strip control chars that PyYAML rejects (e.g. 0x009b / ANSI remnants)."""
+    return text.translate(_UNSAFE_CHARS)
+
+
+def scene_format(filename: str) -> str:
+    """Format of a scene file: "yaml", "binary", "json" or "context"."""
+    ext = os.path.splitext(filename)[-1].lower()
+    if ext == BINARY_EXT:
+        return "binary"
+    if ext == JSON_EXT:
+        return "json"
+    if ext == CONTEXT_EXT:
+        return "context"
+    return "yaml"
+
+
+def loads_yaml(text: str) -> dict[str, Any]:
+    return yaml.load(sanitize(text), Loader=YamlLoader) or {}
+
+
+def dumps_yaml(dump: dict[str, Any]) -> str:
+    return yaml.dump(
+        dump,
+        Dumper=YamlDumper,
+        default_flow_style=False,
+        sort_keys=False,
+        allow_unicode=True,
+    )
+
+
+def dumps_json(dump: dict[str, Any]) -> str:
+    return json.dumps(dump, indent=1, ensure_ascii=False) + "\n"
+
+
+def read_scene(filename: str, cache: Any = None) -> dict[str, Any]:
+    """Read a scene file into a dump dict ({"nodes", "connections", ...}).
+
+    cache is an optional node_io.SceneCache; YAML scenes are looked up
+    there first and cached after parsing.
+    """
+    fmt = scene_format(filename)
+    if fmt == "context":
+        return load_context(filename)
+    if fmt == "binary":
+        with open(filename, "rb") as f:
+            return binary.decode(f.read()) or {}
+    if fmt == "json":
+        with open(filename, "r", encoding="utf-8") as f:
+            return json.loads(sanitize(f.read())) or {}
+    if cache is not None:
+        dump = cache.get(filename)
+        if dump is not None:
+            return dump
+    with open(filename, "r", encoding="utf-8") as f:
+        st = os.fstat(f.fileno())
+        text = f.read()
+    dump = loads_yaml(text)
+    if cache is not None:
+        cache.put(filename, dump, st)
+    return dump
+
+
+def write_scene(filename: str, dump: dict[str, Any]) -> None:
+    """Write a dump dict in the format given by the file extension."""
+    fmt = scene_format(filename)
+    if fmt == "context":
+        raise ValueError("Can't write context files: %s" % filename)
+    if fmt == "binary":
+        write_scene_data(filename, binary.encode(dump))
+    elif fmt == "json":
+        write_scene_data(filename, dumps_json(dump).encode("utf-8"))
+    else:
+        write_scene_data(filename, dumps_yaml(dump).encode("utf-8"))
+
+
+def write_scene_data(filename: str, data: bytes) -> None:
+    """Atomically write data produced by SceneEncoder.encode().
+
+    Data goes to a temporary file next to filename which then replaces
+    it, so a crash mid-write leaves the previous file intact.
+    """
+    fd, tmp = tempfile.mkstemp(
+        prefix=os.path.basename(filename) + ".",
+        suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(filename)),
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(filename):
+            os.chmod(tmp, os.stat(filename).st_mode & 0o7777)
+        else:
+            os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, filename)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def make_dump(
+    nodes: dict[Any, dict[str, Any]],
+    connections: dict[Any, dict[str, Any]],
+    viewport: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Scene dump from node and connection records keyed by id."""
+    dump: dict[str, Any] = {"nodes": {d["name"]: d for d in nodes.values()}}
+    if viewport is not None:
+        dump["viewport"] = viewport
+    dump["connections"] = list(connections.values())
+    return dump
+
+
+class SceneEncoder:
+    """Encodes scenes, reusing the encoded form of unchanged records.
+
+    Records are matched by identity: an item that hasn't changed since the
+    previous save passes the very same dict again (see Node.serialize), so
+    only changed records are encoded. YAML fragments are produced by the
+    same dumper as a full dump, so the output is identical to dumps_yaml()
+    of make_dump().
+    """
+
+    def __init__(self):
+        self._nodes: dict[Any, tuple[dict[str, Any], str]] = {}
+        self._connections: dict[Any, tuple[dict[str, Any], str]] = {}
+        self.encoded = 0
+
+    def clear(self) -> None:
+        self._nodes.clear()
+        self._connections.clear()
+
+    def _fragments(self, cache, records, key):
+        """YAML of each record under `key`, without the "key:" line."""
+        texts = []
+        for item_id, d in records.items():
+            cached = cache.get(item_id)
+            if cached is not None and cached[0] is d:
+                texts.append(cached[1])
+                continue
+            if key == "nodes":
+                text = dumps_yaml({key: {d["name"]: d}})
+            else:
+                text = dumps_yaml({key: [d]})
+            text = text[len(key) + 2 :]
+            cache[item_id] = (d, text)
+            texts.append(text)
+            self.encoded += 1
+        for item_id in [x for x in cache if x not in records]:
+            del cache[item_id]
+        return texts
+
+    def encode(
+        self,
+        fmt: str,
+        nodes: dict[Any, dict[str, Any]],
+        connections: dict[Any, dict[str, Any]],
+        viewport: dict[str, Any] | None = None,
+    ) -> bytes:
+        """Encode records keyed by id as "yaml", "json" or "binary" data."""
+        self.encoded = 0
+        if fmt == "binary":
+            self.encoded = len(nodes) + len(connections)
+            return binary.encode(make_dump(nodes, connections, viewport))
+        if fmt == "json":
+            self.encoded = len(nodes) + len(connections)
+            dump = make_dump(nodes, connections, viewport)
+            return dumps_json(dump).encode("utf-8")
+        if fmt != "yaml":
+            raise ValueError("Can't encode %s scenes" % fmt)
+        parts = ["nodes:\n"] if nodes else ["nodes: {}\n"]
+        parts += self._fragments(self._nodes, nodes, "nodes")
+        if viewport is not None:
+            parts.append(dumps_yaml({"viewport": viewport}))
+        parts.append("connections:\n" if connections else "connections: []\n")
+        parts += self._fragments(self._connections, connections, "connections")
+        return "".join(parts).encode("utf-8")
+
+
+def convert_scene(src: str, dst: str) -> None:
+    """Convert a scene between formats, e.g. .nod to .nodb."""
+    write_scene(dst, read_scene(src))
+
+
+def scene_nodes(dump: dict[str, Any]) -> list[dict[str, Any]]:
+    """Node records of a dump; nodes are stored either by name or as a list."""
+    nodes = dump.get("nodes") or []
+    if isinstance(nodes, dict):
+        return list(nodes.values())
+    return list(nodes)
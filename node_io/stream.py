@@ -0,0 +1,145 @@
+"""Streaming YAML scene reader.
+
+iter_scene() reads a scene file in chunks, strips unsafe characters
+with sanitize() and walks the YAML event stream, yielding node and
+connection records one at a time. Only the current chunk and record are
+held in memory, so very large scenes can be read with bounded memory.
+"""
+
+from __future__ import annotations
+
+import codecs
+from collections.abc import Iterator
+from typing import Any, BinaryIO
+
+import yaml
+
+from .scene_file import YamlLoader, sanitize
+
+CHUNK_SIZE = 1 << 20
+RECORD_SECTIONS = ("nodes", "connections")
+
+_STR_TAG = "tag:yaml.org,2002:str"
+
+
+class SanitizedReader:
+    """File-like object returning sanitized text of a UTF-8 byte stream."""
+
+    def __init__(self, f: BinaryIO, chunkSize: int = CHUNK_SIZE):
+        self.f = f
+        self.chunkSize = chunkSize
+        self.pos = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def read(self, size: int = -1) -> str:
+        if size is None or size < 0:
+            size = self.chunkSize
+        while True:
+            data = self.f.read(size)
+            self.pos += len(data)
+            text = sanitize(self._decoder.decode(data, final=not data))
+            # an empty string means end of stream to the parser
+            if text or not data:
+                return text
+
+
+class _Builder:
+    """Python values from YAML events, resolved like the safe loader."""
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.anchors: dict[str, Any] = {}
+        self.constructors = loader.yaml_constructors
+
+    def value(self, event) -> Any:
+        loader = self.loader
+        if isinstance(event, yaml.ScalarEvent):
+            tag = event.tag
+            if tag is None or tag == "!":
+                tag = loader.resolve(
+                    yaml.ScalarNode, event.value, event.implicit
+                )
+            if tag == _STR_TAG:
+                result = event.value
+            else:
+                node = yaml.ScalarNode(tag, event.value, style=event.style)
+                constructor = self.constructors.get(
+                    tag, self.constructors[None]
+                )
+                result = constructor(loader, node)
+        elif isinstance(event, yaml.MappingStartEvent):
+            result = {}
+            if event.anchor is not None:
+                self.anchors[event.anchor] = result
+            while not loader.check_event(yaml.MappingEndEvent):
+                key = self.value(loader.get_event())
+                result[key] = self.value(loader.get_event())
+            loader.get_event()
+            return result
+        elif isinstance(event, yaml.SequenceStartEvent):
+            result = []
+            if event.anchor is not None:
+                self.anchors[event.anchor] = result
+            while not loader.check_event(yaml.SequenceEndEvent):
+                result.append(self.value(loader.get_event()))
+            loader.get_event()
+            return result
+        elif isinstance(event, yaml.AliasEvent):
+            if event.anchor not in self.anchors:
+                raise yaml.YAMLError("Unknown alias %r" % event.anchor)
+            return self.anchors[event.anchor]
+        else:
+            raise yaml.YAMLError("Unexpected %s" % type(event).__name__)
+        if event.anchor is not None:
+            self.anchors[event.anchor] = result
+        return result
+
+
+def iter_stream(stream) -> Iterator[tuple[str, Any]]:
+    """(key, value) pairs of a YAML scene read from stream.
+
+    Records under "nodes" and "connections" are yielded one by one as
+    ("nodes", record) / ("connections", record), whether the section is
+    a mapping keyed by name or a list. Other top level keys are yielded
+    with their whole value.
+    """
+    loader = YamlLoader(stream)
+    try:
+        builder = _Builder(loader)
+        loader.get_event()  # StreamStart
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()  # DocumentStart
+        if loader.check_event(yaml.ScalarEvent):
+            # empty document
+            if builder.value(loader.get_event()) is None:
+                return
+            raise yaml.YAMLError("Scene is not a mapping")
+        if not loader.check_event(yaml.MappingStartEvent):
+            raise yaml.YAMLError("Scene is not a mapping")
+        loader.get_event()
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = builder.value(loader.get_event())
+            if key in RECORD_SECTIONS and loader.check_event(
+                yaml.MappingStartEvent, yaml.SequenceStartEvent
+            ):
+                mapping = loader.check_event(yaml.MappingStartEvent)
+                end = yaml.MappingEndEvent if mapping else yaml.SequenceEndEvent
+                loader.get_event()
+                while not loader.check_event(end):
+                    if mapping:
+                        builder.value(loader.get_event())  # name
+                    yield key, builder.value(loader.get_event())
+                loader.get_event()
+            else:
+                yield key, builder.value(loader.get_event())
+    finally:
+        loader.dispose()
+
+
+def iter_scene(
+    filename: str, chunkSize: int = CHUNK_SIZE
+) -> Iterator[tuple[str, Any]]:
+    """Stream the records of a YAML scene file, see iter_stream()."""
+    with open(filename, "rb") as f:
+        yield from iter_stream(SanitizedReader(f, chunkSize))
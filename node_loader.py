@@ -0,0 +1,294 @@
+"""Bulk scene construction.
+
+SceneBuilder creates nodes and connections straight from scene records,
+bypassing the undo commands used for interactive editing: no undo
+history is recorded, names are registered instead of re-incremented
+(unless they are taken already) and items are added while the scene
+index is suspended.
+
+SceneLoader reads and parses a scene file on a worker thread and hands
+the records back to the GUI thread in chunks, so the scene can be
+populated progressively. SceneSaver is its counterpart, encoding and
+writing a snapshot of the scene on a worker thread.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+
+from qtpy.QtCore import QThread, Signal  # type: ignore[attr-defined]
+from qtpy.QtWidgets import QGraphicsScene
+
+import node_utils
+from node_io import (
+    SanitizedReader,
+    iter_stream,
+    make_dump,
+    read_scene,
+    recover_scene,
+    scene_format,
+    scene_nodes,
+    write_scene_data,
+)
+from node_parts.connection import Connection, add_connection_item
+from node_utils import get_node_class, increment_name, register_name
+
+log = logging.getLogger("NodeEditor")
+
+
+class SceneBuilder:
+    def __init__(self, dialog, scene=None):
+        self.dialog = dialog
+        self.scene = scene if scene is not None else dialog.scene
+        opts = node_utils.options
+        # names in use, a taken name is incremented like CommandCreateNode
+        self.names = {x.name for x in opts.nodes.values()}
+        self.names.update(x.name for x in opts.connections.values())
+        self.pending = []
+        self._indexMethod = None
+
+    def begin(self):
+        """Suspend scene indexing until finish() is called."""
+        if self._indexMethod is None:
+            self._indexMethod = self.scene.itemIndexMethod()
+            self.scene.setItemIndexMethod(
+                QGraphicsScene.ItemIndexMethod.NoIndex
+            )
+
+    def _takeId(self, d):
+        # options.ids is kept past the loaded ids after each chunk, so
+        # items created while a file is loading don't reuse them
+        opts = node_utils.options
+        if "id" not in d:
+            opts.set_ids(opts.ids + 1)
+            d["id"] = opts.ids
+        else:
+            opts.set_ids(max(opts.ids, d["id"]))
+        return d["id"]
+
+    def _takeName(self, d):
+        names = node_utils.options.names
+        name = d.get("name", "")
+        if name and name in self.names:
+            name = d["name"] = increment_name(name, names)
+        else:
+            register_name(name, names)
+        self.names.add(name)
+        return name
+
+    def addNodes(self, records):
+        opts = node_utils.options
+        nodes = []
+        for d in records:
+            self._takeId(d)
+            self._takeName(d)
+            n = get_node_class(d.get("type", "Node"))(d, self.dialog)
+            n.setPos(d.get("posx", 0), d.get("posy", 0))
+            opts.add_node(n.id, n)
+            nodes += [n]
+        for n in nodes:
+            self.scene.addItem(n)
+        return nodes
+
+    def addConnections(self, records):
+        """Create connections, deferring ones whose nodes are not built yet."""
+        opts = node_utils.options
+        conns = []
+        for d in records:
+            self._takeId(d)
+            parent = opts.nodes.get(d["parent"])
+            child = opts.nodes.get(d["child"])
+            if parent is None or child is None:
+                self.pending += [d]
+                continue
+            self._takeName(d)
+            data = dict(d)
+            data["parent"] = parent
+            data["child"] = child
+            c = Connection(data)
+            opts.add_connection(c.id, c)
+            parent.childs += [child]
+            parent.connections += [c]
+            child.connections += [c]
+            conns += [c]
+        for c in conns:
+            add_connection_item(self.scene, c)
+        return conns
+
+    def finish(self):
+        """Resolve deferred connections and restore scene indexing."""
+        pending, self.pending = self.pending, []
+        self.addConnections(pending)
+        for d in self.pending:
+            log.warning(
+                "Connection %r references missing node %r -> %r",
+                d.get("id"),
+                d["parent"],
+                d["child"],
+            )
+        self.pending = []
+        if self._indexMethod is not None:
+            self.scene.setItemIndexMethod(self._indexMethod)
+            self._indexMethod = None
+
+    def build(self, dump):
+        """Build a whole scene dump ({"nodes": ..., "connections": ...})."""
+        self.begin()
+        self.addNodes(scene_nodes(dump))
+        self.addConnections(dump.get("connections") or [])
+        self.finish()
+
+
+class SceneLoader(QThread):  # type: ignore[misc]
+    """Worker thread reading a scene file.
+
+    Emits nodesLoaded/connectionsLoaded with lists of at most chunkSize
+    records (all nodes first), then loaded with the remaining dump
+    (viewport etc.). failed is emitted instead if the file can't be read.
+    Call requestInterruption() to cancel.
+
+    YAML files larger than streamSize bytes are parsed incrementally
+    (node_io.stream) and records are emitted while parsing, in file
+    order, so memory use doesn't grow with the size of the file;
+    progress is then reported in KiB read.
+    """
+
+    nodesLoaded = Signal(object)
+    connectionsLoaded = Signal(object)
+    progress = Signal(int, int)
+    loaded = Signal(object)
+    failed = Signal(str)
+
+    chunkSize = 50
+    streamSize = 16 * 1024 * 1024
+
+    def __init__(self, filename, parent=None, recover=False, cache=None):
+        super().__init__(parent)
+        self.filename = filename
+        self.recover = recover
+        self.cache = cache
+
+    def run(self):
+        try:
+            if self.recover:
+                dump = recover_scene(self.filename)
+            elif (
+                scene_format(self.filename) == "yaml"
+                and os.path.getsize(self.filename) > self.streamSize
+            ):
+                self._stream()
+                return
+            else:
+                dump = read_scene(self.filename, self.cache)
+        except Exception as e:
+            log.exception("Failed to read %s", self.filename)
+            self.failed.emit(str(e))
+            return
+        nodes = scene_nodes(dump)
+        connections = dump.get("connections") or []
+        total = len(nodes) + len(connections)
+        done = 0
+        for records, signal in (
+            (nodes, self.nodesLoaded),
+            (connections, self.connectionsLoaded),
+        ):
+            for i in range(0, len(records), self.chunkSize):
+                if self.isInterruptionRequested():
+                    return
+                chunk = records[i : i + self.chunkSize]
+                signal.emit(chunk)
+                done += len(chunk)
+                self.progress.emit(done, total)
+        if self.isInterruptionRequested():
+            return
+        dump.pop("nodes", None)
+        dump.pop("connections", None)
+        if self.recover:
+            dump["recovered"] = True
+        self.loaded.emit(dump)
+
+    def _stream(self):
+        total = os.path.getsize(self.filename) // 1024
+        chunks = {"nodes": [], "connections": []}
+        signals = {
+            "nodes": self.nodesLoaded,
+            "connections": self.connectionsLoaded,
+        }
+        dump = {}
+        with open(self.filename, "rb") as f:
+            reader = SanitizedReader(f)
+            for key, value in iter_stream(reader):
+                if self.isInterruptionRequested():
+                    return
+                chunk = chunks.get(key) if isinstance(value, dict) else None
+                if chunk is None:
+                    dump[key] = value
+                    continue
+                chunk.append(value)
+                if len(chunk) >= self.chunkSize:
+                    signals[key].emit(chunk)
+                    chunks[key] = []
+                    self.progress.emit(reader.pos // 1024, total)
+        for key, chunk in chunks.items():
+            if chunk:
+                signals[key].emit(chunk)
+        self.progress.emit(total, total)
+        self.loaded.emit(dump)
+
+
+class SceneSaver(QThread):  # type: ignore[misc]
+    """Worker thread writing a scene snapshot.
+
+    nodes and connections are records keyed by id, as returned by the
+    items' serialize(): they are not modified once created, so the GUI
+    can keep editing the scene while the snapshot is written. The file
+    is replaced atomically. Emits saved with the filename when done,
+    failed otherwise.
+
+    encoder is a node_io.SceneEncoder; it must not be used by anything
+    else until the thread has finished. With a node_io.SceneCache as
+    cache, the snapshot is cached as the parsed form of the new file.
+    """
+
+    saved = Signal(str)
+    failed = Signal(str)
+
+    def __init__(
+        self,
+        encoder,
+        filename,
+        nodes,
+        connections,
+        viewport,
+        parent=None,
+        cache=None,
+    ):
+        super().__init__(parent)
+        self.encoder = encoder
+        self.cache = cache
+        self.filename = filename
+        self.nodes = nodes
+        self.connections = connections
+        self.viewport = viewport
+
+    def run(self):
+        try:
+            fmt = scene_format(self.filename)
+            data = self.encoder.encode(
+                fmt,
+                self.nodes,
+                self.connections,
+                self.viewport,
+            )
+            write_scene_data(self.filename, data)
+            if self.cache is not None and fmt == "yaml":
+                self.cache.put(
+                    self.filename,
+                    make_dump(self.nodes, self.connections, self.viewport),
+                )
+        except Exception as e:
+            log.exception("Failed to save %s", self.filename)
+            self.failed.emit(str(e))
+            return
+        self.saved.emit(self.filename)
@@ -0,0 +1,271 @@
+"""Qt-free scene model.
+
+SceneModel holds a scene as plain records, so scenes can be loaded,
+queried, edited and saved without a GUI (batch jobs, render-farm boxes).
+It reads and writes the same files and dump format as the editor:
+
+    model = SceneModel.load("scene.nod")
+    for n in model.find(type="NodeBookmark"):
+        model.setAttrs(n.id, url=n.attrs["url"].replace("http:", "https:"))
+    model.save("scene.nod")
+
+NodeRecord and EdgeRecord use __slots__; fields other than the core
+ones are kept in the attrs dict exactly as they appear in the file.
+The model uses the editor's dump format: SceneModel.fromDump() accepts
+the dump of a live scene, and model.toDump() could feed SceneBuilder,
+though the editor doesn't use SceneModel (node_cli does).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from node_io import (
+    increment_name,
+    make_dump,
+    read_scene,
+    register_name,
+    scene_nodes,
+    write_scene,
+)
+
+
+class NodeRecord:
+    __slots__ = ("attrs", "id", "name", "posx", "posy", "type")
+
+    def __init__(self, id, name, type="Node", posx=0, posy=0, attrs=None):
+        self.id = id
+        self.name = name
+        self.type = type
+        self.posx = posx
+        self.posy = posy
+        self.attrs = attrs if attrs is not None else {}
+
+    @classmethod
+    def fromDict(cls, d: dict[str, Any]) -> NodeRecord:
+        attrs = {
+            k: v
+            for k, v in d.items()
+            if k not in ("id", "name", "type", "posx", "posy")
+        }
+        return cls(
+            d.get("id"),
+            d.get("name", ""),
+            d.get("type", "Node"),
+            d.get("posx", 0),
+            d.get("posy", 0),
+            attrs,
+        )
+
+    def toDict(self) -> dict[str, Any]:
+        res = {"name": self.name, "id": self.id}
+        res.update(self.attrs)
+        res["posx"] = self.posx
+        res["posy"] = self.posy
+        res["type"] = self.type
+        return res
+
+    def __repr__(self):
+        return "NodeRecord(%r, %r, %r)" % (self.id, self.name, self.type)
+
+
+class EdgeRecord:
+    __slots__ = ("attr", "child", "id", "name", "parent")
+
+    def __init__(self, id, name, parent, child, attr=""):
+        self.id = id
+        self.name = name
+        self.parent = parent
+        self.child = child
+        self.attr = attr
+
+    @classmethod
+    def fromDict(cls, d: dict[str, Any]) -> EdgeRecord:
+        return cls(
+            d.get("id"),
+            d.get("name", ""),
+            d["parent"],
+            d["child"],
+            d.get("attr", ""),
+        )
+
+    def toDict(self) -> dict[str, Any]:
+        return {
+            "parent": self.parent,
+            "child": self.child,
+            "type": "Connection",
+            "name": self.name,
+            "attr": self.attr,
+            "id": self.id,
+        }
+
+    def __repr__(self):
+        return "EdgeRecord(%r, %r -> %r)" % (self.id, self.parent, self.child)
+
+
+class SceneModel:
+    """Nodes and edges of a scene keyed by id.
+
+    Nodes and edges share the id counter, like the editor does; ids of
+    loaded files are kept as they are.
+    """
+
+    def __init__(self):
+        self.nodes: dict[Any, NodeRecord] = {}
+        self.edges: dict[Any, EdgeRecord] = {}
+        self.names: dict[str, int] = {}
+        self.viewport: dict[str, Any] | None = None
+        self.ids = -1
+        self._edgesOf: dict[Any, list[Any]] = {}
+
+    # loading and saving
+
+    @classmethod
+    def fromDump(cls, dump: dict[str, Any]) -> SceneModel:
+        model = cls()
+        model.viewport = dump.get("viewport")
+        for d in scene_nodes(dump):
+            n = NodeRecord.fromDict(d)
+            if n.id is None:
+                n.id = model._newId()
+            model._addNode(n)
+        for d in dump.get("connections") or []:
+            e = EdgeRecord.fromDict(d)
+            if e.id is None:
+                e.id = model._newId()
+            model._addEdge(e)
+        return model
+
+    @classmethod
+    def load(cls, filename: str, cache: Any = None) -> SceneModel:
+        return cls.fromDump(read_scene(filename, cache))
+
+    def toDump(self) -> dict[str, Any]:
+        return make_dump(
+            {x: n.toDict() for x, n in self.nodes.items()},
+            {x: e.toDict() for x, e in self.edges.items()},
+            self.viewport,
+        )
+
+    def save(self, filename: str) -> None:
+        write_scene(filename, self.toDump())
+
+    # queries
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __iter__(self) -> Iterator[NodeRecord]:
+        return iter(self.nodes.values())
+
+    def node(self, name: str) -> NodeRecord | None:
+        """Node by name."""
+        for n in self.nodes.values():
+            if n.name == name:
+                return n
+        return None
+
+    def find(
+        self,
+        type: str | None = None,
+        predicate: Callable[[NodeRecord], bool] | None = None,
+    ) -> list[NodeRecord]:
+        return [
+            n
+            for n in self.nodes.values()
+            if (type is None or n.type == type)
+            and (predicate is None or predicate(n))
+        ]
+
+    def edgesOf(self, node_id) -> list[EdgeRecord]:
+        return [self.edges[x] for x in self._edgesOf.get(node_id, [])]
+
+    def children(self, node_id) -> list[NodeRecord]:
+        return [
+            self.nodes[e.child]
+            for e in self.edgesOf(node_id)
+            if e.parent == node_id and e.child in self.nodes
+        ]
+
+    def parents(self, node_id) -> list[NodeRecord]:
+        return [
+            self.nodes[e.parent]
+            for e in self.edgesOf(node_id)
+            if e.child == node_id and e.parent in self.nodes
+        ]
+
+    # edits
+
+    def addNode(
+        self, name: str = "Node", type: str = "Node", posx=0, posy=0, **attrs
+    ) -> NodeRecord:
+        """Add a node; name is made unique the way the editor does."""
+        n = NodeRecord(
+            self._newId(), self.uniqueName(name), type, posx, posy, attrs
+        )
+        self._addNode(n)
+        return n
+
+    def removeNode(self, node_id) -> None:
+        """Remove a node and its edges."""
+        for e in self.edgesOf(node_id):
+            self.disconnect(e.id)
+        del self.nodes[node_id]
+        self._edgesOf.pop(node_id, None)
+
+    def moveNode(self, node_id, posx, posy) -> None:
+        n = self.nodes[node_id]
+        n.posx = posx
+        n.posy = posy
+
+    def setAttrs(self, node_id, **attrs) -> None:
+        """Set node fields, e.g. setAttrs(3, url=..., posx=10)."""
+        n = self.nodes[node_id]
+        for k, v in attrs.items():
+            if k in ("name", "type", "posx", "posy"):
+                setattr(n, k, v)
+            else:
+                n.attrs[k] = v
+        if "name" in attrs:
+            register_name(n.name, self.names)
+
+    def connect(
+        self, parent, child, name: str = "Connection", attr: str = ""
+    ) -> EdgeRecord:
+        if parent not in self.nodes or child not in self.nodes:
+            raise KeyError("No node %r or %r" % (parent, child))
+        e = EdgeRecord(
+            self._newId(), self.uniqueName(name), parent, child, attr
+        )
+        self._addEdge(e)
+        return e
+
+    def disconnect(self, edge_id) -> None:
+        e = self.edges.pop(edge_id)
+        for x in (e.parent, e.child):
+            ids = self._edgesOf.get(x)
+            if ids is not None and edge_id in ids:
+                ids.remove(edge_id)
+
+    def uniqueName(self, name: str) -> str:
+        """Next free name with the base of name, e.g. Node3 -> Node8."""
+        return increment_name(name, self.names)
+
+    def _newId(self):
+        self.ids += 1
+        return self.ids
+
+    def _addNode(self, n):
+        self.nodes[n.id] = n
+        register_name(n.name, self.names)
+        if isinstance(n.id, int):
+            self.ids = max(self.ids, n.id)
+
+    def _addEdge(self, e):
+        self.edges[e.id] = e
+        register_name(e.name, self.names)
+        if isinstance(e.id, int):
+            self.ids = max(self.ids, e.id)
+        for x in {e.parent, e.child}:
+            self._edgesOf.setdefault(x, []).append(e.id)
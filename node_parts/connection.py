@@ -1,36 +1,146 @@
-from qtpy.QtGui import QPen, QColor, QPainterPath, QTransform
-from qtpy.QtCore import Qt, QRectF, QPointF
+from qtpy.QtGui import QColor, QPainterPath, QTransform
+from qtpy.QtCore import Qt, QObject, QRectF, QPointF, QTimer
 from qtpy.QtWidgets import QGraphicsItem, QMenu, QWidget
 
 import bezier
 
-try:
-    import pybezier
-except ImportError:
-    pybezier = None  # optional dependency
-from math import cos, sin, atan2
+from itertools import pairwise
+from math import ceil, hypot
 import node_utils
+from node_utils import timed_paint
+
+
+def flatten_steps(P):
+    """
+    Number of segments to flatten the curve with control points P into
+
+    Depends on the on-screen length of the curve at the current flatten
+    zoom level (options.flattenZoom, set by the view): about one segment
+    per options.flattenPixels pixels, rounded up to a power of two and at
+    most options.splineStep. A single segment is a straight line.
+    """
+    opts = node_utils.options
+    zoom = opts.flattenZoom
+    if zoom is None:
+        return opts.splineStep
+    # the control polygon is at least as long as the curve
+    length = 0.0
+    for (x0, y0), (x1, y1) in pairwise(P):
+        length += hypot(x1 - x0, y1 - y0)
+    steps = ceil(length * zoom / opts.flattenPixels)
+    if steps >= opts.splineStep:
+        return opts.splineStep
+    return 1 << max(steps - 1, 0).bit_length()
+
+
+def update_paths(connections):
+    """Recompute the paths of connections, sampling all curves in batches."""
+    batches = {}
+    for c in connections:
+        P = c.controlPoints()
+        batch = batches.setdefault(flatten_steps(P), ([], []))
+        batch[0].append(c)
+        batch[1].append(P)
+    for steps, (conns, curves) in batches.items():
+        points = bezier.evaluate_curves(curves, steps)
+        for c, pts in zip(conns, points):
+            c.prepareGeometryChange()
+            c.setCurve(pts)
+            c.update()
+
+
+class PathScheduler(QObject):
+    """
+    Coalesces connection path updates while dragging
+
+    Between begin() and end(), schedule() only marks connections dirty;
+    they are recomputed in one update_paths() batch per frame, each at
+    most once however many mouse events moved their nodes. Otherwise
+    schedule() updates the paths right away.
+    """
+
+    frameInterval = 16
+
+    def __init__(self):
+        super().__init__()
+        self.dirty = {}
+        self.depth = 0
+        self.frames = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.frameInterval)
+        self.timer.timeout.connect(self.flush)
+
+    def begin(self):
+        self.depth += 1
+
+    def end(self):
+        self.depth = max(self.depth - 1, 0)
+        if not self.depth:
+            self.flush()
+
+    def schedule(self, connections):
+        if not self.depth:
+            update_paths(connections)
+            return
+        for c in connections:
+            self.dirty[c] = None
+        if self.dirty and not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        """Update the dirty paths now."""
+        self.timer.stop()
+        if not self.dirty:
+            return
+        dirty = list(self.dirty)
+        self.dirty.clear()
+        self.frames += 1
+        update_paths(dirty)
+
+
+path_scheduler = PathScheduler()
+
+
+def add_connection_item(scene, c):
+    """Add c to scene, or to options.connectionLayer when it's used."""
+    layer = node_utils.options.connectionLayer
+    if layer is not None:
+        layer.addConnection(c)
+    else:
+        scene.addItem(c)
+
+
+def remove_connection_item(scene, c):
+    if c.layer is not None:
+        c.layer.removeConnection(c)
+    else:
+        scene.removeItem(c)
 
 
 class Connection(QGraphicsItem):
     def __init__(self, d):
         super().__init__()
-        from node_parts.parts import TitleItem
+        from node_parts.parts import StaticTitleItem
 
+        # ConnectionLayer drawing this connection, see add_connection_item
+        self.layer = None
         self.p_x = []
         self.p_y = []
-        self.pen = QPen(Qt.GlobalColor.black, 1)
+        self.pen = node_utils.options.paintCache.pen(Qt.GlobalColor.black, 1)
 
         self.arrow1 = QPainterPath()
         self.arrow2 = QPainterPath()
+        self._serialized = None
         self.constrain = d.get("constrain", True)
-        self.nameItem = TitleItem("", self, "name")
+        self.nameItem = StaticTitleItem("", self, "name")
         self.fromDict(d)
         self.updatePath()
         self.setAcceptDrops(True)
         self.setAcceptHoverEvents(True)
 
     def fromDict(self, d):
+        self._serialized = None
         self.parent_node = d["parent"]
         self.child = d["child"]
         if "id" in d.keys():
@@ -49,133 +159,124 @@ class Connection(QGraphicsItem):
         res["id"] = self.id
         return res
 
+    def markDirty(self):
+        self._serialized = None
+
+    def serialize(self):
+        """toDict() cached until the connection changes."""
+        if self._serialized is None:
+            self._serialized = self.toDict()
+        return self._serialized
+
     def shape(self):
         p = QPainterPath()
         z = self.boundingRect()
         p.addRect(z)
         return self.path
 
-    def updatePath(self):
+    def controlPoints(self):
+        """Bezier control points of the connection curve, see updatePath."""
         if self.constrain:
-            t = QTransform()
-            if (
-                hasattr(self.parent_node, "connector")
-                and self.parent_node.connector
-            ):
-                p1 = t.map(
-                    self.parent_node.pos() + self.parent_node.connector.pos()
-                )
+            parent = self.parent_node
+            start = parent.connectorPos()
+            if start is not None:
+                p1 = parent.pos() + start
             else:
-                p = self.parent_node.pos() + self.parent_node._rect.center()
+                p1 = parent.pos() + parent._rect.center()
+                p1 += parent._rect.topRight() * 0.5
+                if parent.rotation():
+                    t = QTransform()
+                    p = parent.pos() + parent._rect.center()
+                    t.translate(p.x(), p.y())
+                    t.rotate(parent.rotation())
+                    t.translate(-p.x(), -p.y())
+                    p1 = t.map(p1)
+
+            p2 = self.child.pos() + self.child._rect.topRight() * 0.5
+            if self.child.rotation():
+                t = QTransform()
+                p = self.child.pos() + self.child._rect.center()
                 t.translate(p.x(), p.y())
-                t.rotate(self.parent_node.rotation())
+                t.rotate(self.child.rotation())
                 t.translate(-p.x(), -p.y())
-                p1 = t.map(
-                    self.parent_node.pos()
-                    + self.parent_node._rect.center()
-                    + self.parent_node._rect.topRight() * 0.5
-                )
-
-            t = QTransform()
-            p = self.child.pos() + self.child._rect.center()
-            t.translate(p.x(), p.y())
-            t.rotate(self.child.rotation())
-            t.translate(-p.x(), -p.y())
-            p2 = t.map(self.child.pos() + self.child._rect.topRight() * 0.5)
+                p2 = t.map(p2)
             self._rect = QRectF(p1, p2)
         else:
             self._rect = QRectF(self.parent_node, self.child)
-        a = self._rect.topLeft()
-        b = self._rect.bottomRight()
+        ax, ay = self._rect.left(), self._rect.top()
+        bx, by = self._rect.right(), self._rect.bottom()
+        dx = bx - ax
+        dy = abs(by - ay)
 
-        self.path = QPainterPath()
-
-        self.p_x = [
-            a.x(),
-            a.x() + (b.x() - a.x()) * 0.1,
-            (a.x() + b.x()) / 2.0,
-            b.x() - (b.x() - a.x()) * 0.1,
-            b.x(),
-        ]
-        self.p_y = [
-            a.y(),
-            a.y() + abs(b.y() - a.y()) * 0.2,
-            (a.y() + b.y()) / 2.0,
-            b.y() - abs(b.y() - a.y()) * 0.2,
-            b.y(),
-        ]
-        P = list(zip(self.p_x, self.p_y))
+        self.p_x = [ax, ax + dx * 0.1, (ax + bx) / 2.0, bx - dx * 0.1, bx]
+        self.p_y = [ay, ay + dy * 0.2, (ay + by) / 2.0, by - dy * 0.2, by]
         # P = [(a.x(),a.y()),(a.x(),a.y()+10),(a.x(),a.y()+20),((b.x()+a.x())*0.5,(b.y()+a.y())*0.5),(b.x(),b.y()-20),(b.x(),b.y()-10),(b.x(),b.y())]
         # P = [(a.x(), a.y()), (a.x() + 10, a.y()), (a.x() + 30, a.y()), (b.x() - 30, b.y()), (b.x() - 10, b.y()),(b.x(), b.y())]
+        return list(zip(self.p_x, self.p_y))
 
-        S = bezier.Bezier(P)
-        self.path.moveTo(P[0][0], P[0][1])
-        step_size = 1 / float(node_utils.options.splineStep)
-        for i in range(1, node_utils.options.splineStep + 1):
-            t_ = i * step_size
-            # try:
-            x, y = S(t_)
-            # except AssertionError: continue
+    def setCurve(self, points):
+        """Set the path to the polyline of points sampled on the curve."""
+        self.points = points
+        node_utils.options.perf.count("updatePath")
+        self.path = QPainterPath()
+        x, y = points[0]
+        self.path.moveTo(x, y)
+        for x, y in points[1:]:
             self.path.lineTo(x, y)
-        return
-        # x, y = S(0.85)
-
-        # Lagrange
-        li = []
-        for i in range(len(self.p_x)):
-            li += [self.p_x[i]] + [self.p_y[i]]
-        return
-        w = pybezier.Spline(li)
-        li = w.interpolate(4)
-        x_intpol = []
-        y_intpol = []
-        for i in range(len(li) / 2):
-            x_intpol += [li[i * 2]]
-            y_intpol += [li[i * 2 + 1]]
-        # x_intpol, y_intpol = bezier.CatmullRom(self.p_x, self.p_y, node_utils.options.splineStep/3)
-
-        self.path.moveTo(x_intpol[0], y_intpol[0])
-        for i in range(1, len(x_intpol)):
-            self.path.lineTo(x_intpol[i], y_intpol[i])
-        x = x_intpol[-2]
-        y = y_intpol[-2]
-
-        self.nameItem.setPos(self.boundingRect().center())
-        self.nameItem.setRotation(-self.path.angleAtPercent(0.5))
-        # x,y=S(0.5)
-        # p0 = QPointF(x,y)
-        # p0 = p0-b
-        # a = degrees(atan2(p0.y(),p0.x()))
-        # self.nameItem.setRotation(180+a)
-
-        p0 = QPointF(x, y)
-        p0 = p0 - b
-        a = atan2(p0.y(), p0.x())
-        self.arrow1 = QPainterPath()
-        self.arrow1.moveTo(b)
-        self.arrow1.lineTo(
-            b.x() + cos(a - 0.15) * 15.0, b.y() + sin(a - 0.15) * 15.0
-        )
-        self.arrow2 = QPainterPath()
-        self.arrow2.moveTo(b)
-        self.arrow2.lineTo(
-            b.x() + cos(a + 0.15) * 15.0, b.y() + sin(a + 0.15) * 15.0
-        )
+
+    def updatePath(self):
+        P = self.controlPoints()
+        self.setCurve(bezier.evaluate_curves([P], flatten_steps(P))[0])
 
     def boundingRect(self):
         return self.path.controlPointRect()
 
+    def update(self, *args):
+        if self.layer is not None:
+            self.layer.updateConnection(self)
+        else:
+            super().update(*args)
+
+    def setVisible(self, visible: bool):
+        super().setVisible(visible)
+        if self.layer is not None:
+            self.layer.updateConnection(self)
+
     def setSelected(self, selected: bool):
+        cache = node_utils.options.paintCache
         if selected:
-            self.pen = QPen(QColor(250, 200, 70), 1.3)
+            self.pen = cache.pen(QColor(250, 200, 70), 1.3)
         else:
-            self.pen = QPen(Qt.GlobalColor.black, 1.3)
+            self.pen = cache.pen(Qt.GlobalColor.black, 1.3)
         self.update()
 
+    def labelRect(self):
+        """Scene rect of the name label, empty when there's no name."""
+        if not self.nameItem.toPlainText():
+            return QRectF()
+        return self.nameItem.sceneBoundingRect()
+
+    def paintLabel(self, painter, option, widget=None):
+        """Paint the name label for a ConnectionLayer, it's not in the scene."""
+        label = self.nameItem
+        if not label.isVisible() or not label.toPlainText():
+            return
+        painter.save()
+        painter.setTransform(label.sceneTransform(), True)
+        label.paint(painter, option, widget)
+        painter.restore()
+
+    @timed_paint
     def paint(self, painter, option, widget=None):
         if painter is None:
             return
         painter.setPen(self.pen)
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        if lod < node_utils.options.connectionDetailLevel:
+            painter.drawLine(
+                QPointF(self.path.elementAt(0)), self.path.currentPosition()
+            )
+            return
         painter.drawPath(self.path)
         painter.drawPath(self.arrow1)
         painter.drawPath(self.arrow2)
@@ -183,15 +284,31 @@ class Connection(QGraphicsItem):
     def contextMenuEvent(self, event):
         if event is None:
             return
-        scene = self.scene()
+        scene = self.scene() if self.layer is None else self.layer.scene()
         if scene is None:
             return
-        parent = scene.parent() if scene is not None else None
+        parent = scene.parent()
         menu = QMenu(parent=parent if isinstance(parent, QWidget) else None)
         editNameAction = menu.addAction("Edit name")
         action = menu.exec(event.screenPos())
         if action == editNameAction:
+            self.editName()
+
+    def editName(self):
+        if self.layer is None:
             self.nameItem.setTextInteractionFlags(
                 Qt.TextInteractionFlag.TextEditorInteraction
             )
             self.nameItem.setFocus(Qt.FocusReason.MouseFocusReason)
+            return
+        from node_parts.parts import edit_text
+
+        # the label isn't in the scene, the layer holds its editor
+        editor = self.nameItem.startEditing(self.layer)
+        editor.finished = self.stopEditingName
+        self.update()
+        edit_text(editor)
+
+    def stopEditingName(self):
+        self.nameItem.stopEditing()
+        self.update()
@@ -0,0 +1,188 @@
+"""Single scene item drawing all connections.
+
+With many connections the scene index and the paint traversal are
+dominated by one item per edge. A ConnectionLayer keeps the connections
+out of the scene: it bins the segments of their paths into a grid of
+cellSize squares, paints the connections whose cells are exposed and
+answers hit tests and rubber band selections from the same grid. Name
+labels of the connections are painted by the layer as well, and their
+editors are child items of the layer.
+
+Connections are added to the layer instead of the scene with
+add_connection_item() (node_parts.connection) while
+options.connectionLayer is set.
+"""
+
+from __future__ import annotations
+
+from itertools import pairwise
+from math import floor
+
+from qtpy.QtCore import QRectF, Qt
+from qtpy.QtWidgets import QGraphicsItem
+
+# painted area around a connection's path: pen width and arrows
+_MARGIN = 16
+
+
+class ConnectionLayer(QGraphicsItem):
+    cellSize = 256.0
+
+    def __init__(self):
+        super().__init__()
+        self.connections = {}  # connection -> grid cells of its segments
+        self.cells = {}
+        self._rects = {}
+        self._bounds = QRectF()
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+
+    # connections
+
+    def addConnection(self, c):
+        c.layer = self
+        self.connections[c] = ()
+        self.updateConnection(c)
+
+    def removeConnection(self, c):
+        self._unbin(c)
+        del self.connections[c]
+        rect = self._rects.pop(c)
+        c.layer = None
+        self.update(rect)
+
+    def updateConnection(self, c):
+        """Rebin c after its path, pen or visibility changed."""
+        old = self._rects.get(c)
+        self._unbin(c)
+        rect = c.boundingRect().adjusted(-_MARGIN, -_MARGIN, _MARGIN, _MARGIN)
+        label = c.labelRect()
+        keys = set()
+        if not label.isEmpty():
+            rect = rect.united(label)
+            keys.update(
+                self._keys(
+                    label.left(), label.top(), label.right(), label.bottom()
+                )
+            )
+        self._rects[c] = rect
+        points = c.points
+        for (x0, y0), (x1, y1) in pairwise(points):
+            keys.update(
+                self._keys(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+            )
+        if len(points) == 1:
+            x, y = points[0]
+            keys.update(self._keys(x, y, x, y))
+        for key in keys:
+            self.cells.setdefault(key, set()).add(c)
+        self.connections[c] = keys
+        if not self._bounds.contains(rect):
+            self.prepareGeometryChange()
+            self._bounds = self._bounds.united(rect)
+        if old is not None:
+            self.update(old)
+        self.update(rect)
+
+    def clear(self):
+        for c in self.connections:
+            c.layer = None
+        self.connections.clear()
+        self.cells.clear()
+        self._rects.clear()
+        self.prepareGeometryChange()
+        self._bounds = QRectF()
+
+    def _unbin(self, c):
+        for key in self.connections.get(c, ()):
+            cell = self.cells[key]
+            cell.discard(c)
+            if not cell:
+                del self.cells[key]
+
+    def _keys(self, left, top, right, bottom):
+        s = self.cellSize
+        return [
+            (i, j)
+            for i in range(floor(left / s), floor(right / s) + 1)
+            for j in range(floor(top / s), floor(bottom / s) + 1)
+        ]
+
+    def candidates(self, rect):
+        """Visible connections with segments in cells touched by rect."""
+        s = self.cellSize
+        cols = floor(rect.right() / s) - floor(rect.left() / s) + 1
+        rows = floor(rect.bottom() / s) - floor(rect.top() / s) + 1
+        if cols * rows > len(self.cells):
+            cells = self.cells.values()
+        else:
+            cells = [
+                self.cells[k]
+                for k in self._keys(
+                    rect.left(), rect.top(), rect.right(), rect.bottom()
+                )
+                if k in self.cells
+            ]
+        found = set()
+        for cell in cells:
+            found.update(cell)
+        return [c for c in found if c.isVisible()]
+
+    # hit tests
+
+    def connectionsIn(
+        self, path, mode=Qt.ItemSelectionMode.IntersectsItemShape
+    ):
+        """Connections selected by the scene path, like QGraphicsScene.items."""
+        rect = path.boundingRect()
+        result = []
+        for c in self.candidates(rect):
+            if not self._rects[c].intersects(rect):
+                continue
+            if mode in (
+                Qt.ItemSelectionMode.ContainsItemShape,
+                Qt.ItemSelectionMode.ContainsItemBoundingRect,
+            ):
+                hit = path.contains(c.path)
+            else:
+                hit = path.intersects(c.path)
+            if hit:
+                result.append(c)
+        return result
+
+    def connectionAt(self, pos):
+        rect = QRectF(pos.x() - 0.5, pos.y() - 0.5, 1, 1)
+        for c in self.candidates(rect):
+            if c.path.contains(pos):
+                return c
+        return None
+
+    def collidesWithPath(
+        self, path, mode=Qt.ItemSelectionMode.IntersectsItemShape
+    ):
+        return bool(self.connectionsIn(path, mode))
+
+    def contains(self, pos):
+        return self.connectionAt(pos) is not None
+
+    def contextMenuEvent(self, event):
+        if event is None:
+            return
+        c = self.connectionAt(event.scenePos())
+        if c is None:
+            event.ignore()
+            return
+        c.contextMenuEvent(event)
+
+    # painting
+
+    def boundingRect(self):
+        return self._bounds
+
+    def paint(self, painter, option, widget=None):
+        if painter is None:
+            return
+        exposed = option.exposedRect
+        for c in self.candidates(exposed):
+            if self._rects[c].intersects(exposed):
+                c.paint(painter, option, widget)
+                c.paintLabel(painter, option, widget)
@@ -0,0 +1,130 @@
+"""Background grid of the node view.
+
+The grid is rendered once per zoom level into a tile whose pixels are
+gray levels, stored as an indexed image: brightness only swaps the
+color table (brightness_lut()), the pixels are never repainted. Lines
+narrower than a pixel at low zoom levels are blended by their coverage,
+so the minor lines fade out instead of flickering.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+from qtpy.QtCore import QPointF, QRectF
+from qtpy.QtGui import QImage, QPainter, QPixmap, qRgb
+
+GRID_SIZE = 64  # scene units between major lines
+GRID_MINOR = 16
+GRID_LINE = 2  # line width in scene units
+GRID_BACK = 0x6D
+GRID_MINOR_COLOR = 0x63
+GRID_MAJOR_COLOR = 0x58
+
+
+def brightness_lut(brightness: int) -> list[int]:
+    """Gray level for each of 256 gray levels, 50 keeps them as they are."""
+    return [min(255, int(v * brightness * 0.02)) for v in range(256)]
+
+
+def _coverage(bands, size, level):
+    """Covered fraction of each of size pixels by the bands."""
+    result = []
+    for i in range(size):
+        start = i / level
+        end = (i + 1) / level
+        covered = 0.0
+        for a, b in bands:
+            covered += max(0.0, min(end, b) - max(start, a))
+        result.append(min(1.0, covered * level))
+    return result
+
+
+@lru_cache(maxsize=8)
+def grid_image(level: float) -> QImage:
+    """Indexed tile of the grid at level pixels per scene unit."""
+    # a tile is at least GRID_SIZE pixels wide
+    periods = max(1, int(1 / level))
+    span = GRID_SIZE * periods
+    size = round(span * level)
+    half = GRID_LINE / 2
+    major = [(x - half, x + half) for x in range(0, span + 1, GRID_SIZE)]
+    minor = [
+        (x - half, x + half)
+        for x in range(0, span, GRID_MINOR)
+        if x % GRID_SIZE
+    ]
+    majors = _coverage(major, size, level)
+    minors = _coverage(minor, size, level)
+    stride = (size + 3) & ~3
+    rows = []
+    for my, ny in zip(majors, minors):
+        row = []
+        for mx, nx in zip(majors, minors):
+            cmajor = 1 - (1 - mx) * (1 - my)
+            cminor = (1 - (1 - nx) * (1 - ny)) * (1 - cmajor)
+            row.append(
+                round(
+                    GRID_BACK
+                    + (GRID_MAJOR_COLOR - GRID_BACK) * cmajor
+                    + (GRID_MINOR_COLOR - GRID_BACK) * cminor
+                )
+            )
+        rows.append(bytes(row).ljust(stride, b"\0"))
+    image = QImage(
+        b"".join(rows), size, size, stride, QImage.Format.Format_Indexed8
+    )
+    return image.copy()
+
+
+class BackgroundGrid:
+    """Grid tiles at a few zoom levels for View.drawBackground."""
+
+    levels = (0.125, 0.25, 0.5, 1.0, 2.0, 4.0)
+
+    def __init__(self, brightness: int = 50):
+        self.brightness = brightness
+        self._colors = []
+        self._pixmaps = {}
+        self.setBrightness(brightness)
+
+    def setBrightness(self, brightness: int):
+        self.brightness = brightness
+        self._colors = [qRgb(v, v, v) for v in brightness_lut(brightness)]
+        self._pixmaps.clear()
+
+    def level(self, zoom: float) -> float:
+        """Smallest level not below zoom, tiles are only scaled down."""
+        for level in self.levels:
+            if level >= zoom:
+                return level
+        return self.levels[-1]
+
+    def pixmap(self, level: float) -> QPixmap:
+        pixmap = self._pixmaps.get(level)
+        if pixmap is None:
+            image = QImage(grid_image(level))
+            image.setColorTable(self._colors)
+            pixmap = QPixmap.fromImage(image)
+            self._pixmaps[level] = pixmap
+        return pixmap
+
+    def draw(self, painter: QPainter, rect: QRectF, zoom: float):
+        """Fill the scene rect with the grid for the view's zoom."""
+        level = self.level(zoom)
+        pixmap = self.pixmap(level)
+        r = QRectF(
+            rect.left() * level,
+            rect.top() * level,
+            rect.width() * level,
+            rect.height() * level,
+        )
+        painter.save()
+        # one tile pixel per device pixel when zoom is a level
+        painter.scale(1 / level, 1 / level)
+        painter.drawTiledPixmap(
+            r,
+            pixmap,
+            QPointF(r.left() % pixmap.width(), r.top() % pixmap.height()),
+        )
+        painter.restore()
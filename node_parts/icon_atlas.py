@@ -0,0 +1,79 @@
+"""Small icons packed into shared pages.
+
+Nodes don't own a pixmap item for their icon: Node.paint draws it with
+icon_atlas.draw() as a sub-rect of a large page pixmap, so all nodes
+showing icons draw from a few pixmaps. Icons are added to the current
+page the first time they're drawn, row by row; a full page starts a new
+one, existing pages are never repacked. Icons are keyed by the pixmap's
+cacheKey(), so nodes sharing a cached pixmap share its place in a page.
+"""
+
+from __future__ import annotations
+
+from qtpy.QtCore import QPointF, QRect, QRectF, Qt
+from qtpy.QtGui import QPainter, QPixmap
+
+
+class IconAtlas:
+    pageSize = 512
+    # larger pixmaps are drawn directly
+    maxIconSize = 64
+    padding = 1
+
+    def __init__(self):
+        self.pages = []
+        self.tiles = {}  # pixmap cacheKey -> (page index, source rect)
+        self._x = 0
+        self._y = 0
+        self._rowHeight = 0
+
+    def clear(self):
+        self.pages = []
+        self.tiles.clear()
+        self._x = self._y = self._rowHeight = 0
+
+    def tile(self, pixmap: QPixmap):
+        """(page, rect) of pixmap in the atlas, None if it's too large."""
+        key = pixmap.cacheKey()
+        tile = self.tiles.get(key)
+        if tile is not None:
+            return tile
+        w, h = pixmap.width(), pixmap.height()
+        if max(w, h) > self.maxIconSize or pixmap.isNull():
+            return None
+        if self._x + w > self.pageSize:
+            self._x = 0
+            self._y += self._rowHeight + self.padding
+            self._rowHeight = 0
+        if not self.pages or self._y + h > self.pageSize:
+            page = QPixmap(self.pageSize, self.pageSize)
+            page.fill(Qt.GlobalColor.transparent)
+            self.pages.append(page)
+            self._x = self._y = self._rowHeight = 0
+        rect = QRect(self._x, self._y, w, h)
+        painter = QPainter(self.pages[-1])
+        painter.setCompositionMode(
+            QPainter.CompositionMode.CompositionMode_Source
+        )
+        painter.drawPixmap(QRectF(rect), pixmap, QRectF(pixmap.rect()))
+        painter.end()
+        self._x += w + self.padding
+        self._rowHeight = max(self._rowHeight, h)
+        tile = self.tiles[key] = (len(self.pages) - 1, rect)
+        return tile
+
+    def draw(self, painter: QPainter, pos: QPointF, pixmap: QPixmap):
+        """Draw pixmap at pos, from its page when it has one."""
+        dpr = pixmap.devicePixelRatio()
+        target = QRectF(
+            pos.x(), pos.y(), pixmap.width() / dpr, pixmap.height() / dpr
+        )
+        tile = self.tile(pixmap)
+        if tile is None:
+            painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+            return
+        page, rect = tile
+        painter.drawPixmap(target, self.pages[page], QRectF(rect))
+
+
+icon_atlas = IconAtlas()
@@ -0,0 +1,127 @@
+"""Icon files decoded in the background.
+
+IconLoader reads and scales icon files to QImages on a thread pool and
+turns them into pixmaps on the GUI thread, cached in options.pixmapCache
+under the same keys as NodesOptions.get_icon. Until an icon is decoded
+its requests get a shared placeholder; requests for a file that is
+already being decoded wait for the same job.
+
+File types of bookmarked files (QFileIconProvider.type) are looked up
+the same way, the icons of the types are made on the GUI thread.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any
+
+from qtpy.QtCore import QFileInfo, QObject, QSize, Qt, Signal  # type: ignore[attr-defined]
+from qtpy.QtGui import QColor, QImageReader, QPixmap
+from qtpy.QtWidgets import QApplication, QFileIconProvider
+
+import node_utils
+from node_utils import device_pixel_ratio
+
+PLACEHOLDER_GLYPH = "fa6s.image"
+PLACEHOLDER_COLOR = QColor(150, 150, 150)
+
+
+def decode_icon(path: str, size: int | None):
+    """QImage of the file at path scaled to size, null if unreadable."""
+    reader = QImageReader(path)
+    if size is not None:
+        reader.setScaledSize(QSize(size, size))
+    return reader.read()
+
+
+def file_type(path: str) -> str:
+    return QFileIconProvider().type(QFileInfo(path))
+
+
+class IconLoader(QObject):
+    workers = 4
+    done = Signal(object, object)
+
+    def __init__(self):
+        super().__init__()
+        self.pool = None
+        self.pending: dict[Any, list[Callable]] = {}
+        self.futures = set()
+        self.jobs = 0
+        # queued even when a job is done before add_done_callback, so
+        # callbacks never run before request() returns
+        self.done.connect(self._finish, Qt.ConnectionType.QueuedConnection)
+
+    def placeholder(self) -> QPixmap:
+        opts = node_utils.options
+        return opts.get_awesome_pixmap(
+            PLACEHOLDER_GLYPH, opts.iconSize, PLACEHOLDER_COLOR
+        )
+
+    def request(self, path: str, callback: Callable, resize: bool = True):
+        """
+        The icon of path when it's cached, the placeholder otherwise;
+        callback(path, pixmap or None) is called once it's decoded, None
+        if it can't be read.
+        """
+        opts = node_utils.options
+        size = opts.iconSize if resize else None
+        key = ("file", path, size, None, device_pixel_ratio())
+        pix = opts.pixmapCache.find(key)
+        if pix is not None:
+            return pix
+        self._submit(key, callback, decode_icon, path, size)
+        return self.placeholder()
+
+    def requestType(self, path: str, callback: Callable):
+        """Call callback(path, type) with the file type of path."""
+        self._submit(("type", path), callback, file_type, path)
+
+    def _submit(self, key, callback, func, *args):
+        callbacks = self.pending.get(key)
+        if callbacks is not None:
+            callbacks.append(callback)
+            return
+        self.pending[key] = [callback]
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="icons"
+            )
+        self.jobs += 1
+        future = self.pool.submit(func, *args)
+        self.futures.add(future)
+        future.add_done_callback(lambda f: self._done(key, f))
+
+    def _done(self, key, future):
+        # worker thread, the result is handled on the GUI thread; a
+        # failed job counts as an unreadable file
+        result = None if future.exception() is not None else future.result()
+        self.done.emit(key, result)
+
+    def _finish(self, key, result):
+        self.futures = {f for f in self.futures if not f.done()}
+        callbacks = self.pending.pop(key, [])
+        if key[0] == "file":
+            pix = QPixmap() if result is None else QPixmap.fromImage(result)
+            # files that can't be read are tried again on the next request
+            if pix.isNull():
+                result = None
+            else:
+                node_utils.options.pixmapCache.put(key, pix)
+                result = pix
+        for callback in callbacks:
+            try:
+                callback(key[1], result)
+            except RuntimeError:
+                # the item was deleted meanwhile
+                pass
+
+    def wait(self):
+        """Block until all requests are done and their callbacks called."""
+        while self.pending:
+            wait(list(self.futures))
+            QApplication.processEvents()
+
+
+icon_loader = IconLoader()
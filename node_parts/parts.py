@@ -1,7 +1,15 @@
-from qtpy.QtGui import QColor, QTextCursor, QTextCharFormat, QDrag
-from qtpy.QtCore import Qt, QByteArray
+from qtpy.QtGui import (
+    QColor,
+    QTextCursor,
+    QTextCharFormat,
+    QDrag,
+    QFont,
+    QStaticText,
+)
+from qtpy.QtCore import Qt, QByteArray, QPointF, QRectF, QTimer
 from qtpy.QtWidgets import (
     QGraphicsDropShadowEffect,
+    QGraphicsItem,
     QGraphicsPixmapItem,
     QGraphicsRectItem,
     QGraphicsTextItem,
@@ -9,6 +17,7 @@ from qtpy.QtWidgets import (
 from qtpy.QtGui import QBrush, QPen, QCursor
 import node_utils
 from node_utils import NodeMimeData
+from node_parts.connection import path_scheduler
 
 
 class TitleItem(QGraphicsTextItem):
@@ -20,6 +29,8 @@ class TitleItem(QGraphicsTextItem):
         self.setFont(node_utils.options.titleFont)
         self.setAcceptedMouseButtons(Qt.MouseButton.LeftButton)
         self.setFlag(QGraphicsTextItem.GraphicsItemFlag.ItemIsFocusable, True)
+        # called when editing ends, see StaticTitleItem
+        self.finished = None
         if title:
             self.setDefaultTextColor(QColor(200, 200, 250))
 
@@ -48,6 +59,8 @@ class TitleItem(QGraphicsTextItem):
             self.setTextInteractionFlags(
                 Qt.TextInteractionFlag.NoTextInteraction
             )
+            if self.finished is not None:
+                self.finished()
 
     def focusOutEvent(self, event):
         if (
@@ -64,6 +77,8 @@ class TitleItem(QGraphicsTextItem):
         self.setTextInteractionFlags(Qt.TextInteractionFlag.NoTextInteraction)
         self.textCursor().clearSelection()
         super().focusOutEvent(event)
+        if self.finished is not None:
+            self.finished()
 
     def mouseDoubleClickEvent(self, event):
         self.setTextInteractionFlags(
@@ -73,6 +88,176 @@ class TitleItem(QGraphicsTextItem):
         super().mouseDoubleClickEvent(event)
 
 
+class StaticTitleItem(QGraphicsItem):
+    """Plain text title painted from a QStaticText.
+
+    Has the parts of the TitleItem interface nodes and connections use,
+    without a QTextDocument per item. A TitleItem is created over it only
+    while the text is edited.
+    """
+
+    # QGraphicsTextItem's document margin, so both draw text at one place
+    margin = 4
+
+    def __init__(self, text, parent, attr, title=False):
+        super().__init__(parent)
+        self.parent_item = parent
+        self.attr = attr
+        self.title = title
+        self.editor = None
+        self._font = node_utils.options.titleFont
+        self._color = QColor(Qt.GlobalColor.black)
+        self._text = ""
+        self._static = QStaticText()
+        self._static.setTextFormat(Qt.TextFormat.PlainText)
+        self._rect = QRectF()
+        self.setAcceptedMouseButtons(Qt.MouseButton.LeftButton)
+        self.setPlainText(text)
+
+    def toPlainText(self):
+        if self.editor is not None:
+            return self.editor.toPlainText()
+        return self._text
+
+    def setPlainText(self, text):
+        self._text = text or ""
+        self._static.setText(self._text)
+        self._layout()
+
+    def font(self):
+        return QFont(self._font)
+
+    def setFont(self, font):
+        self._font = QFont(font)
+        self._layout()
+
+    def defaultTextColor(self):
+        return QColor(self._color)
+
+    def setDefaultTextColor(self, color):
+        self._color = QColor(color)
+        self.update()
+
+    def _layout(self):
+        self._static.prepare(font=self._font)
+        size = self._static.size()
+        m = self.margin
+        self.prepareGeometryChange()
+        self._rect = QRectF(0, 0, size.width() + 2 * m, size.height() + 2 * m)
+
+    # editing
+
+    def textInteractionFlags(self):
+        if self.editor is None:
+            return Qt.TextInteractionFlag.NoTextInteraction
+        return self.editor.textInteractionFlags()
+
+    def setTextInteractionFlags(self, flags):
+        if flags == Qt.TextInteractionFlag.NoTextInteraction:
+            self.stopEditing()
+        else:
+            self.startEditing().setTextInteractionFlags(flags)
+
+    def setFocus(self, reason=Qt.FocusReason.OtherFocusReason):
+        if self.editor is not None:
+            self.editor.setFocus(reason)
+        else:
+            super().setFocus(reason)
+
+    def startEditing(self, parent=None):
+        """The TitleItem editing the text, created on first use.
+
+        parent is the item holding the editor when this item isn't in
+        the scene, e.g. the ConnectionLayer painting it.
+        """
+        if self.editor is None:
+            editor = TitleItem(
+                self._text, parent or self, self.attr, self.title
+            )
+            if parent is not None:
+                editor.setPos(parent.mapFromScene(self.scenePos()))
+            editor.parent_item = self.parent_item
+            editor.setFont(self._font)
+            editor.setDefaultTextColor(self._color)
+            editor.finished = self.stopEditing
+            self.editor = editor
+            self.update()
+        return self.editor
+
+    def stopEditing(self):
+        editor = self.editor
+        if editor is None:
+            return
+        self.editor = None
+        self.setPlainText(editor.toPlainText())
+        remove_editor(editor)
+
+    def mouseDoubleClickEvent(self, event):
+        edit_text(self.startEditing())
+
+    # painting
+
+    def boundingRect(self):
+        return self._rect
+
+    def paint(self, painter, option, widget=None):
+        if painter is None or self.editor is not None or not self._text:
+            return
+        painter.setFont(self._font)
+        painter.setPen(self._color)
+        painter.drawStaticText(QPointF(self.margin, self.margin), self._static)
+
+
+def edit_text(editor):
+    """Let the user edit editor's text, all of it selected."""
+    editor.setTextInteractionFlags(Qt.TextInteractionFlag.TextEditorInteraction)
+    editor.setFocus(Qt.FocusReason.MouseFocusReason)
+    cursor = editor.textCursor()
+    cursor.select(QTextCursor.SelectionType.Document)
+    editor.setTextCursor(cursor)
+
+
+def remove_editor(editor):
+    """Hide a TitleItem that is done editing and remove it from its scene."""
+    editor.finished = None
+    editor.hide()
+    # the editor may be in the middle of its own event handler
+    QTimer.singleShot(0, lambda: _remove_item(editor))
+
+
+def _remove_item(item):
+    scene = item.scene()
+    if scene is not None:
+        scene.removeItem(item)
+
+
+def start_connect_drag(widget, node):
+    """Drag a new connection from node, see View.dropEvent."""
+    drag = QDrag(widget)
+    mime = NodeMimeData()
+    mime.setData("node/connect", QByteArray())
+    mime.setObject(node)
+    drag.setMimeData(mime)
+    cursor = QCursor(Qt.CursorShape.ArrowCursor)
+    drag.setDragCursor(cursor.pixmap(), Qt.DropAction.CopyAction)
+    drag.exec(Qt.DropAction.CopyAction)
+
+
+def start_resize_drag(widget, node):
+    """Select node and resize it while dragging, see View.dragMoveEvent."""
+    node_utils.options.set_selection([node])
+    drag = QDrag(widget)
+    mime = NodeMimeData()
+    mime.setData("node/resize", QByteArray())
+    mime.setObject(node)
+    drag.setMimeData(mime)
+    path_scheduler.begin()
+    try:
+        drag.exec(Qt.DropAction.MoveAction)
+    finally:
+        path_scheduler.end()
+
+
 class NodeInput(QGraphicsRectItem):
     def __init__(self, parent, type=None):
         super().__init__(parent)
@@ -94,15 +279,7 @@ class NodeInput(QGraphicsRectItem):
         if event.button() != Qt.MouseButton.LeftButton:
             event.ignore()
             return
-
-        drag = QDrag(event.widget())
-        mime = NodeMimeData()
-        mime.setData("node/connect", QByteArray())
-        mime.setObject(self.parentItem())
-        drag.setMimeData(mime)
-        cursor = QCursor(Qt.CursorShape.ArrowCursor)
-        drag.setDragCursor(cursor.pixmap(), Qt.DropAction.CopyAction)
-        drag.exec(Qt.DropAction.CopyAction)
+        start_connect_drag(event.widget(), self.parentItem())
 
     def paint(self, painter, option, widget=None):
         if painter is None:
@@ -126,14 +303,7 @@ class NodeResize(QGraphicsPixmapItem):
         if event.button() != Qt.MouseButton.LeftButton:
             event.ignore()
             return
-        node_utils.options.set_selection([self.node])
-        drag = QDrag(event.widget())
-        mime = NodeMimeData()
-        data = QByteArray()
-        mime.setData("node/resize", data)
-        mime.setObject(self.node)
-        drag.setMimeData(mime)
-        drag.exec(Qt.DropAction.MoveAction)
+        start_resize_drag(event.widget(), self.node)
 
 
 class DropDown(QGraphicsPixmapItem):
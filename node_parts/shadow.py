@@ -0,0 +1,176 @@
+"""Cached drop shadows.
+
+The shadow of a rounded rect only depends on the corner radius, blur
+radius and color, so shadow_pixmap() renders it once per key, for the
+smallest rect with those corners. draw_shadow() stretches it to any
+rect as a nine-patch: the corners are drawn as they are, the edges and
+the center are stretched. All items share the cached pixmaps.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+from qtpy.QtCore import QPointF, QRectF, Qt
+from qtpy.QtGui import QColor, QImage, QPainter, QPixmap
+from qtpy.QtWidgets import QGraphicsItem
+
+import node_utils
+
+SHADOW_BLUR = 8
+SHADOW_OFFSET = QPointF(4, 4)
+SHADOW_COLOR = QColor(63, 63, 63, 180)
+
+
+def shadow_margin(blur: int) -> int:
+    """Distance the shadow spreads past the edge of the rect."""
+    return 3 * (blur // 2) + 1
+
+
+def _box_blur(alpha: list[int], size: int, radius: int) -> list[int]:
+    """Box blur of a square alpha mask, horizontal then vertical."""
+    if radius < 1:
+        return alpha
+    n = 2 * radius + 1
+    for stride, step in ((size, 1), (1, size)):
+        out = [0] * len(alpha)
+        for line in range(size):
+            start = line * stride
+            total = 0
+            window = []
+            for i in range(size + radius):
+                if i < size:
+                    v = alpha[start + i * step]
+                else:
+                    v = 0
+                window.append(v)
+                total += v
+                if len(window) > n:
+                    total -= window.pop(0)
+                if i >= radius:
+                    out[start + (i - radius) * step] = total // n
+        alpha = out
+    return alpha
+
+
+@lru_cache(maxsize=32)
+def _shadow_pixmap(radius: int, blur: int, rgba: int) -> QPixmap:
+    margin = shadow_margin(blur)
+    side = 2 * radius + 1
+    size = side + 2 * margin
+    mask = QImage(size, size, QImage.Format.Format_Alpha8)
+    mask.fill(0)
+    p = QPainter(mask)
+    p.setRenderHint(QPainter.RenderHint.Antialiasing)
+    p.setPen(Qt.PenStyle.NoPen)
+    p.setBrush(QColor(0, 0, 0, 255))
+    p.drawRoundedRect(QRectF(margin, margin, side, side), radius, radius)
+    p.end()
+
+    # three box blurs are close to a gaussian blur
+    stride = mask.bytesPerLine()
+    bits = mask.constBits()
+    bits.setsize(stride * size)
+    data = bytes(bits)
+    alpha = [data[y * stride + x] for y in range(size) for x in range(size)]
+    for _ in range(3):
+        alpha = _box_blur(alpha, size, blur // 2)
+    rows = b"".join(
+        bytes(alpha[y * size : (y + 1) * size]).ljust(stride, b"\0")
+        for y in range(size)
+    )
+    mask = QImage(rows, size, size, stride, QImage.Format.Format_Alpha8)
+
+    image = QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(QColor.fromRgba(rgba))
+    p = QPainter(image)
+    p.setCompositionMode(QPainter.CompositionMode.CompositionMode_DestinationIn)
+    p.drawImage(0, 0, mask)
+    p.end()
+    return QPixmap.fromImage(image)
+
+
+def shadow_pixmap(radius: float, blur: int, color: QColor) -> QPixmap:
+    """Shadow of a (2 * radius + 1) square with rounded corners."""
+    return _shadow_pixmap(max(0, round(radius)), blur, color.rgba())
+
+
+def shadow_rect(
+    rect: QRectF, blur: int = SHADOW_BLUR, offset: QPointF = SHADOW_OFFSET
+) -> QRectF:
+    """Area covered by the shadow of rect."""
+    m = shadow_margin(blur)
+    return rect.translated(offset).adjusted(-m, -m, m, m)
+
+
+def draw_shadow(
+    painter: QPainter,
+    rect: QRectF,
+    radius: float,
+    color: QColor = SHADOW_COLOR,
+    blur: int = SHADOW_BLUR,
+    offset: QPointF = SHADOW_OFFSET,
+) -> None:
+    """Draw the shadow of a rounded rect from the cached nine-patch."""
+    if rect.isEmpty():
+        return
+    pixmap = shadow_pixmap(radius, blur, color)
+    size = pixmap.width()
+    corner = size // 2
+    target = shadow_rect(rect, blur, offset)
+    # corners are scaled down for rects smaller than the pixmap
+    cx = min(corner, target.width() / 2)
+    cy = min(corner, target.height() / 2)
+    xs = (target.left(), target.left() + cx, target.right() - cx)
+    ys = (target.top(), target.top() + cy, target.bottom() - cy)
+    ws = (cx, target.width() - 2 * cx, cx)
+    hs = (cy, target.height() - 2 * cy, cy)
+    sx = (0, corner, corner + 1)
+    sw = (corner, 1, size - corner - 1)
+    for i in range(3):
+        if hs[i] <= 0:
+            continue
+        for j in range(3):
+            if ws[j] <= 0:
+                continue
+            painter.drawPixmap(
+                QRectF(xs[j], ys[i], ws[j], hs[i]),
+                pixmap,
+                QRectF(sx[j], sx[i], sw[j], sw[i]),
+            )
+
+
+class ShadowItem(QGraphicsItem):
+    """Cached shadow drawn behind the _rect of its parent item.
+
+    Call sync() when the parent's _rect changed.
+    """
+
+    def __init__(self, parent, color: QColor = SHADOW_COLOR):
+        super().__init__(parent)
+        self.color = color
+        self._rect = QRectF()
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemStacksBehindParent)
+        self.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
+        self.sync()
+
+    def sync(self):
+        rect = QRectF(self.parentItem()._rect)
+        if rect != self._rect:
+            self.prepareGeometryChange()
+            self._rect = rect
+
+    def boundingRect(self):
+        if self._rect.isEmpty():
+            return QRectF()
+        return shadow_rect(self._rect)
+
+    def paint(self, painter, option, widget=None):
+        if painter is None:
+            return
+        draw_shadow(
+            painter,
+            self._rect,
+            node_utils.options.nodeRadius,
+            self.color,
+        )
@@ -28,6 +28,7 @@ from node_attrs import (
 )
 from node_parts.parts import NodeInput
 from node_types.node import Node
+from node_types.node_lite import LiteNode
 from node_utils import NodeMimeData, merge_dicts
 
 import node_utils
@@ -186,6 +187,7 @@ class NodeShader(Node):
             item.value = deepcopy(self.values[attr["name"]])
         else:
             self.values[attr["name"]] = deepcopy(item.value)
+            self.markDirty()
         self.attributes[attr["name"]] = item
 
         if connectedAttrs is not None and attr["name"] in connectedAttrs:
@@ -297,7 +299,7 @@ class NodeShader(Node):
             or obj == self
         ):
             return
-        if type(obj) is Node:
+        if type(obj) in (Node, LiteNode):
             d = {
                 "name": "Connection",
                 "parent": obj.id,
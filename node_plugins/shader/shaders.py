@@ -9,6 +9,8 @@ from typing import Any
 
 import yaml
 
+from node_io import load_context  # noqa: F401
+
 
 def get_demo_shaders() -> dict[str, Any]:
     """Return a dictionary of demo shader definitions.
@@ -231,19 +233,6 @@ except ImportError:
         return {}
 
 
-def load_context(filename: str) -> dict[str, Any]:
-    """Stub when rezContext is not available."""
-    return {}
-
-
-try:
-    from rezContext import load_context as _rez_load_context  # type: ignore[import-untyped]
-
-    load_context = _rez_load_context
-except ImportError:
-    pass
-
-
 def get_shaders() -> dict[str, Any]:
     """Load shaders from file or external sources.
 
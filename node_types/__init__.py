@@ -5,3 +5,4 @@ from .node_control import *  # noqa: F403
 from .node_graph import *  # noqa: F403
 from .node_group import *  # noqa: F403
 from .node_note import *  # noqa: F403
+from .node_lite import *  # noqa: F403
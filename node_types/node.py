@@ -2,58 +2,84 @@ from __future__ import annotations
 
 from typing import cast
 
-from qtpy.QtGui import QColor, QPen, QBrush, QLinearGradient, QDrag
+from qtpy.QtGui import QColor, QDrag
 from qtpy.QtCore import Qt, QRectF, QPointF, QTimer, QByteArray, QSizeF
 from qtpy.QtWidgets import (
     QApplication,
     QFileDialog,
-    QGraphicsDropShadowEffect,
-    QGraphicsPixmapItem,
+    QGraphicsItem,
     QGraphicsWidget,
     QMenu,
     QWidget,
 )
 
 import node_utils
-from node_utils import NodeMimeData
-from node_parts.parts import TitleItem, NodeInput, NodeResize, DropDown
+from node_utils import NodeMimeData, timed_paint
+from node_parts.parts import StaticTitleItem, NodeInput, NodeResize, DropDown
+from node_parts.connection import path_scheduler
+from node_parts.icon_atlas import icon_atlas
+from node_parts.icon_loader import icon_loader
+from node_parts.shadow import SHADOW_COLOR, draw_shadow, shadow_rect
 from html_editor import HtmlEditor
 
+SELECTED_COLOR = QColor(250, 140, 10)
 
-class Node(QGraphicsWidget):
-    def __init__(self, d, dialog=None):
-        super().__init__()
-        self.dialog = dialog
 
-        self.init(d)
-        self.nameItem = TitleItem(self.display_name, self, "display_name")
+class DragTimer:
+    """Delay between pressing a node and starting to drag it.
 
-        self.pen = QPen(Qt.GlobalColor.black, 1.5)
-        self.addExtraControls()
-        self.setRect(self._rect)
-        self.timer = QTimer()
+    All nodes share one timer, only one node is pressed at a time.
+    """
+
+    def __init__(self):
+        self.timer = None
+        self.node = None
+
+    def isActive(self):
+        return self.timer is not None and self.timer.isActive()
+
+    def start(self, node):
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.setSingleShot(True)
+            self.timer.timeout.connect(self.onTimeout)
         self.timer.setInterval(QApplication.startDragTime())
-        self.timer.setSingleShot(True)
-        self._mouseReleased = False
-        self.timer.timeout.connect(self.onTimer)
+        self.node = node
+        self.timer.start()
 
-    def addExtraControls(self):
-        self.connector = NodeInput(self)
-        self.connector.setRect(QRectF(-5, -5, 10, 10))
-        self.resizeItem = NodeResize(self, rect=QRectF(-12, -12, 12, 12))
-        self.resizeItem.hide()
-        self.dropdown = DropDown(self, node_utils.options)
-        if self.collapsed is True:
-            self.dropdown.setState(True)
+    def onTimeout(self):
+        node, self.node = self.node, None
+        if node is not None:
+            node.onTimer()
+
+
+drag_timer = DragTimer()
+
+
+class NodeBase:
+    """Node behaviour shared by Node and the items of node_lite.
+
+    Mixed into a QGraphicsItem class, which is expected to implement
+    setRect, boundingRect and the parts of the node.
+    """
+
+    # type the node is saved as, its class name if None
+    typeName = None
 
     def init(self, d):
+        self._serialized = None
         self.resizeItem = None
         self.connector = None
         self.dropdown = None
-        self.shadow = None
+        self.shadow = False
+        self.shadowColor = SHADOW_COLOR
         self.nameItem = None
         self.htmlItem = None
-        self.iconItem = None
+        # icon drawn by paint from icon_atlas, see setIconPixmap
+        self.iconPixmap = None
+        self.iconPos = QPointF(5, 5)
+        self.iconVisible = True
+        self._lodHidden = None
         self.name = ""
         self.id = d.get("id", "")
         self.display_name = ""
@@ -82,28 +108,35 @@ class Node(QGraphicsWidget):
         self.setZValue(1)
 
         self.old_pos = QPointF()
+        self._mouseReleased = None
 
-        self.icon = d.get("icon", None)
-
-        if self.icon:
-            icon = node_utils.options.get_icon(self.icon)
-            if icon:
-                self.iconItem = QGraphicsPixmapItem(icon, self)
-                self.iconItem.setPos(5, 5)
+        self.icon = None
+        self.setIconFile(d.get("icon", None))
 
         self.fromDict(d)
         self.setAcceptDrops(True)
         self.setAcceptHoverEvents(True)
 
     def addShadow(self):
-        self.shadow = QGraphicsDropShadowEffect()
-        self.shadow.setOffset(4, 4)
-        self.shadow.setBlurRadius(8)
-        self.setGraphicsEffect(self.shadow)
+        self.prepareGeometryChange()
+        self.shadow = True
+
+    def removeShadow(self):
+        self.prepareGeometryChange()
+        self.shadow = False
+
+    def paintShadow(self, painter):
+        if self.shadow:
+            draw_shadow(
+                painter,
+                self._rect,
+                node_utils.options.nodeRadius,
+                self.shadowColor,
+            )
 
     def setCollapsed(self, collapsed: bool):
         for c in self.childs:
-            if isinstance(c, Node):
+            if isinstance(c, NodeBase):
                 c.setCollapsed(False)
                 c.setVisible(collapsed)
                 for con in c.connections:
@@ -116,6 +149,7 @@ class Node(QGraphicsWidget):
                 for con in c.connections:
                     con.setVisible(collapsed)
         self.collapsed = not collapsed
+        self.markDirty()
         if collapsed is True:
             node_utils.options.set_selection([self])
 
@@ -128,13 +162,13 @@ class Node(QGraphicsWidget):
 
         self.childs = sorted(self.childs, key=getKey)
         for child in self.childs:
-            y += child.boundingRect().height() + 5
+            y += child.rect().height() + 5
         y = self.pos().y() + self._rect.center().y() - y * 0.5
         positions = []
         for child in self.childs:
             positions += [QPointF(x, y)]
             child.old_pos = child.pos()
-            y += child.boundingRect().height() + 5
+            y += child.rect().height() + 5
         from node_command import CommandMoveAnimNode
 
         node_utils.options.undoStack.push(
@@ -142,6 +176,7 @@ class Node(QGraphicsWidget):
         )
 
     def fromDict(self, d):
+        self.markDirty()
         if "width" in d.keys() and "height" in d.keys():
             width = d["width"]
             height = d["height"]
@@ -167,22 +202,29 @@ class Node(QGraphicsWidget):
         if "rot" in d:
             self.prepareGeometryChange()
             self.setRotation(d["rot"])
-        if "icon" in d.keys():
-            self.icon = d["icon"]
-            if self.icon is not None:
-                icon = node_utils.options.get_icon(self.icon)
-                scene = self.scene()
-                if scene is not None and self.iconItem is not None:
-                    scene.removeItem(self.iconItem)
-                if icon:
-                    self.iconItem = QGraphicsPixmapItem(icon, self)
-                    self.iconItem.setPos(5, 5)
-            else:
-                z = self.iconItem
-                self.iconItem = None
-                scene = self.scene()
-                if z is not None and scene is not None:
-                    scene.removeItem(z)
+        # an icon that couldn't be read is read again
+        if "icon" in d.keys() and (
+            d["icon"] != self.icon or (self.icon and self.iconPixmap is None)
+        ):
+            self.setIconFile(d["icon"])
+
+    def setIconFile(self, path):
+        """Show the icon file at path, a placeholder until it's decoded."""
+        self.icon = path
+        pix = icon_loader.request(path, self.iconLoaded) if path else None
+        self.setIconPixmap(pix)
+
+    def iconLoaded(self, path, pix):
+        if path == self.icon:
+            self.setIconPixmap(pix)
+
+    def setIconPixmap(self, pix):
+        self.iconPixmap = pix
+        self.update()
+
+    def paintIcon(self, painter):
+        if self.iconPixmap is not None and self.iconVisible:
+            icon_atlas.draw(painter, self.iconPos, self.iconPixmap)
 
     def toDict(self):
         res = {"name": self.name}
@@ -197,119 +239,64 @@ class Node(QGraphicsWidget):
         res["rgb"] = str(self.color.name())
         if self.rotation() != 0:
             res["rot"] = self.rotation()
-        res["type"] = type(self).__name__
+        res["type"] = self.typeName or type(self).__name__
         if self.icon:
             res["icon"] = self.icon
         return res
 
+    def markDirty(self):
+        """Drop the cached serialized form, see serialize()."""
+        self._serialized = None
+
+    def serialize(self):
+        """toDict() cached until the node changes; don't modify the result."""
+        if self._serialized is None:
+            self._serialized = self.toDict()
+        return self._serialized
+
+    def setRotation(self, angle: float) -> None:  # type: ignore[override]
+        super().setRotation(angle)
+        self.markDirty()
+
     def setPos(self, x: float, y: float) -> None:  # type: ignore[override]
         super().setPos(x, y)
-        for c in self.connections:
-            c.prepareGeometryChange()
-            c.updatePath()
-            c.update()
+        self.markDirty()
+        path_scheduler.schedule(self.connections)
 
     def setColor(self, c):
+        self.markDirty()
         self.color = QColor(c.red(), c.green(), c.blue(), 50)
-        if self.shadow:
-            c = c.darker(150)
-            c.setAlpha(150)
-            self.shadow.setColor(c)
-        gradient = QLinearGradient(
-            self._rect.topLeft(), self._rect.bottomRight()
-        )
-        color = QColor()
-        color.setHsv(
-            self.color.hue(),
-            max(0, self.color.saturation() - 60),
-            self.color.value(),
-            100,
-        )
-        gradient.setColorAt(0, self.color)
-        gradient.setColorAt(1, color)
-        self.brush = QBrush(gradient)
+        self.shadowColor = c.darker(150)
+        self.shadowColor.setAlpha(150)
+        self.brush = node_utils.options.paintCache.gradient(c, 50, 60, 100)
         self.update()
 
-    def sizeHint(self, which, constraint=None):
-        if (
-            which == Qt.SizeHint.MinimumSize
-            or which == Qt.SizeHint.PreferredSize
-        ):
-            return QSizeF(self._rect.width(), self._rect.height())
-        return constraint
-
-    def setRect(self, rect):
-        w = max(rect.width(), node_utils.options.minNodeWidth)
-        h = max(rect.height(), node_utils.options.minNodeHeight)
-        if w != rect.width() or h != rect.height():
-            rect = QRectF(rect.x(), rect.y(), w, h)
-        rect_changed = rect != self._rect
-        for c in self.connections:
-            c.prepareGeometryChange()
-            c.updatePath()
-            c.update()
-        self._rect = rect
-
-        if self.connector:
-            self.connector.prepareGeometryChange()
-            self.connector.setPos(self._rect.right(), self._rect.center().y())
-        if self.resizeItem:
-            self.resizeItem.prepareGeometryChange()
-            self.resizeItem.setPos(
-                self._rect.right() - self.resizeItem.boundingRect().width() / 2,
-                self._rect.bottom()
-                - self.resizeItem.boundingRect().height() / 2,
-            )
-        if self.nameItem:
-            self.nameItem.prepareGeometryChange()
-            self.nameItem.setPos(
-                self._rect.center().x()
-                - self.nameItem.boundingRect().width() * 0.5,
-                0,
-            )
-        if self.dropdown:
-            self.dropdown.setPos(
-                self._rect.right() - self.dropdown.boundingRect().width() - 8, 3
-            )
-        if rect_changed:
-            self.setColor(self.color)
-
     def setSelected(self, selected: bool):
-        if self.shadow:
-            self.shadow.updateBoundingRect()
         self._selected = selected
         if selected:
-            if self.resizeItem:
-                self.resizeItem.show()
             self.setZValue(2)
-            self.pen = QPen(QColor(250, 140, 10), 1.5)
+            self.pen = node_utils.options.paintCache.pen(SELECTED_COLOR, 1.5)
         else:
-            if self.resizeItem:
-                self.resizeItem.hide()
             self.setZValue(1)
             if self.dialog and self.dialog.outline:
-                self.pen = QPen(Qt.GlobalColor.black, 1.5)
+                self.pen = node_utils.options.paintCache.pen(
+                    Qt.GlobalColor.black, 1.5
+                )
             else:
-                self.pen = QPen(QColor(0), 0)
+                self.pen = node_utils.options.paintCache.pen(QColor(0), 0)
 
-    def mouseDoubleClickEvent(self, event):
-        if event is None:
-            return
-        # Forward double-click to title so name can be edited when clicking on it
-        if self.nameItem is not None and self.nameItem.isVisible():
-            nameLocal = self.nameItem.mapFromParent(event.pos())
-            if self.nameItem.boundingRect().contains(nameLocal):
-                self.nameItem.mouseDoubleClickEvent(event)
-                return
+    def connectorPos(self):
+        """Where connections from this node start, None without a connector."""
+        if self.connector is None:
+            return None
+        return self.connector.pos()
 
-        def getChilds(node):
-            childs = node.childs
-            for c in childs:
-                childs += getChilds(c)
-            return childs
-
-        self.alignChilds()
-        super().mouseDoubleClickEvent(event)
+    def editTitle(self):
+        if self.nameItem is not None:
+            self.nameItem.setTextInteractionFlags(
+                Qt.TextInteractionFlag.TextEditorInteraction
+            )
+            self.nameItem.setFocus(Qt.FocusReason.MouseFocusReason)
 
     def onTimer(self):
         if self._mouseReleased is None:
@@ -320,7 +307,11 @@ class Node(QGraphicsWidget):
         mime.setData("node/move", QByteArray())
         mime.setOrigin(self._mouseReleased)
         drag.setMimeData(mime)
-        drag.exec(Qt.DropAction.MoveAction)
+        path_scheduler.begin()
+        try:
+            drag.exec(Qt.DropAction.MoveAction)
+        finally:
+            path_scheduler.end()
 
     def mouseReleaseEvent(self, event):
         self._mouseReleased = None
@@ -347,11 +338,11 @@ class Node(QGraphicsWidget):
             if not self._selected:
                 node_utils.options.set_selection([self])
 
-        if not self.timer.isActive() and event is not None:
+        if not drag_timer.isActive():
             self._mouseReleased = self.mapToScene(
                 event.pos().x(), event.pos().y()
             )
-            self.timer.start()
+            drag_timer.start(self)
 
     def hoverEnterEvent(self, event):
         self.setToolTip(self.name)
@@ -410,11 +401,8 @@ class Node(QGraphicsWidget):
             node_utils.options.undoStack.push(
                 CommandSetNodeAttribute([self], {"icon": None})
             )
-        elif action == editNameAction and self.nameItem is not None:
-            self.nameItem.setTextInteractionFlags(
-                Qt.TextInteractionFlag.TextEditorInteraction
-            )
-            self.nameItem.setFocus(Qt.FocusReason.MouseFocusReason)
+        elif action == editNameAction:
+            self.editTitle()
         elif action == editKeywordsAction:
 
             def onKeywordsEdit(text):
@@ -437,14 +425,20 @@ class Node(QGraphicsWidget):
             )
             editor.show()
 
-    def resize(self, width: float, height: float) -> None:  # type: ignore[override]
-        rect = QRectF(0, 0, width, height)
-        self.setRect(rect)
-        super().resize(width, height)
-
+    @timed_paint
     def paint(self, painter, option, widget=None):
         if painter is None:
             return
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        if lod < node_utils.options.nodeDetailLevel:
+            self.paintFlat(painter)
+            return
+        self.paintShadow(painter)
+        self.paintBody(painter)
+        self.paintIcon(painter)
+        self.paintParts(painter)
+
+    def paintBody(self, painter):
         painter.setBrush(self.brush)
         painter.setPen(self.pen)
         painter.drawRoundedRect(
@@ -454,11 +448,151 @@ class Node(QGraphicsWidget):
         )
         r = QRectF(self._rect)
         r.adjust(1.5, 1.5, -1.5, -1.5)
-        c = QColor(self.color)
-        c.darker(80)
-        painter.setPen(QPen(c, 1))
+        painter.setPen(node_utils.options.paintCache.pen(self.color, 1))
         painter.drawRoundedRect(
             r,
             node_utils.options.nodeRadius - 1,
             node_utils.options.nodeRadius - 1,
         )
+
+    def paintParts(self, painter):
+        """Parts drawn over the body, Node has child items for them."""
+
+    def paintFlat(self, painter):
+        """Node as a flat rounded rect in its color, for low zoom levels."""
+        if self._selected:
+            c = SELECTED_COLOR
+        else:
+            c = QColor(self.color)
+            c.setAlpha(120)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(node_utils.options.paintCache.brush(c))
+        painter.drawRoundedRect(
+            self._rect,
+            node_utils.options.nodeRadius,
+            node_utils.options.nodeRadius,
+        )
+
+
+class Node(NodeBase, QGraphicsWidget):
+    def __init__(self, d, dialog=None):
+        super().__init__()
+        self.dialog = dialog
+
+        self.init(d)
+        self.nameItem = StaticTitleItem(self.display_name, self, "display_name")
+
+        self.pen = node_utils.options.paintCache.pen(Qt.GlobalColor.black, 1.5)
+        self.addExtraControls()
+        self.setRect(self._rect)
+
+    def addExtraControls(self):
+        self.connector = NodeInput(self)
+        self.connector.setRect(QRectF(-5, -5, 10, 10))
+        self.resizeItem = NodeResize(self, rect=QRectF(-12, -12, 12, 12))
+        self.resizeItem.hide()
+        self.dropdown = DropDown(self, node_utils.options)
+        if self.collapsed is True:
+            self.dropdown.setState(True)
+
+    def boundingRect(self):
+        r = super().boundingRect()
+        if self.shadow:
+            r = r.united(shadow_rect(self._rect))
+        return r
+
+    def setDetailed(self, detailed: bool):
+        """Show or hide the child items, they are hidden when zoomed out."""
+        if detailed == (self._lodHidden is None):
+            return
+        if detailed:
+            for item in self._lodHidden:
+                item.show()
+            self._lodHidden = None
+            if self.resizeItem:
+                self.resizeItem.setVisible(self._selected)
+        else:
+            self._lodHidden = [
+                x for x in self.childItems() if x.isVisibleTo(self)
+            ]
+            for item in self._lodHidden:
+                item.hide()
+
+    def itemChange(self, change, value):
+        if (
+            change == QGraphicsItem.GraphicsItemChange.ItemSceneHasChanged
+            and value is not None
+        ):
+            self.setDetailed(node_utils.options.nodeDetail)
+        return super().itemChange(change, value)
+
+    def sizeHint(self, which, constraint=None):
+        if (
+            which == Qt.SizeHint.MinimumSize
+            or which == Qt.SizeHint.PreferredSize
+        ):
+            return QSizeF(self._rect.width(), self._rect.height())
+        return constraint
+
+    def setRect(self, rect):
+        w = max(rect.width(), node_utils.options.minNodeWidth)
+        h = max(rect.height(), node_utils.options.minNodeHeight)
+        if w != rect.width() or h != rect.height():
+            rect = QRectF(rect.x(), rect.y(), w, h)
+        rect_changed = rect != self._rect
+        self.markDirty()
+        path_scheduler.schedule(self.connections)
+        self._rect = rect
+
+        if self.connector:
+            self.connector.prepareGeometryChange()
+            self.connector.setPos(self._rect.right(), self._rect.center().y())
+        if self.resizeItem:
+            self.resizeItem.prepareGeometryChange()
+            self.resizeItem.setPos(
+                self._rect.right() - self.resizeItem.boundingRect().width() / 2,
+                self._rect.bottom()
+                - self.resizeItem.boundingRect().height() / 2,
+            )
+        if self.nameItem:
+            self.nameItem.prepareGeometryChange()
+            self.nameItem.setPos(
+                self._rect.center().x()
+                - self.nameItem.boundingRect().width() * 0.5,
+                0,
+            )
+        if self.dropdown:
+            self.dropdown.setPos(
+                self._rect.right() - self.dropdown.boundingRect().width() - 8, 3
+            )
+        if rect_changed:
+            self.update()
+
+    def setSelected(self, selected: bool):
+        super().setSelected(selected)
+        if self.resizeItem:
+            self.resizeItem.setVisible(selected and self._lodHidden is None)
+
+    def mouseDoubleClickEvent(self, event):
+        if event is None:
+            return
+        # Forward double-click to title so name can be edited when clicking on it
+        if self.nameItem is not None and self.nameItem.isVisible():
+            nameLocal = self.nameItem.mapFromParent(event.pos())
+            if self.nameItem.boundingRect().contains(nameLocal):
+                self.nameItem.mouseDoubleClickEvent(event)
+                return
+
+        def getChilds(node):
+            childs = node.childs
+            for c in childs:
+                childs += getChilds(c)
+            return childs
+
+        self.alignChilds()
+        super().mouseDoubleClickEvent(event)
+
+    def resize(self, width: float, height: float) -> None:  # type: ignore[override]
+        rect = QRectF(0, 0, width, height)
+        self.setRect(rect)
+        super().resize(width, height)
@@ -1,5 +1,5 @@
 from qtpy.QtGui import QPainterPath, QTransform
-from qtpy.QtCore import Qt, QRectF
+from qtpy.QtCore import Qt, QPointF, QRectF
 from qtpy.QtWidgets import QFileDialog, QMenu, QWidget
 
 from .node import Node
@@ -34,10 +34,8 @@ class NodeBlock(Node):
                 rect.center().x() - name_item.boundingRect().width() * 0.5,
                 rect.center().y() - name_item.boundingRect().height() * 0.5,
             )
-        icon_item = self.iconItem
-        if icon_item is not None and name_item is not None:
-            icon_item.prepareGeometryChange()
-            icon_item.setPos(
+        if name_item is not None:
+            self.iconPos = QPointF(
                 name_item.pos().x() - name_item.boundingRect().width() * 0.5,
                 name_item.pos().y(),
             )
@@ -119,7 +117,7 @@ class NodeBlock(Node):
             )
             editor.show()
 
-    def paint(self, painter, option, widget=None):
+    def paintBody(self, painter):
         painter.setBrush(self.brush)
         painter.setPen(self.pen)
         t = QTransform()
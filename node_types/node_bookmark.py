@@ -5,34 +5,119 @@ from qtpy.QtWidgets import (
     QApplication,
     QFileDialog,
     QGraphicsItem,
-    QGraphicsPixmapItem,
     QGraphicsRectItem,
     QMenu,
     QWidget,
 )
 import node_utils
+from node_utils import device_pixel_ratio
 from .node import Node
-from node_parts.parts import TitleItem, NodeResize
+from node_parts.parts import StaticTitleItem, NodeResize
+from node_parts.icon_loader import icon_loader
 from html_editor import HtmlEditor
 
 icon_size = 24
-ICONS = {}
 
 
-class UrlTitleItem(TitleItem):
-    """TitleItem that does not become editable on mouse clicks (URL is read-only)."""
-
-    def __init__(self, text, parent, attr, title=False):
-        super().__init__(text, parent, attr, title)
-        # Prevent focus on single click so no edit boundary/cursor appears
-        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsFocusable, False)
+class UrlTitleItem(StaticTitleItem):
+    """Title that does not become editable on mouse clicks (URL is read-only)."""
 
     def mouseDoubleClickEvent(self, event):
         # Do not enable text editing; let event propagate to parent to open URL
         event.ignore()
 
 
-class NodeBookmark(Node):
+class BookmarkBase:
+    """Url and file type icon of NodeBookmark and LiteBookmark."""
+
+    url = None
+
+    def requestFileType(self):
+        """Without an icon, show the icon of the file type of a local url."""
+        if self.icon is None and self.url and self.dialog is not None:
+            # looked up in the background, see fileTypeLoaded
+            path = QUrl(self.url).toLocalFile()
+            if path:
+                icon_loader.requestType(path, self.fileTypeLoaded)
+                self.setIconPixmap(icon_loader.placeholder())
+
+    def fileTypeLoaded(self, path, typ):
+        if self.icon is not None or QUrl(self.url or "").toLocalFile() != path:
+            return
+        if not typ or typ == "Unknown" or self.dialog is None:
+            self.setIconPixmap(None)
+            return
+        provider = self.dialog.systemIcons()
+
+        def make():
+            pix = provider.icon(QFileInfo(path)).pixmap(icon_size, icon_size)
+            if pix.height() > 16:
+                pix = pix.scaled(16, 16)
+            return pix
+
+        self.setIconPixmap(
+            node_utils.options.pixmapCache.get(
+                ("filetype", typ, icon_size, None, device_pixel_ratio()), make
+            )
+        )
+
+    def toDict(self):
+        res = super().toDict()
+        if self.url is not None:
+            res["url"] = self.url
+        return res
+
+    def contextMenuEvent(self, event):
+        if event is None:
+            return
+        scene = self.scene()
+        parent = scene.parent() if scene is not None else None
+        menu = QMenu(parent=parent if isinstance(parent, QWidget) else None)
+        setIconAction = menu.addAction("Set icon")
+        editNameAction = menu.addAction("Edit title")
+        copyUrlAction = menu.addAction("Copy url")
+        editKeywordsAction = menu.addAction("Edit keywords")
+        action = menu.exec(event.screenPos())
+        if action == setIconAction:
+            from node_command import CommandSetNodeAttribute
+
+            filename, _ = QFileDialog.getOpenFileName(
+                self.dialog, "Open File", "", "Icon Files (*.jpg *.png *.ico)"
+            )
+            if filename:
+                node_utils.options.undoStack.push(
+                    CommandSetNodeAttribute([self], {"icon": filename})
+                )
+        elif action == editNameAction:
+            self.editTitle()
+        elif action == copyUrlAction and self.url is not None:
+            clipboard = QApplication.clipboard()
+            if clipboard is not None:
+                clipboard.setText(self.url)
+        elif action == editKeywordsAction:
+
+            def onKeywordsEdit(text):
+                from node_command import CommandSetNodeAttribute
+
+                node_utils.options.undoStack.push(
+                    CommandSetNodeAttribute(
+                        [self], {"keywords": "%s" % text.toPlainText()}
+                    )
+                )
+
+            editor = HtmlEditor(
+                self.dialog,
+                {
+                    "node": self,
+                    "text": self.keywords,
+                    "func": onKeywordsEdit,
+                    "type": "text",
+                },
+            )
+            editor.show()
+
+
+class NodeBookmark(BookmarkBase, Node):
     def __init__(self, d, dialog=None):
         super().__init__(d, dialog)
 
@@ -43,26 +128,7 @@ class NodeBookmark(Node):
         self.urlItem.setFont(font)
         self.urlItem.setDefaultTextColor(QColor(25, 25, 210))
 
-        if self.icon is None and self.url and self.dialog is not None:
-            url = QUrl(self.url)
-            fi = QFileInfo(url.toLocalFile())
-            typ = self.dialog.systemIcons().type(fi)
-            if typ != "Unknown":
-                if typ in ICONS:
-                    pix = ICONS[typ]
-                else:
-                    pix = (
-                        self.dialog.systemIcons()
-                        .icon(fi)
-                        .pixmap(icon_size, icon_size)
-                    )
-                    if pix.height() > 16:
-                        pix = pix.scaled(16, 16)
-                    ICONS[typ] = pix
-
-                self.icon = pix
-                self.iconItem = QGraphicsPixmapItem(pix, self)
-                self.iconItem.setPos(5, 5)
+        self.requestFileType()
 
         # Ensure height fits title row + small gap + URL row (avoid clipping)
         opts_icon_size = node_utils.options.iconSize
@@ -74,10 +140,7 @@ class NodeBookmark(Node):
         if self.dialog:
             if self.urlItem:
                 self.urlItem.setVisible(self.dialog.showUrlsAction.isChecked())
-            if self.iconItem is not None:
-                self.iconItem.setVisible(
-                    self.dialog.showIconsAction.isChecked()
-                )
+            self.iconVisible = self.dialog.showIconsAction.isChecked()
             if self.nameItem is not None:
                 self.nameItem.setVisible(
                     self.dialog.showNamesAction.isChecked()
@@ -96,8 +159,13 @@ class NodeBookmark(Node):
         self._clipContainer.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
         self.nameItem.setParentItem(self._clipContainer)
         self.urlItem.setParentItem(self._clipContainer)
-        if getattr(self, "iconItem", None) is not None:
-            self.iconItem.setParentItem(self._clipContainer)
+
+    def setIconPixmap(self, pix):
+        had_icon = self.iconPixmap is not None
+        super().setIconPixmap(pix)
+        # text moves right of the icon
+        if had_icon != (pix is not None) and hasattr(self, "urlItem"):
+            self.setRect(self._rect)
 
     def addExtraControls(self):
         self.resizeItem = NodeResize(self, rect=QRectF(-12, -12, 12, 12))
@@ -112,7 +180,7 @@ class NodeBookmark(Node):
         show_icons = (
             self.dialog.showIconsAction.isChecked() if self.dialog else True
         )
-        has_icon = getattr(self, "iconItem", None) is not None and show_icons
+        has_icon = self.iconPixmap is not None and show_icons
         # Left-aligned: text to the right of the icon (or at left edge if no icon)
         text_left = 5 + icon_size + 4 if has_icon else 5
         if self.nameItem:
@@ -138,12 +206,6 @@ class NodeBookmark(Node):
             if urlItem:
                 urlItem.setPlainText(self.url)
 
-    def toDict(self):
-        res = Node.toDict(self)
-        if self.url is not None:
-            res["url"] = self.url
-        return res
-
     def mouseDoubleClickEvent(self, event):
         if self.nameItem and self.nameItem.isUnderMouse():
             super().mouseDoubleClickEvent(event)
@@ -152,55 +214,3 @@ class NodeBookmark(Node):
             webbrowser.open(self.url)
         else:
             self.alignChilds()
-
-    def contextMenuEvent(self, event):
-        if event is None:
-            return
-        scene = self.scene()
-        parent = scene.parent() if scene is not None else None
-        menu = QMenu(parent=parent if isinstance(parent, QWidget) else None)
-        setIconAction = menu.addAction("Set icon")
-        editNameAction = menu.addAction("Edit title")
-        copyUrlAction = menu.addAction("Copy url")
-        editKeywordsAction = menu.addAction("Edit keywords")
-        action = menu.exec(event.screenPos())
-        if action == setIconAction:
-            from node_command import CommandSetNodeAttribute
-
-            filename, _ = QFileDialog.getOpenFileName(
-                self.dialog, "Open File", "", "Icon Files (*.jpg *.png *.ico)"
-            )
-            if filename:
-                node_utils.options.undoStack.push(
-                    CommandSetNodeAttribute([self], {"icon": filename})
-                )
-        elif action == editNameAction and self.nameItem is not None:
-            self.nameItem.setTextInteractionFlags(
-                Qt.TextInteractionFlag.TextEditorInteraction
-            )
-            self.nameItem.setFocus(Qt.FocusReason.MouseFocusReason)
-        elif action == copyUrlAction and self.url is not None:
-            clipboard = QApplication.clipboard()
-            if clipboard is not None:
-                clipboard.setText(self.url)
-        elif action == editKeywordsAction:
-
-            def onKeywordsEdit(text):
-                from node_command import CommandSetNodeAttribute
-
-                node_utils.options.undoStack.push(
-                    CommandSetNodeAttribute(
-                        [self], {"keywords": "%s" % text.toPlainText()}
-                    )
-                )
-
-            editor = HtmlEditor(
-                self.dialog,
-                {
-                    "node": self,
-                    "text": self.keywords,
-                    "func": onKeywordsEdit,
-                    "type": "text",
-                },
-            )
-            editor.show()
@@ -173,6 +173,7 @@ class NodeControl(Node):
             item.value = deepcopy(self.values[attr["name"]])
         else:
             self.values[attr["name"]] = deepcopy(item.value)
+            self.markDirty()
         if connectedAttrs is not None and attr["name"] in connectedAttrs:
             item.setConnected(True)
 
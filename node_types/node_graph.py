@@ -1,4 +1,4 @@
-from qtpy.QtGui import QFontMetrics, QColor, QLinearGradient, QBrush
+from qtpy.QtGui import QFontMetrics, QColor
 from qtpy.QtCore import QPointF
 from .node import Node
 import node_utils
@@ -18,24 +18,10 @@ class NodeGraph(Node):
         super().setRect(rect)
 
     def setColor(self, c):
+        self.markDirty()
         self.color = QColor(c.red(), c.green(), c.blue(), 255)
-        if self.shadow:
-            c = c.darker(150)
-            c.setAlpha(255)
-            self.shadow.setColor(c)
-        gradient = QLinearGradient(
-            self._rect.topLeft(), self._rect.bottomRight()
-        )
-        color = QColor()
-        color.setHsv(
-            self.color.hue(),
-            max(0, self.color.saturation() - 10),
-            self.color.value(),
-            255,
-        )
-        gradient.setColorAt(0, self.color)
-        gradient.setColorAt(1, color)
-        self.brush = QBrush(gradient)
+        self.shadowColor = c.darker(150)
+        self.brush = node_utils.options.paintCache.gradient(c, 255, 10, 255)
         self.update()
 
     def alignChilds(self):
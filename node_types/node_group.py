@@ -1,6 +1,6 @@
-from qtpy.QtGui import QPen, QColor, QLinearGradient, QBrush
+from qtpy.QtGui import QColor
 from qtpy.QtCore import Qt, QPointF, QRectF
-from .node import Node
+from .node import Node, NodeBase, SELECTED_COLOR
 import node_utils
 
 
@@ -36,43 +36,29 @@ class NodeGroup(Node):
                     Qt.ItemSelectionMode.IntersectsItemShape,
                     Qt.SortOrder.DescendingOrder,
                 )
-                if isinstance(x, Node) and x is not self
+                if isinstance(x, NodeBase) and x is not self
             ]
         super().setRect(rect)
 
     def setSelected(self, selected: bool):
-        if self.shadow:
-            self.shadow.updateBoundingRect()
         self._selected = selected
+        cache = node_utils.options.paintCache
         if selected:
-            self.pen = QPen(QColor(250, 140, 10), 3)
+            self.pen = cache.pen(SELECTED_COLOR, 3)
         else:
             if self.dialog and self.dialog.outline:
-                self.pen = QPen(Qt.GlobalColor.black, 1.5)
+                self.pen = cache.pen(Qt.GlobalColor.black, 1.5)
             else:
-                self.pen = QPen(QColor(0, 0, 0, 0), 0)
+                self.pen = cache.pen(QColor(0, 0, 0, 0), 0)
 
     def setColor(self, c):
+        self.markDirty()
         self.color = QColor(c.red(), c.green(), c.blue(), 30)
-        if self.shadow:
-            c = c.darker(150)
-            c.setAlpha(30)
-            self.shadow.setColor(c)
-        gradient = QLinearGradient(
-            self._rect.topLeft(), self._rect.bottomRight()
-        )
-        color = QColor()
-        color.setHsv(
-            self.color.hue(),
-            max(0, self.color.saturation() - 60),
-            self.color.value(),
-            30,
-        )
-        gradient.setColorAt(0, self.color)
-        gradient.setColorAt(1, color)
-        self.brush = QBrush(gradient)
+        self.shadowColor = c.darker(150)
+        self.shadowColor.setAlpha(30)
+        self.brush = node_utils.options.paintCache.gradient(c, 30, 60, 30)
 
-    def paint(self, painter, option, widget=None):
+    def paintBody(self, painter):
         painter.setBrush(self.brush)
         painter.setPen(self.pen)
         painter.drawRoundedRect(
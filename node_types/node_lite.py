@@ -0,0 +1,311 @@
+"""Nodes on plain QGraphicsItems.
+
+Node is a QGraphicsWidget whose title, connector, resize handle and
+dropdown are child items. LiteNode paints these parts itself and handles
+clicks on them in mousePressEvent, so each node is one item without a
+QObject. That makes it cheaper to create and to keep around when a file
+holds many simple nodes. A TitleItem exists only while a title is edited.
+Titles are drawn with drawText instead of a QStaticText, because a
+QStaticText keeps its laid-out glyphs for every node.
+
+get_node_class uses the lite classes for the types in options.liteNodes,
+checked in the Options menu.
+They are saved under the type they stand in for.
+"""
+
+from __future__ import annotations
+
+import webbrowser
+from functools import lru_cache
+
+from qtpy.QtCore import QPointF, QRectF, Qt
+from qtpy.QtGui import QColor, QFont, QFontMetricsF, QPainterPath
+from qtpy.QtWidgets import QGraphicsItem
+
+import node_utils
+from node_parts.connection import path_scheduler
+from node_parts.icon_atlas import icon_atlas
+from node_parts.parts import (
+    TitleItem,
+    edit_text,
+    remove_editor,
+    start_connect_drag,
+    start_resize_drag,
+)
+from node_parts.shadow import shadow_rect
+
+from .node import NodeBase
+from .node_bookmark import BookmarkBase
+
+# StaticTitleItem's margin, titles are drawn where Node draws them
+TITLE_MARGIN = 4
+URL_COLOR = QColor(25, 25, 210)
+
+_metrics = {}
+
+
+def font_metrics(font: QFont) -> QFontMetricsF:
+    """Metrics of font, shared by all nodes."""
+    key = font.key()
+    fm = _metrics.get(key)
+    if fm is None:
+        fm = _metrics[key] = QFontMetricsF(font)
+    return fm
+
+
+@lru_cache(maxsize=1)
+def url_font() -> QFont:
+    font = QFont()
+    font.setUnderline(True)
+    return font
+
+
+class LiteNode(NodeBase, QGraphicsItem):
+    typeName = "Node"
+    hasConnector = True
+    hasDropdown = True
+    # connector and resize handle stick out of the node's rect
+    partMargin = 8
+    # TitleItem editing the title, see editTitle
+    editor = None
+
+    def __init__(self, d, dialog=None):
+        super().__init__()
+        self.dialog = dialog
+        self.init(d)
+        self.pen = node_utils.options.paintCache.pen(Qt.GlobalColor.black, 1.5)
+        if self.collapsed is True:
+            self.setCollapsed(False)
+        self.setRect(self._rect)
+
+    def fromDict(self, d):
+        super().fromDict(d)
+        self.update()
+
+    def rect(self):
+        return QRectF(self._rect)
+
+    def setRect(self, rect):
+        w = max(rect.width(), node_utils.options.minNodeWidth)
+        h = max(rect.height(), node_utils.options.minNodeHeight)
+        if w != rect.width() or h != rect.height():
+            rect = QRectF(rect.x(), rect.y(), w, h)
+        self.markDirty()
+        path_scheduler.schedule(self.connections)
+        if rect != self._rect:
+            self.prepareGeometryChange()
+            self._rect = rect
+            self.update()
+
+    def resize(self, width: float, height: float):
+        self.setRect(QRectF(0, 0, width, height))
+
+    def updateGeometry(self):
+        """Nothing to lay out, for the view's resize drag."""
+
+    def setDetailed(self, detailed: bool):
+        """No child items to hide, paint checks the level of detail."""
+
+    def setSelected(self, selected: bool):
+        super().setSelected(selected)
+        self.update()
+
+    # parts
+
+    def titleRect(self):
+        fm = font_metrics(node_utils.options.titleFont)
+        w = fm.horizontalAdvance(self.display_name) + 2 * TITLE_MARGIN
+        h = fm.height() + 2 * TITLE_MARGIN
+        return QRectF(self._rect.center().x() - w * 0.5, 0, w, h)
+
+    def connectorPos(self):
+        if not self.hasConnector:
+            return None
+        return QPointF(self._rect.right(), self._rect.center().y())
+
+    def connectorRect(self):
+        p = self.connectorPos()
+        return QRectF(p.x() - 5, p.y() - 5, 10, 10)
+
+    def resizeRect(self):
+        return QRectF(self._rect.right() - 8, self._rect.bottom() - 8, 16, 16)
+
+    def dropdownRect(self):
+        size = node_utils.options.iconSize
+        return QRectF(self._rect.right() - size - 8, 3, size, size)
+
+    def editTitle(self):
+        if self.editor is None:
+            editor = TitleItem(self.display_name, self, "display_name")
+            editor.setPos(self.titleRect().topLeft())
+            editor.finished = self.stopEditing
+            self.editor = editor
+            self.update()
+        edit_text(self.editor)
+
+    def stopEditing(self):
+        editor = self.editor
+        if editor is None:
+            return
+        self.editor = None
+        remove_editor(editor)
+        self.update()
+
+    # events
+
+    def mousePressEvent(self, event):
+        if event is None:
+            return
+        if event.button() == Qt.MouseButton.LeftButton:
+            pos = event.pos()
+            if self.hasConnector and self.connectorRect().contains(pos):
+                start_connect_drag(event.widget(), self)
+                return
+            if self._selected and self.resizeRect().contains(pos):
+                start_resize_drag(event.widget(), self)
+                return
+            if self.hasDropdown and self.dropdownRect().contains(pos):
+                self.setCollapsed(self.collapsed)
+                return
+        super().mousePressEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        if event is None:
+            return
+        if self.titleRect().contains(event.pos()):
+            self.editTitle()
+            return
+        self.alignChilds()
+        super().mouseDoubleClickEvent(event)
+
+    # painting
+
+    def boundingRect(self):
+        m = self.partMargin
+        r = self._rect.adjusted(0, 0, m, m)
+        if self.shadow:
+            r = r.united(shadow_rect(self._rect))
+        return r
+
+    def shape(self):
+        path = QPainterPath()
+        path.setFillRule(Qt.FillRule.WindingFill)
+        path.addRect(self._rect)
+        if self.hasConnector:
+            path.addEllipse(self.connectorRect())
+        if self._selected:
+            path.addRect(self.resizeRect())
+        return path
+
+    def paintParts(self, painter):
+        opts = node_utils.options
+        self.paintText(painter)
+        if self.hasConnector:
+            painter.setPen(opts.paintCache.pen(Qt.GlobalColor.black, 0.3))
+            painter.setBrush(opts.paintCache.brush(Qt.GlobalColor.black))
+            painter.drawEllipse(self.connectorRect())
+        if self.hasDropdown:
+            pix = opts.get_awesome_pixmap("fa6s.caret-down", opts.iconSize)
+            icon_atlas.draw(painter, self.dropdownRect().topLeft(), pix)
+        if self._selected:
+            pix = opts.get_awesome_pixmap("fa6s.maximize", 16)
+            icon_atlas.draw(painter, self.resizeRect().topLeft(), pix)
+
+    def paintText(self, painter):
+        if self.editor is not None or not self.display_name:
+            return
+        opts = node_utils.options
+        fm = font_metrics(opts.titleFont)
+        # centered like Node's title, but cut off at the node's edges
+        rect = QRectF(
+            self._rect.left(), TITLE_MARGIN, self._rect.width(), fm.height()
+        )
+        painter.setFont(opts.titleFont)
+        painter.setPen(opts.paintCache.pen(Qt.GlobalColor.black))
+        painter.drawText(
+            rect,
+            Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop,
+            self.display_name,
+        )
+
+
+class LiteBookmark(BookmarkBase, LiteNode):
+    typeName = "NodeBookmark"
+    hasConnector = False
+    hasDropdown = False
+    nameVisible = True
+    urlVisible = True
+
+    def __init__(self, d, dialog=None):
+        super().__init__(d, dialog)
+        self.url = d.get("url")
+        self.requestFileType()
+        # title row + gap + url row, like NodeBookmark
+        min_height = node_utils.options.iconSize + 4 + 20
+        if self._rect.height() < min_height:
+            self.setRect(QRectF(0, 0, self._rect.width(), min_height))
+        if self.dialog:
+            self.iconVisible = self.dialog.showIconsAction.isChecked()
+            self.nameVisible = self.dialog.showNamesAction.isChecked()
+            self.urlVisible = self.dialog.showUrlsAction.isChecked()
+
+    def fromDict(self, d):
+        super().fromDict(d)
+        if "url" in d:
+            self.url = d["url"]
+
+    def textLeft(self):
+        """Left of the title and url, right of the icon when it's shown."""
+        if self.iconPixmap is not None and self.iconVisible:
+            return 5 + node_utils.options.iconSize + 4
+        return 5
+
+    def urlTop(self):
+        shown = self.iconVisible or self.nameVisible
+        return (node_utils.options.iconSize if shown else 0) + 4
+
+    def titleRect(self):
+        fm = font_metrics(node_utils.options.titleFont)
+        w = fm.horizontalAdvance(self.display_name) + 2 * TITLE_MARGIN
+        h = fm.height() + 2 * TITLE_MARGIN
+        return QRectF(self.textLeft(), 0, w, h)
+
+    def mouseDoubleClickEvent(self, event):
+        if event is None:
+            return
+        if self.nameVisible and self.titleRect().contains(event.pos()):
+            self.editTitle()
+        elif self.url:
+            webbrowser.open(self.url)
+        else:
+            self.alignChilds()
+
+    def paintText(self, painter):
+        opts = node_utils.options
+        left = self.textLeft() + TITLE_MARGIN
+        rows = []
+        if self.nameVisible and self.editor is None and self.display_name:
+            rows.append(
+                (opts.titleFont, Qt.GlobalColor.black, 0, self.display_name)
+            )
+        if self.urlVisible and self.url:
+            rows.append((url_font(), URL_COLOR, self.urlTop(), self.url))
+        for font, color, top, text in rows:
+            fm = font_metrics(font)
+            rect = QRectF(
+                left,
+                top + TITLE_MARGIN,
+                self._rect.right() - left,
+                fm.height(),
+            ).intersected(self._rect)
+            painter.setFont(font)
+            painter.setPen(opts.paintCache.pen(color))
+            painter.drawText(
+                rect,
+                Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop,
+                text,
+            )
+
+
+# lite classes by the type they stand in for, see get_node_class
+LITE_TYPES = {"Node": LiteNode, "NodeBookmark": LiteBookmark}
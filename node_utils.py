@@ -1,10 +1,24 @@
 import re
+from collections import OrderedDict, deque
+from functools import wraps
 from random import randint
+from time import perf_counter
 import qtawesome as qta
-from qtpy.QtGui import QFont, QColor, QPixmap, QUndoStack
-from qtpy.QtCore import QObject, QMimeData
+from qtpy.QtGui import (
+    QBrush,
+    QFont,
+    QColor,
+    QGradient,
+    QLinearGradient,
+    QPen,
+    QPixmap,
+    QUndoStack,
+)
+from qtpy.QtCore import QObject, QMimeData, QPointF
 from qtpy.QtWidgets import QApplication
 
+from node_io.names import increment_name, register_name  # noqa: F401
+
 
 def get_node_class(x):
     from node_plugins import get_node_type
@@ -12,17 +26,30 @@ def get_node_class(x):
     cls = get_node_type(x)
     if cls is not None:
         return cls
+    if x in options.liteNodes:
+        from node_types.node_lite import LITE_TYPES
+
+        return LITE_TYPES[x]
     from node_types import (
-        Node,  # noqa: F401
-        NodeGroup,  # noqa: F401
-        NodeControl,  # noqa: F401
-        NodeNote,  # noqa: F401
-        NodeGraph,  # noqa: F401
-        NodeBlock,  # noqa: F401
-        NodeBookmark,  # noqa: F401
+        Node,
+        NodeGroup,
+        NodeControl,
+        NodeNote,
+        NodeGraph,
+        NodeBlock,
+        NodeBookmark,
     )
 
-    return locals()[x]
+    classes = (
+        Node,
+        NodeGroup,
+        NodeControl,
+        NodeNote,
+        NodeGraph,
+        NodeBlock,
+        NodeBookmark,
+    )
+    return {c.__name__: c for c in classes}[x]
 
 
 def normalize_name(name):
@@ -45,23 +72,6 @@ def normalize_name(name):
     return result
 
 
-def increment_name(name, dic):
-    """
-    Increments name index by given dictinary
-    Dictinary keys are names, values are number of instances
-    Values of dict are updated
-    """
-    res = re.sub(r"\d+$", "", name)
-    if res in dic.keys():
-        d = dic[res] + 1
-        dic[res] = d
-        res += "%d" % d
-    else:
-        dic[res] = 0
-        res += "0"
-    return res
-
-
 def list_remove(lst, item):
     """
     Removes item or items from list if it's exists
@@ -131,11 +141,271 @@ class NodeMimeData(QMimeData):
         return self.object
 
 
+class PaintCache:
+    """
+    Pens and brushes shared by all items, least recently used dropped
+    past maxSize. Returned objects are shared, don't modify them.
+    """
+
+    maxSize = 256
+
+    def __init__(self, maxSize=None):
+        if maxSize is not None:
+            self.maxSize = maxSize
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, make):
+        item = self.items.get(key)
+        if item is not None:
+            self.hits += 1
+            self.items.move_to_end(key)
+            return item
+        self.misses += 1
+        item = self.items[key] = make()
+        if len(self.items) > self.maxSize:
+            self.items.popitem(last=False)
+        return item
+
+    def pen(self, color, width=1.0):
+        color = QColor(color)
+        return self.get(
+            ("pen", color.rgba(), width), lambda: QPen(color, width)
+        )
+
+    def brush(self, color):
+        color = QColor(color)
+        return self.get(("brush", color.rgba()), lambda: QBrush(color))
+
+    def gradient(self, color, alpha, desaturate, endAlpha):
+        """
+        Diagonal gradient from color with alpha to a desaturated color
+        with endAlpha, stretched over the bounding rect of each shape
+        drawn with it so it's shared by items of any size.
+        """
+        color = QColor(color)
+        key = ("gradient", color.rgb(), alpha, desaturate, endAlpha)
+
+        def make():
+            start = QColor(color)
+            start.setAlpha(alpha)
+            end = QColor()
+            end.setHsv(
+                start.hue(),
+                max(0, start.saturation() - desaturate),
+                start.value(),
+                endAlpha,
+            )
+            g = QLinearGradient(QPointF(0, 0), QPointF(1, 1))
+            g.setCoordinateMode(QGradient.CoordinateMode.ObjectBoundingMode)
+            g.setColorAt(0, start)
+            g.setColorAt(1, end)
+            return QBrush(g)
+
+        return self.get(key, make)
+
+    def clear(self):
+        self.items.clear()
+
+
+class PixmapCache:
+    """
+    Pixmaps keyed by (source, size, color, device pixel ratio), least
+    recently used dropped past budget bytes. Returned pixmaps are shared.
+    """
+
+    budget = 32 << 20
+
+    def __init__(self, budget=None):
+        if budget is not None:
+            self.budget = budget
+        self.items = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def size_of(pixmap):
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    def get(self, key, make):
+        pixmap = self.find(key)
+        if pixmap is None:
+            pixmap = make()
+            self.put(key, pixmap)
+        return pixmap
+
+    def find(self, key):
+        """Cached pixmap of key, None counted as a miss."""
+        pixmap = self.items.get(key)
+        if pixmap is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.items.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        old = self.items.pop(key, None)
+        if old is not None:
+            self.bytes -= self.size_of(old)
+        self.items[key] = pixmap
+        self.bytes += self.size_of(pixmap)
+        while self.bytes > self.budget and len(self.items) > 1:
+            _, old = self.items.popitem(last=False)
+            self.bytes -= self.size_of(old)
+            self.evictions += 1
+
+    def hitRate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "items": len(self.items),
+            "bytes": self.bytes,
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": self.hitRate(),
+        }
+
+    def clear(self):
+        self.items.clear()
+        self.bytes = 0
+
+
+def device_pixel_ratio():
+    app = QApplication.instance()
+    return app.devicePixelRatio() if app is not None else 1.0
+
+
+# (name, size) of glyphs every node shows, see warm_up_pixmaps
+WARM_UP_GLYPHS = (
+    ("fa6s.maximize", 16),
+    ("fa6s.caret-down", None),
+    ("fa6s.thumbtack", None),
+    ("fa6s.thumbtack-slash", None),
+)
+
+
+class PerfStats:
+    """
+    Counters of the node view shown by its performance HUD, see
+    View.paintEvent. Paint times are only taken inside a frame, other
+    counts add up from one frame to the next. The attribute panel is not
+    a View, so attributes are only timed when they're pinned to a node.
+    """
+
+    historySize = 120
+
+    def __init__(self):
+        self.enabled = False
+        self.inFrame = False
+        self.depth = 0
+        self.frameStart = 0.0
+        # (start, duration) of the last frames
+        self.frames = deque(maxlen=self.historySize)
+        self.paintCount = {}
+        self.paintTime = {}
+        self.counters = {}
+        # values of the last finished frame
+        self.lastPaintCount = {}
+        self.lastPaintTime = {}
+        self.lastCounters = {}
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def addPaint(self, name, seconds):
+        self.paintCount[name] = self.paintCount.get(name, 0) + 1
+        self.paintTime[name] = self.paintTime.get(name, 0.0) + seconds
+
+    def beginFrame(self):
+        self.inFrame = True
+        self.paintCount = {}
+        self.paintTime = {}
+        self.frameStart = perf_counter()
+
+    def endFrame(self):
+        self.frames.append((self.frameStart, perf_counter() - self.frameStart))
+        self.inFrame = False
+        self.lastPaintCount = self.paintCount
+        self.lastPaintTime = self.paintTime
+        self.lastCounters = self.counters
+        self.counters = {}
+
+    def fps(self):
+        """Frames painted in the second before the last frame."""
+        if not self.frames:
+            return 0
+        last = self.frames[-1][0]
+        return sum(1 for start, _ in self.frames if start > last - 1.0)
+
+    def frameTime(self):
+        return self.frames[-1][1] if self.frames else 0.0
+
+    def clear(self):
+        self.frames.clear()
+        self.counters = {}
+        self.lastPaintCount = {}
+        self.lastPaintTime = {}
+        self.lastCounters = {}
+
+
+def timed_paint(paint):
+    """Add the time spent in a paint method to options.perf."""
+
+    @wraps(paint)
+    def wrapper(self, painter, option, widget=None):
+        perf = options.perf
+        # items painting others are counted once, as themselves
+        if not perf.inFrame or perf.depth:
+            return paint(self, painter, option, widget)
+        perf.depth += 1
+        start = perf_counter()
+        try:
+            return paint(self, painter, option, widget)
+        finally:
+            perf.depth -= 1
+            perf.addPaint(type(self).__name__, perf_counter() - start)
+
+    return wrapper
+
+
 class NodesOptions(QObject):
     def __init__(self):
         super().__init__()
         self.undoStack = QUndoStack(self)
+        self.paintCache = PaintCache()
+        self.pixmapCache = PixmapCache()
+        self.perf = PerfStats()
         self.splineStep = 20
+        # zoom thresholds at which connections are flattened again, and
+        # the threshold in use (None: zoomed in past all of them, curves
+        # get splineStep segments), see View.updateFlattenZoom
+        self.flattenZoomLevels = (0.125, 0.25, 0.5, 1.0, 2.0)
+        self.flattenZoom = None
+        # on-screen pixels per segment of a flattened connection
+        self.flattenPixels = 12
+        # level of detail (on-screen scale) below which nodes are drawn as
+        # flat rects without their child items, and connections as lines
+        self.nodeDetailLevel = 0.4
+        self.connectionDetailLevel = 0.25
+        # whether nodes show their child items, see View.updateNodeDetail
+        self.nodeDetail = True
+        # least number of items that stay in place for a drag to paint
+        # them from a snapshot, see View.beginDragSnapshot
+        self.dragSnapshotItems = 100
+        # ConnectionLayer holding all connections instead of the scene
+        self.connectionLayer = None
+        # types created as single items without child items, see
+        # node_types.node_lite
+        self.liteNodes = set()
         self.ids = -1
         self.iconSize = 18
         self.nodeRadius = 5
@@ -143,7 +413,6 @@ class NodesOptions(QObject):
         self.minNodeHeight = 24
         self.maxPreferredNodeWidth = 400
         self.colorSelector = "triangle"
-        self.icons = {}
         self.nodes = {}
         self.names = {}
         self.connections = {}
@@ -195,14 +464,23 @@ class NodesOptions(QObject):
         self.connections.clear()
 
     def get_icon(self, icon, resize=True):
-        if icon not in self.icons.keys():
+        size = self.iconSize if resize else None
+
+        def make():
             pix = QPixmap(icon)
+            if resize and not pix.isNull():
+                pix = pix.scaled(size, size)
+            return pix
+
+        key = ("file", icon, size, None, device_pixel_ratio())
+        pix = self.pixmapCache.find(key)
+        if pix is None:
+            pix = make()
             if pix.isNull():
+                # not cached, the file may be fixed later
                 return None
-            if resize:
-                pix = pix.scaled(self.iconSize, self.iconSize)
-            self.icons[icon] = pix
-        return self.icons[icon]
+            self.pixmapCache.put(key, pix)
+        return pix
 
     def get_awesome_icon(self, name, color=None):
         """Get Qt Awesome icon by name (e.g., 'fa6s.file').
@@ -221,6 +499,8 @@ class NodesOptions(QObject):
     def get_awesome_pixmap(self, name, size=None, color=None):
         """Get Qt Awesome icon as QPixmap for graphics items.
 
+        Pixmaps are shared through pixmapCache, don't modify them.
+
         Args:
             name: Icon identifier
             size: Size in pixels, uses iconSize if None
@@ -233,9 +513,18 @@ class NodesOptions(QObject):
             size = self.iconSize
         if color is None:
             color = QApplication.palette().text().color()
-        # Convert icon to pixmap
-        icon = qta.icon(name, color=color)
-        return icon.pixmap(size, size)
+        color = QColor(color)
+        return self.pixmapCache.get(
+            ("awesome", name, size, color.rgba(), device_pixel_ratio()),
+            lambda: qta.icon(name, color=color).pixmap(size, size),
+        )
+
+    def warm_up_pixmaps(self, icons=()):
+        """Render the common glyphs and the icon files ahead of use."""
+        for name, size in WARM_UP_GLYPHS:
+            self.get_awesome_pixmap(name, size)
+        for icon in icons:
+            self.get_icon(icon)
 
     def save_temp_image(self, pixmap, name):
         pixmap.save()
@@ -0,0 +1,35 @@
+import pytest
+
+import bezier
+
+CURVES = [
+    [(0, 0), (10, 5), (50, 50), (90, 95), (100, 100)],
+    [(-20, 40), (0, 10), (30, 0), (60, -10), (80, -40)],
+]
+
+
+def test_basis_rows_sum_to_one():
+    for row in bezier.bernstein_basis(4, 20):
+        assert sum(row) == pytest.approx(1)
+    assert bezier.bernstein_basis(4, 20)[0] == (1, 0, 0, 0, 0)
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_evaluate_curves_matches_bezier(monkeypatch, use_numpy):
+    if use_numpy:
+        if bezier.numpy is None:
+            pytest.skip("numpy not installed")
+        monkeypatch.setattr(bezier, "NUMPY_MIN_CURVES", 1)
+    else:
+        monkeypatch.setattr(bezier, "numpy", None)
+    steps = 10
+    result = bezier.evaluate_curves(CURVES, steps)
+    for P, points in zip(CURVES, result):
+        S = bezier.Bezier(P)
+        assert len(points) == steps + 1
+        for i, (x, y) in enumerate(points):
+            assert (x, y) == pytest.approx(S(i / steps))
+
+
+def test_evaluate_no_curves():
+    assert bezier.evaluate_curves([], 10) == []
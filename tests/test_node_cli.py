@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from node_cli import main, rewrite_paths, scene_files, validate_scene
+from node_io import read_scene, scene_nodes, write_scene
+
+
+def _dump():
+    return {
+        "nodes": {
+            "Node0": {
+                "id": 0,
+                "name": "Node0",
+                "icon": "/old/a.png",
+                "keywords": "/old/ notes",
+            },
+            "Node1": {"id": 1, "name": "Node1", "type": "NodeBookmark"},
+        },
+        "connections": [
+            {"id": 2, "name": "Connection0", "parent": 0, "child": 1}
+        ],
+    }
+
+
+@pytest.fixture
+def scenes(tmp_path):
+    paths = []
+    for name in ("a.nod", "sub/b.nod"):
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        write_scene(str(path), _dump())
+        paths.append(str(path))
+    return paths
+
+
+def test_scene_files_expands_directories(tmp_path, scenes):
+    (tmp_path / "notes.txt").write_text("")
+    (tmp_path / "package.json").write_text('{"name": "a"}')
+    assert scene_files([str(tmp_path)]) == scenes
+    write_scene(str(tmp_path / "c.json"), _dump())
+    found = scene_files([str(tmp_path)])
+    assert found == [scenes[0], str(tmp_path / "c.json"), scenes[1]]
+
+
+def test_validate(tmp_path, scenes):
+    assert validate_scene(scenes[0]) == []
+    dump = _dump()
+    dump["connections"][0]["child"] = 5
+    write_scene(scenes[1], dump)
+    assert validate_scene(scenes[1]) == ["connection 2: missing child node 5"]
+    assert main(["validate", "-j", "2", str(tmp_path)]) == 1
+    listed = tmp_path / "list.nod"
+    write_scene(str(listed), dict(_dump(), nodes=scene_nodes(_dump())))
+    assert validate_scene(str(listed)) == []
+    other = tmp_path / "package.json"
+    other.write_text('{"name": "a"}')
+    assert validate_scene(str(other)) == ["not a scene"]
+
+
+def test_convert_to_json(tmp_path, scenes):
+    out = tmp_path / "out"
+    assert main(["convert", "--to", "json", "-o", str(out), *scenes]) == 0
+    assert json.loads((out / "a.json").read_text()) == _dump()
+    assert read_scene(str(out / "b.json")) == _dump()
+
+
+def test_stats_json(tmp_path, scenes, capsys):
+    assert main(["stats", "--json", "-j", "1", str(tmp_path)]) == 0
+    total = json.loads(capsys.readouterr().out)["total"]
+    assert total["nodes"] == 4
+    assert total["types"] == {"Node": 2, "NodeBookmark": 2}
+
+
+def test_rewrite_paths(scenes):
+    assert rewrite_paths(scenes[0], "/old/", "/new/", dry_run=True) == 1
+    assert read_scene(scenes[0]) == _dump()
+    assert (
+        main(["rewrite-paths", "--old", "/old/", "--new", "/new/", *scenes])
+        == 0
+    )
+    node = read_scene(scenes[1])["nodes"]["Node0"]
+    assert node["icon"] == "/new/a.png"
+    # only path fields are rewritten
+    assert node["keywords"] == "/old/ notes"
@@ -0,0 +1,368 @@
+import os
+
+import pytest
+import yaml
+
+from node_io import (
+    BinarySceneError,
+    Journal,
+    SceneCache,
+    SceneEncoder,
+    binary,
+    convert_scene,
+    has_changes,
+    iter_scene,
+    journal_path,
+    read_journal,
+    read_scene,
+    recover_scene,
+    sanitize,
+    scene_format,
+    scene_nodes,
+    write_scene,
+    write_scene_data,
+)
+
+
+class TestSanitize:
+    def test_keeps_text_and_whitespace(self):
+        assert sanitize("a b\tc\nd\r\n") == "a b\tc\nd\r\n"
+
+    def test_strips_control_chars(self):
+        assert sanitize("a\x00b\x1bc\x7fd\x9be") == "abcde"
+
+    def test_keeps_unicode(self):
+        assert sanitize("żółw ✓") == "żółw ✓"
+
+
+class TestStream:
+    def test_reader_chunks(self):
+        import io
+
+        from node_io import SanitizedReader
+
+        data = "żółw\x9b ✓\x00".encode() * 3
+        reader = SanitizedReader(io.BytesIO(data), chunkSize=3)
+        parts = []
+        while True:
+            text = reader.read()
+            if not text:
+                break
+            parts.append(text)
+        assert "".join(parts) == "żółw ✓" * 3
+        assert reader.pos == len(data)
+
+    def test_records(self, tmp_path):
+        path = tmp_path / "scene.nod"
+        write_scene(str(path), _dump())
+        records = list(iter_scene(str(path), chunkSize=16))
+        dump = _dump()
+        assert [v for k, v in records if k == "nodes"] == scene_nodes(dump)
+        assert [v for k, v in records if k == "connections"] == dump[
+            "connections"
+        ]
+        assert ("viewport", dump["viewport"]) in records
+
+    def test_flow_style_and_lists(self, tmp_path):
+        path = tmp_path / "scene.nod"
+        path.write_text(
+            '{"connections": [{"id": 2}], "nodes": [{"id": 1, "on": true}]}',
+            encoding="utf-8",
+        )
+        assert list(iter_scene(str(path))) == [
+            ("connections", {"id": 2}),
+            ("nodes", {"id": 1, "on": True}),
+        ]
+
+    def test_empty(self, tmp_path):
+        path = tmp_path / "scene.nod"
+        path.write_text("", encoding="utf-8")
+        assert list(iter_scene(str(path))) == []
+
+
+class TestReadScene:
+    def test_read_sanitized_yaml(self, tmp_path):
+        path = tmp_path / "scene.nod"
+        path.write_text('{"nodes": {"a\x9b": {"id": 1}}}', encoding="utf-8")
+        assert read_scene(str(path)) == {"nodes": {"a": {"id": 1}}}
+
+    def test_scene_nodes_dict_or_list(self):
+        assert scene_nodes({"nodes": {"a": {"id": 1}}}) == [{"id": 1}]
+        assert scene_nodes({"nodes": [{"id": 2}]}) == [{"id": 2}]
+        assert scene_nodes({}) == []
+
+
+def _dump():
+    return {
+        "nodes": {
+            "Shader0": {
+                "name": "Shader0",
+                "id": 0,
+                "posx": -12.5,
+                "collapsed": False,
+                "icon": None,
+                "rgb": "#fafafa",
+                "shader": "DemoAllTypes",
+                "values": {"color": [0.5, 1.0, 0.0], "count": 3, "on": True},
+            },
+            "Bookmark1": {"name": "Bookmark1", "id": 1, "url": "żółw"},
+        },
+        "viewport": {"left": 0.0, "scaleFactor": 1.15},
+        "connections": [
+            {"parent": 0, "child": 1, "type": "Connection", "id": 2},
+        ],
+    }
+
+
+class TestBinary:
+    def test_round_trip(self):
+        dump = _dump()
+        assert binary.decode(binary.encode(dump)) == dump
+
+    def test_scalars(self):
+        for v in [None, True, False, 0, -1, 2**70, 1.5, "", "x", [], {}]:
+            assert binary.decode(binary.encode(v)) == v
+
+    def test_bool_is_not_int(self):
+        assert binary.decode(binary.encode([True, 1])) == [True, 1]
+        assert type(binary.decode(binary.encode(True))) is bool
+
+    def test_tuple_as_list(self):
+        assert binary.decode(binary.encode((1, 2))) == [1, 2]
+
+    def test_rejects_unknown_types(self):
+        with pytest.raises(TypeError):
+            binary.encode({"a": object()})
+
+    def test_rejects_bad_data(self):
+        with pytest.raises(BinarySceneError):
+            binary.decode(b"nope")
+        with pytest.raises(BinarySceneError):
+            binary.decode(binary.encode(_dump())[:-3])
+
+
+class TestWriteScene:
+    def test_format_by_extension(self):
+        assert scene_format("a.nod") == "yaml"
+        assert scene_format("a.NODB") == "binary"
+        assert scene_format("a.rxt") == "context"
+
+    @pytest.mark.parametrize("name", ["scene.nod", "scene.nodb", "scene.json"])
+    def test_round_trip(self, tmp_path, name):
+        path = str(tmp_path / name)
+        write_scene(path, _dump())
+        assert read_scene(path) == _dump()
+
+    def test_convert(self, tmp_path):
+        src = str(tmp_path / "scene.nod")
+        dst = str(tmp_path / "scene.nodb")
+        write_scene(src, _dump())
+        convert_scene(src, dst)
+        assert binary.decode((tmp_path / "scene.nodb").read_bytes()) == _dump()
+
+    def test_write_is_atomic(self, tmp_path, monkeypatch):
+        path = tmp_path / "scene.nod"
+        write_scene_data(str(path), b"old")
+
+        def fail(fd):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(os, "fsync", fail)
+        with pytest.raises(OSError):
+            write_scene_data(str(path), b"new")
+        assert path.read_bytes() == b"old"
+        assert [p.name for p in tmp_path.iterdir()] == ["scene.nod"]
+
+
+class TestSceneEncoder:
+    def _records(self):
+        dump = _dump()
+        nodes = {d["id"]: d for d in scene_nodes(dump)}
+        conns = {d["id"]: d for d in dump["connections"]}
+        return nodes, conns, dump["viewport"]
+
+    def test_yaml_matches_full_dump(self):
+        from node_io import make_dump
+        from node_io.scene_file import dumps_yaml
+
+        nodes, conns, viewport = self._records()
+        data = SceneEncoder().encode("yaml", nodes, conns, viewport)
+        expected = dumps_yaml(make_dump(nodes, conns, viewport))
+        assert data.decode("utf-8") == expected
+
+    def test_only_changed_records_are_encoded(self):
+        nodes, conns, viewport = self._records()
+        encoder = SceneEncoder()
+        encoder.encode("yaml", nodes, conns, viewport)
+        assert encoder.encoded == 3
+        encoder.encode("yaml", nodes, conns, viewport)
+        assert encoder.encoded == 0
+        nodes[1] = dict(nodes[1], posx=5)
+        data = encoder.encode("yaml", nodes, conns, viewport)
+        assert encoder.encoded == 1
+        assert yaml.safe_load(data)["nodes"]["Bookmark1"]["posx"] == 5
+
+    def test_shared_values_round_trip(self):
+        nodes, conns, viewport = self._records()
+        point = [1.0, 2.0]
+        nodes[0] = dict(nodes[0], x=point, y=point)
+        nodes[1] = dict(nodes[1], x=point, y=point)
+        data = SceneEncoder().encode("yaml", nodes, conns, viewport)
+        loaded = yaml.safe_load(data)["nodes"]
+        assert loaded["Shader0"]["y"] == loaded["Bookmark1"]["x"] == point
+
+    def test_deleted_records_are_dropped(self):
+        nodes, conns, viewport = self._records()
+        encoder = SceneEncoder()
+        encoder.encode("yaml", nodes, conns, viewport)
+        del nodes[0]
+        data = yaml.safe_load(encoder.encode("yaml", nodes, {}, viewport))
+        assert list(data["nodes"]) == ["Bookmark1"]
+        assert data["connections"] == []
+
+    def test_binary(self):
+        nodes, conns, viewport = self._records()
+        data = SceneEncoder().encode("binary", nodes, conns, viewport)
+        assert binary.decode(data) == _dump()
+
+
+class TestJournal:
+    def _scene(self, tmp_path):
+        path = tmp_path / "scene.nod"
+        write_scene(str(path), _dump())
+        return str(path)
+
+    def test_append_and_recover(self, tmp_path):
+        path = self._scene(tmp_path)
+        journal = Journal(path)
+        node = dict(scene_nodes(_dump())[1], posx=50)
+        journal.append({"op": "move node", "nodes": {1: node}})
+        journal.append({"op": "delete connection", "connections": {2: None}})
+        journal.close()
+        assert has_changes(path)
+        dump = recover_scene(path)
+        assert dump["nodes"]["Bookmark1"]["posx"] == 50
+        assert dump["connections"] == []
+        assert dump["viewport"] == _dump()["viewport"]
+
+    def test_reset_drops_edits(self, tmp_path):
+        path = self._scene(tmp_path)
+        journal = Journal(path)
+        journal.append({"op": "delete node", "nodes": {0: None}})
+        journal.reset()
+        journal.flush()
+        assert not has_changes(path)
+        journal.close(remove=True)
+        assert not (tmp_path / "scene.nod.journal").exists()
+
+    def test_compact(self, tmp_path):
+        path = self._scene(tmp_path)
+        journal = Journal(path)
+        journal.append({"op": "delete node", "nodes": {0: None}})
+        dump = _dump()
+        dump["nodes"]["Bookmark1"]["posx"] = 7
+        journal.compact(dump)
+        journal.close()
+        assert [r["op"] for r in read_journal(journal_path(path))] == [
+            "header",
+            "base",
+        ]
+        assert has_changes(path)
+        assert recover_scene(path)["nodes"]["Bookmark1"]["posx"] == 7
+
+    def test_compacted_edits_without_save(self, tmp_path):
+        # compacted at the record limit, then the editor exits unsaved
+        path = self._scene(tmp_path)
+        journal = Journal(path)
+        node = dict(scene_nodes(_dump())[1], posx=9)
+        journal.append({"op": "move node", "nodes": {1: node}})
+        journal.append({"op": "delete node", "nodes": {0: None}})
+        dump = _dump()
+        del dump["nodes"]["Shader0"]
+        dump["nodes"]["Bookmark1"]["posx"] = 9
+        journal.compact(dump)
+        journal.close()
+        assert has_changes(path)
+        dump = recover_scene(path)
+        assert list(dump["nodes"]) == ["Bookmark1"]
+        assert dump["nodes"]["Bookmark1"]["posx"] == 9
+
+    def test_snapshot_of_unfinished_save(self, tmp_path):
+        # saveFile compacts before writing; the write never finishes
+        path = self._scene(tmp_path)
+        journal = Journal(path)
+        dump = _dump()
+        dump["nodes"]["Bookmark1"]["posx"] = 3
+        journal.compact(dump)
+        journal.close()
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert has_changes(path)
+        assert recover_scene(path) == dump
+
+    def test_torn_tail_is_dropped(self, tmp_path):
+        path = self._scene(tmp_path)
+        journal = Journal(path)
+        journal.append({"op": "delete node", "nodes": {0: None}})
+        journal.close()
+        with open(journal_path(path), "ab") as f:
+            f.write(b"\xff\x00\x00\x00NODB")
+        assert [r["op"] for r in read_journal(journal_path(path))] == [
+            "header",
+            "delete node",
+        ]
+
+    def test_stale_journal_is_ignored(self, tmp_path):
+        path = self._scene(tmp_path)
+        journal = Journal(path)
+        journal.append({"op": "delete node", "nodes": {0: None}})
+        journal.close()
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert recover_scene(path) == read_scene(path)
+
+
+class TestSceneCache:
+    def _scene(self, tmp_path, name="scene.nod"):
+        path = tmp_path / name
+        write_scene(str(path), _dump())
+        return str(path)
+
+    def test_hit_after_read(self, tmp_path):
+        path = self._scene(tmp_path)
+        cache = SceneCache(str(tmp_path / "cache"))
+        assert read_scene(path, cache) == _dump()
+        assert (cache.hits, cache.misses) == (0, 1)
+        assert read_scene(path, cache) == _dump()
+        assert cache.hits == 1
+
+    def test_changed_file_misses(self, tmp_path):
+        path = self._scene(tmp_path)
+        cache = SceneCache(str(tmp_path / "cache"))
+        read_scene(path, cache)
+        dump = _dump()
+        dump["viewport"]["scaleFactor"] = 2.0
+        write_scene(path, dump)
+        assert read_scene(path, cache) == dump
+        assert cache.hits == 0
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        paths = [self._scene(tmp_path, "s%d.nod" % i) for i in range(3)]
+        cache = SceneCache(str(tmp_path / "cache"))
+        cache.put(paths[0], _dump())
+        entry = cache.entryPath(paths[0])
+        os.utime(entry, (1, 1))
+        cache.maxSize = os.path.getsize(entry) * 2
+        cache.put(paths[1], _dump())
+        cache.put(paths[2], _dump())
+        assert cache.get(paths[0]) is None
+        assert cache.get(paths[1]) == _dump()
+        assert cache.size() <= cache.maxSize
+
+    def test_unmarshallable_dump_is_skipped(self, tmp_path):
+        import datetime
+
+        path = self._scene(tmp_path)
+        cache = SceneCache(str(tmp_path / "cache"))
+        cache.put(path, {"date": datetime.date(2020, 1, 1)})
+        assert cache.get(path) is None
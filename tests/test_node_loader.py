@@ -0,0 +1,175 @@
+import pytest
+
+
+@pytest.fixture
+def scene(qtbot):
+    from qtpy.QtWidgets import QGraphicsScene
+
+    import node_utils
+
+    opts = node_utils.options
+    opts.clear_nodes()
+    opts.clear_connections()
+    opts.names.clear()
+    opts.set_ids(-1)
+    opts.undoStack.clear()
+    yield QGraphicsScene()
+    opts.clear_nodes()
+    opts.clear_connections()
+    opts.names.clear()
+    opts.set_ids(-1)
+
+
+def _dump():
+    return {
+        "nodes": {
+            "Node3": {"id": 3, "name": "Node3", "posx": 10, "posy": 20},
+            "Node7": {"id": 7, "name": "Node7", "posx": 200, "posy": 20},
+        },
+        "connections": [
+            {"id": 9, "name": "Connection0", "parent": 3, "child": 7},
+        ],
+    }
+
+
+def test_build_creates_items_without_undo(scene):
+    import node_utils
+    from node_loader import SceneBuilder
+
+    SceneBuilder(None, scene).build(_dump())
+    opts = node_utils.options
+    assert sorted(opts.nodes) == [3, 7]
+    assert list(opts.connections) == [9]
+    assert opts.undoStack.count() == 0
+    assert opts.ids == 9
+    assert opts.nodes[3].pos().x() == 10
+    assert opts.nodes[3].childs == [opts.nodes[7]]
+    assert opts.connections[9] in opts.nodes[7].connections
+
+
+def test_build_keeps_names_and_restores_index(scene):
+    import node_utils
+    from node_loader import SceneBuilder
+    from node_utils import increment_name
+
+    method = scene.itemIndexMethod()
+    SceneBuilder(None, scene).build(_dump())
+    assert scene.itemIndexMethod() == method
+    assert node_utils.options.nodes[7].name == "Node7"
+    assert increment_name("Node", node_utils.options.names) == "Node8"
+
+
+def test_duplicate_names_are_incremented(scene):
+    import node_utils
+    from node_io import make_dump, scene_nodes
+    from node_loader import SceneBuilder
+
+    dump = {
+        "nodes": [
+            {"id": 0, "name": "a"},
+            {"id": 1, "name": "a"},
+        ],
+        "connections": [{"id": 2, "parent": 0, "child": 1}],
+    }
+    SceneBuilder(None, scene).build(dump)
+    opts = node_utils.options
+    assert [opts.nodes[i].name for i in (0, 1)] == ["a", "a1"]
+    saved = make_dump(
+        {i: n.toDict() for i, n in opts.nodes.items()},
+        {i: c.toDict() for i, c in opts.connections.items()},
+    )
+    assert sorted(d["id"] for d in scene_nodes(saved)) == [0, 1]
+
+
+def test_connections_before_nodes_are_deferred(scene):
+    import node_utils
+    from node_loader import SceneBuilder
+
+    dump = _dump()
+    builder = SceneBuilder(None, scene)
+    builder.begin()
+    builder.addConnections(dump["connections"])
+    assert node_utils.options.connections == {}
+    # items created before finish() get ids past the loaded ones
+    assert node_utils.options.ids == 9
+    builder.addNodes(dump["nodes"].values())
+    builder.finish()
+    assert list(node_utils.options.connections) == [9]
+
+
+def test_scene_loader_emits_chunks(qtbot, tmp_path):
+    import yaml
+
+    from node_loader import SceneLoader
+
+    path = tmp_path / "scene.nod"
+    dump = _dump()
+    dump["viewport"] = {"left": 0}
+    path.write_text(yaml.dump(dump), encoding="utf-8")
+
+    loader = SceneLoader(str(path))
+    loader.chunkSize = 1
+    nodes, conns = [], []
+    loader.nodesLoaded.connect(nodes.append)
+    loader.connectionsLoaded.connect(conns.append)
+    with qtbot.waitSignal(loader.loaded, timeout=5000) as blocker:
+        loader.start()
+    loader.wait()
+    assert [len(c) for c in nodes] == [1, 1]
+    assert [c[0]["id"] for c in conns] == [9]
+    assert blocker.args[0] == {"viewport": {"left": 0}}
+
+
+def test_scene_loader_streams_large_files(qtbot, tmp_path):
+    from node_io import write_scene
+    from node_loader import SceneLoader
+
+    path = tmp_path / "scene.nod"
+    dump = _dump()
+    dump["viewport"] = {"left": 0}
+    write_scene(str(path), dump)
+
+    loader = SceneLoader(str(path))
+    loader.streamSize = 0
+    nodes = []
+    loader.nodesLoaded.connect(nodes.extend)
+    with qtbot.waitSignal(loader.loaded, timeout=5000) as blocker:
+        loader.start()
+    loader.wait()
+    assert [d["id"] for d in nodes] == [3, 7]
+    assert blocker.args[0] == {"viewport": {"left": 0}}
+
+
+def test_scene_saver_writes_snapshot(qtbot, tmp_path):
+    from node_io import SceneEncoder, read_scene
+    from node_loader import SceneSaver
+
+    path = str(tmp_path / "scene.nodb")
+    dump = _dump()
+    nodes = {d["id"]: d for d in dump["nodes"].values()}
+    conns = {d["id"]: d for d in dump["connections"]}
+    saver = SceneSaver(SceneEncoder(), path, nodes, conns, None)
+    with qtbot.waitSignal(saver.saved, timeout=5000) as blocker:
+        saver.start()
+    saver.wait()
+    assert blocker.args == [path]
+    assert read_scene(path) == dump
+
+
+def test_journal_record_of_commands(scene):
+    import node_utils
+    from node_command import CommandDeleteConnections, journal_record
+    from node_loader import SceneBuilder
+
+    SceneBuilder(None, scene).build(_dump())
+    opts = node_utils.options
+    cmd = CommandDeleteConnections(scene, [opts.connections[9]])
+    opts.undoStack.push(cmd)
+    assert journal_record(cmd) == {
+        "op": "delete connection",
+        "nodes": {},
+        "connections": {9: None},
+    }
+    opts.undoStack.undo()
+    record = journal_record(cmd, redo=False)
+    assert record["connections"][9]["parent"] == 3
@@ -0,0 +1,71 @@
+import subprocess
+import sys
+
+from node_model import EdgeRecord, NodeRecord, SceneModel
+
+
+def _dump():
+    return {
+        "nodes": {
+            "Node3": {"id": 3, "name": "Node3", "posx": 10, "posy": 20},
+            "Bookmark7": {
+                "id": 7,
+                "name": "Bookmark7",
+                "type": "NodeBookmark",
+                "url": "http://a",
+                "posx": 200,
+                "posy": 20,
+            },
+        },
+        "viewport": {"left": 0},
+        "connections": [
+            {"id": 9, "name": "Connection0", "parent": 3, "child": 7},
+        ],
+    }
+
+
+def test_records_use_slots():
+    assert not hasattr(NodeRecord(0, "Node0"), "__dict__")
+    assert not hasattr(EdgeRecord(1, "Connection0", 0, 0), "__dict__")
+
+
+def test_load_query_and_save(tmp_path):
+    from node_io import read_scene, write_scene
+
+    path = str(tmp_path / "scene.nod")
+    write_scene(path, _dump())
+    model = SceneModel.load(path)
+    assert len(model) == 2
+    assert model.node("Bookmark7").attrs == {"url": "http://a"}
+    assert [n.id for n in model.find(type="NodeBookmark")] == [7]
+    assert model.children(3) == [model.nodes[7]]
+    assert model.parents(7) == [model.nodes[3]]
+    model.save(path)
+    dump = read_scene(path)
+    assert dump["nodes"]["Bookmark7"]["url"] == "http://a"
+    assert dump["connections"][0]["parent"] == 3
+    assert dump["viewport"] == {"left": 0}
+
+
+def test_edits():
+    model = SceneModel.fromDump(_dump())
+    n = model.addNode("Node", posx=5)
+    assert (n.id, n.name) == (10, "Node4")
+    e = model.connect(7, n.id)
+    assert model.children(7) == [n]
+    model.setAttrs(7, url="https://a", posx=1)
+    assert model.nodes[7].toDict()["url"] == "https://a"
+    assert model.nodes[7].posx == 1
+    model.removeNode(7)
+    assert e.id not in model.edges
+    assert model.edges == {}
+    assert model.children(3) == []
+
+
+def test_import_without_qt():
+    code = (
+        "import sys, node_model; "
+        "sys.exit(any(m.split('.')[0] in ('qtpy', 'PyQt6', 'PySide6') "
+        "for m in sys.modules))"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
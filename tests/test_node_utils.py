@@ -1,9 +1,14 @@
 from node_utils import (
-    normalize_name,
+    PaintCache,
+    PerfStats,
+    PixmapCache,
     increment_name,
     list_remove,
     merge_dicts,
+    normalize_name,
+    register_name,
     sample,
+    timed_paint,
 )
 
 
@@ -114,3 +119,131 @@ class TestSample:
         data = list(range(100))
         result = sample(iter(data), 10)
         assert len(result) == 10
+
+
+class TestRegisterName:
+    def test_keeps_name(self):
+        dic = {}
+        assert register_name("foo12", dic) == "foo12"
+        assert dic == {"foo": 12}
+
+    def test_increment_continues_after_registered(self):
+        dic = {}
+        register_name("foo12", dic)
+        register_name("foo3", dic)
+        assert increment_name("foo", dic) == "foo13"
+
+    def test_name_without_index(self):
+        dic = {}
+        register_name("bar", dic)
+        assert increment_name("bar", dic) == "bar1"
+
+
+class TestPaintCache:
+    def test_shared_and_counted(self):
+        from qtpy.QtGui import QColor
+
+        cache = PaintCache()
+        pen = cache.pen(QColor(1, 2, 3), 1.5)
+        assert cache.pen(QColor(1, 2, 3), 1.5) is pen
+        assert cache.pen(QColor(1, 2, 3), 2) is not pen
+        a = cache.gradient(QColor(10, 20, 30), 50, 60, 100)
+        assert cache.gradient(QColor(10, 20, 30, 7), 50, 60, 100) is a
+        assert (cache.hits, cache.misses) == (2, 3)
+
+    def test_bounded(self):
+        from qtpy.QtGui import QColor
+
+        cache = PaintCache(maxSize=2)
+        red = cache.brush(QColor(255, 0, 0))
+        cache.brush(QColor(0, 255, 0))
+        cache.brush(QColor(255, 0, 0))
+        cache.brush(QColor(0, 0, 255))
+        assert len(cache.items) == 2
+        assert cache.brush(QColor(255, 0, 0)) is red
+        cache.clear()
+        assert not cache.items
+
+
+class TestPerfStats:
+    def test_frames_and_counters(self):
+        perf = PerfStats()
+        perf.count("updatePath")
+        assert perf.counters == {}
+        perf.enabled = True
+        perf.count("updatePath", 3)
+        perf.beginFrame()
+        perf.addPaint("Node", 0.002)
+        perf.addPaint("Node", 0.001)
+        perf.endFrame()
+        assert perf.lastCounters == {"updatePath": 3}
+        assert perf.counters == {}
+        assert perf.lastPaintCount == {"Node": 2}
+        assert abs(perf.lastPaintTime["Node"] - 0.003) < 1e-9
+        assert perf.fps() == 1 and len(perf.frames) == 1
+        perf.clear()
+        assert perf.fps() == 0 and perf.lastPaintCount == {}
+
+    def test_timed_paint_counts_outer_item(self, monkeypatch):
+        import node_utils
+
+        perf = PerfStats()
+        monkeypatch.setattr(node_utils.options, "perf", perf)
+
+        class Inner:
+            @timed_paint
+            def paint(self, painter, option, widget=None):
+                pass
+
+        class Outer:
+            @timed_paint
+            def paint(self, painter, option, widget=None):
+                Inner().paint(painter, option)
+
+        Outer().paint(None, None)
+        assert perf.paintCount == {}
+        perf.beginFrame()
+        Outer().paint(None, None)
+        perf.endFrame()
+        assert perf.lastPaintCount == {"Outer": 1}
+
+
+class TestPixmapCache:
+    def test_evicts_by_bytes(self, qtbot):
+        from qtpy.QtGui import QPixmap
+
+        cache = PixmapCache(budget=3 * 16 * 16 * 4)
+        made = []
+
+        def make(size):
+            made.append(size)
+            return QPixmap(size, size)
+
+        a = cache.get(("a", 16), lambda: make(16))
+        assert cache.get(("a", 16), lambda: make(16)) is a
+        cache.get(("b", 16), lambda: make(16))
+        cache.get(("c", 16), lambda: make(16))
+        cache.get(("a", 16), lambda: make(16))
+        assert cache.evictions == 0
+        cache.get(("d", 16), lambda: make(16))
+        assert cache.evictions == 1 and ("b", 16) not in cache.items
+        assert cache.bytes <= cache.budget
+        assert len(made) == 4
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (2, 4)
+        assert stats["hitRate"] == 2 / 6
+
+    def test_awesome_pixmaps_shared(self, qtbot):
+        from qtpy.QtGui import QColor
+
+        from node_utils import options
+
+        a = options.get_awesome_pixmap("fa6s.maximize", 16)
+        assert options.get_awesome_pixmap("fa6s.maximize", 16) is a
+        red = options.get_awesome_pixmap("fa6s.maximize", 16, QColor("red"))
+        assert red is not a
+        assert options.get_icon("missing/icon.png") is None
+        # unreadable files aren't cached
+        assert not any(
+            k[1] == "missing/icon.png" for k in options.pixmapCache.items
+        )
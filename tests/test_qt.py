@@ -9,8 +9,507 @@ def test_node_mime_data_set_get_object(qtbot):
 
 def test_node_mime_data_set_origin(qtbot):
     from qtpy.QtCore import QPointF
+
     from node_utils import NodeMimeData
 
     mime = NodeMimeData()
     mime.setOrigin(QPointF(10, 20))
     assert mime.origin.x() == 10 and mime.origin.y() == 20
+
+
+def test_node_serialize_cached_until_changed(qtbot):
+    from qtpy.QtGui import QColor
+
+    from node_types import Node
+
+    node = Node({"name": "Node0", "id": 0})
+    d = node.serialize()
+    assert node.serialize() is d
+    node.setPos(10, 20)
+    moved = node.serialize()
+    assert moved is not d
+    assert (moved["posx"], moved["posy"]) == (10, 20)
+    node.setColor(QColor("#ff0000"))
+    assert node.serialize()["rgb"] == "#ff0000"
+    node.fromDict({"keywords": "abc"})
+    assert node.serialize()["keywords"] == "abc"
+
+
+def test_update_paths_matches_update_path(qtbot):
+    from node_parts.connection import Connection, update_paths
+    from node_types import Node
+
+    parent = Node({"name": "Node0", "id": 0})
+    children = [Node({"name": "Node%d" % i, "id": i}) for i in range(1, 6)]
+    conns = []
+    for i, child in enumerate(children):
+        child.setPos(200, i * 40)
+        conns.append(
+            Connection({"parent": parent, "child": child, "id": 10 + i})
+        )
+        parent.connections.append(conns[-1])
+    expected = []
+    for c in conns:
+        c.updatePath()
+        expected.append(c.path)
+    parent.setPos(0, 0)
+    update_paths(conns)
+    assert [c.path for c in conns] == expected
+
+
+def test_connections_flattened_by_zoom(qtbot):
+    from node_parts.connection import Connection, flatten_steps, update_paths
+    from node_types import Node
+    from node_utils import options
+
+    parent = Node({"name": "Node0", "id": 0})
+    child = Node({"name": "Node1", "id": 1})
+    child.setPos(300, 100)
+    c = Connection({"parent": parent, "child": child, "id": 2})
+    parent.connections.append(c)
+    P = c.controlPoints()
+    try:
+        options.flattenZoom = None
+        assert flatten_steps(P) == options.splineStep
+        update_paths([c])
+        full = c.path.elementCount()
+        options.flattenZoom = 0.01
+        assert flatten_steps(P) == 1
+        update_paths([c])
+        assert c.path.elementCount() == 2
+        options.flattenZoom = 0.25
+        steps = flatten_steps(P)
+        assert 1 < steps < options.splineStep
+        assert steps & (steps - 1) == 0
+        c.updatePath()
+        assert 2 < c.path.elementCount() < full
+    finally:
+        options.flattenZoom = None
+
+
+def test_node_detail_hides_child_items(qtbot):
+    from qtpy.QtWidgets import QGraphicsScene
+
+    from node_types import Node
+    from node_utils import options
+
+    scene = QGraphicsScene()
+    n = Node({"name": "Node0", "id": 0})
+    scene.addItem(n)
+    visible = [x for x in n.childItems() if x.isVisible()]
+    assert visible
+    try:
+        n.setDetailed(False)
+        assert not any(x.isVisible() for x in n.childItems())
+        n.setSelected(True)
+        assert not n.resizeItem.isVisible()
+        n.setDetailed(True)
+        assert n.resizeItem.isVisible()
+        n.setSelected(False)
+        assert [x for x in n.childItems() if x.isVisible()] == visible
+        # nodes added while zoomed out start without details
+        options.nodeDetail = False
+        m = Node({"name": "Node1", "id": 1})
+        scene.addItem(m)
+        assert not any(x.isVisible() for x in m.childItems())
+    finally:
+        options.nodeDetail = True
+
+
+def test_groups_and_blocks_flat_when_zoomed_out(qtbot):
+    from qtpy.QtCore import QRectF
+    from qtpy.QtGui import QImage, QPainter
+    from qtpy.QtWidgets import QGraphicsScene
+
+    from node_types import NodeBlock, NodeGroup
+
+    scene = QGraphicsScene()
+    nodes = [
+        NodeGroup({"name": "NodeGroup0", "id": 0, "width": 400}),
+        NodeBlock({"name": "NodeBlock0", "id": 1}),
+    ]
+    painted = []
+    for n in nodes:
+        scene.addItem(n)
+        n.paintBody = lambda painter, n=n: painted.append(("body", n))
+        n.paintFlat = lambda painter, n=n: painted.append(("flat", n))
+    image = QImage(40, 40, QImage.Format.Format_ARGB32)
+    painter = QPainter(image)
+    # a tenth of the scene size is below options.nodeDetailLevel
+    scene.render(painter, QRectF(0, 0, 40, 40), QRectF(0, 0, 400, 400))
+    painter.end()
+    assert sorted(kind for kind, _ in painted) == ["flat", "flat"]
+
+
+def test_shadow_pixmaps_shared(qtbot):
+    from qtpy.QtCore import QRectF
+    from qtpy.QtGui import QColor, QImage, QPainter
+
+    from node_parts.shadow import draw_shadow, shadow_pixmap, shadow_rect
+    from node_types import Node
+
+    color = QColor(10, 20, 30, 150)
+    a = shadow_pixmap(5, 8, color)
+    assert shadow_pixmap(5.0, 8, QColor(color)).cacheKey() == a.cacheKey()
+    assert shadow_pixmap(6, 8, color).cacheKey() != a.cacheKey()
+
+    image = QImage(200, 100, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(0)
+    p = QPainter(image)
+    draw_shadow(p, QRectF(20, 20, 100, 40), 5, color)
+    p.end()
+    assert image.pixelColor(70, 50).alpha() > 0
+    assert image.pixelColor(190, 90).alpha() == 0
+
+    n = Node({"name": "Node0", "id": 0})
+    r = n.boundingRect()
+    n.addShadow()
+    assert n.boundingRect().contains(shadow_rect(n._rect))
+    n.removeShadow()
+    assert n.boundingRect() == r
+
+
+def test_connection_layer(qtbot):
+    from qtpy.QtCore import QPointF, QRectF, Qt
+    from qtpy.QtGui import QColor, QImage, QPainter, QPainterPath
+    from qtpy.QtWidgets import QGraphicsScene
+
+    from node_parts.connection import (
+        Connection,
+        add_connection_item,
+        remove_connection_item,
+    )
+    from node_parts.connection_layer import ConnectionLayer
+    from node_types import Node
+    from node_utils import options
+
+    scene = QGraphicsScene()
+    layer = ConnectionLayer()
+    scene.addItem(layer)
+    parent = Node({"name": "Node0", "id": 0})
+    near = Node({"name": "Node1", "id": 1})
+    far = Node({"name": "Node2", "id": 2})
+    near.setPos(200, 100)
+    far.setPos(-3000, 2000)
+    a = Connection({"parent": parent, "child": near, "id": 3, "attr": "out"})
+    b = Connection({"parent": parent, "child": far, "id": 4})
+    parent.connections += [a, b]
+    near.connections.append(a)
+    far.connections.append(b)
+    options.connectionLayer = layer
+    try:
+        for c in (a, b):
+            add_connection_item(scene, c)
+    finally:
+        options.connectionLayer = None
+    assert a.scene() is None and a.layer is layer
+    assert scene.items() == [layer]
+    assert layer.boundingRect().contains(b.boundingRect())
+
+    assert set(layer.candidates(QRectF(-3000, 1950, 100, 100))) == {b}
+    path = QPainterPath()
+    path.addRect(QRectF(150, 50, 100, 100))
+    assert layer.connectionsIn(path) == [a]
+    assert scene.items(QRectF(150, 50, 100, 100)) == [layer]
+    assert scene.items(QRectF(-500, -500, 10, 10)) == []
+    b.setVisible(False)
+    assert layer.candidates(QRectF(-3000, 1950, 100, 100)) == []
+
+    # moving a node rebins its connections
+    near.setPos(-5000, -5000)
+    assert layer.connectionsIn(path) == []
+    assert a in layer.candidates(QRectF(-5000, -5050, 100, 100))
+
+    image = QImage(100, 100, QImage.Format.Format_ARGB32)
+    image.fill(Qt.GlobalColor.white)
+    p = QPainter(image)
+    scene.render(p, QRectF(0, 0, 100, 100), QRectF(0, 0, 100, 100))
+    p.end()
+    # the name label isn't in the scene, the layer paints it
+    label = a.labelRect()
+    assert a in layer.candidates(label)
+    assert any(
+        image.pixelColor(x, y) != QColor(Qt.GlobalColor.white)
+        for x in range(int(label.left()), int(label.right()))
+        for y in range(int(label.top()), int(label.bottom()))
+    )
+    # and holds its editor
+    a.editName()
+    editor = a.nameItem.editor
+    assert editor.parentItem() is layer and editor.scene() is scene
+    assert editor.scenePos() == a.nameItem.scenePos()
+    editor.setPlainText("in")
+    a.stopEditingName()
+    assert a.nameItem.toPlainText() == "in"
+    qtbot.waitUntil(lambda: editor.scene() is None)
+
+    remove_connection_item(scene, a)
+    assert a.layer is None and a not in layer.connections
+    assert layer.candidates(QRectF(-5000, -5050, 100, 100)) == []
+    assert layer.connectionAt(QPointF(0, 0)) is None
+
+
+def test_path_scheduler_coalesces_moves(qtbot):
+    from node_parts.connection import Connection, path_scheduler
+    from node_types import Node
+
+    parent = Node({"name": "Node0", "id": 0})
+    child = Node({"name": "Node1", "id": 1})
+    c = Connection({"parent": parent, "child": child, "id": 2})
+    parent.connections.append(c)
+    child.connections.append(c)
+    start = c.points[-1]
+    frames = path_scheduler.frames
+    path_scheduler.begin()
+    try:
+        for x in range(10):
+            child.setPos(x * 10, 50)
+        parent.setPos(5, 5)
+        # deferred until the next frame
+        assert c.points[-1] == start
+        qtbot.waitUntil(lambda: path_scheduler.frames == frames + 1)
+        assert c.points[-1][1] == 50
+        child.setPos(300, 60)
+    finally:
+        path_scheduler.end()
+    # end() flushes what's left
+    assert c.points[-1][1] == 60
+    assert not path_scheduler.dirty
+    child.setPos(300, 70)
+    assert c.points[-1][1] == 70
+
+
+def test_drag_snapshot_hides_static_items(qtbot):
+    from qtpy.QtWidgets import QGraphicsScene
+
+    from main import View
+    from node_parts.connection import Connection
+    from node_types import Node
+    from node_utils import options
+
+    scene = QGraphicsScene(0, 0, 400, 300)
+    view = View()
+    view.setScene(scene)
+    view.resize(400, 300)
+    qtbot.addWidget(view)
+    nodes = [Node({"name": "Node%d" % i, "id": i}) for i in range(3)]
+    for i, n in enumerate(nodes):
+        n.setPos(i * 120, 50)
+        scene.addItem(n)
+        options.nodes[n.id] = n
+    c = Connection({"parent": nodes[0], "child": nodes[1], "id": 10})
+    nodes[0].connections.append(c)
+    nodes[1].connections.append(c)
+    scene.addItem(c)
+    options.connections[c.id] = c
+    nodes[2].setOpacity(0.5)
+    limit = options.dragSnapshotItems
+    options.dragSnapshotItems = 1
+    options.perf.enabled = True
+    try:
+        view.beginDragSnapshot([nodes[0]])
+        assert view.snapshot is not None
+        # grabbing the viewport isn't a frame
+        assert not options.perf.frames
+        assert nodes[0].opacity() == 1 and c.opacity() == 1
+        assert nodes[1].opacity() == 0 and nodes[2].opacity() == 0
+        view.endDragSnapshot()
+        assert view.snapshot is None
+        assert nodes[1].opacity() == 1 and nodes[2].opacity() == 0.5
+        assert nodes[1] in scene.items(nodes[1].sceneBoundingRect().center())
+        options.dragSnapshotItems = 10
+        view.beginDragSnapshot([nodes[0]])
+        assert view.snapshot is None
+    finally:
+        options.dragSnapshotItems = limit
+        options.perf.enabled = False
+        options.perf.clear()
+        options.nodes.clear()
+        options.connections.clear()
+
+
+def test_background_grid_brightness(qtbot):
+    from qtpy.QtGui import qGray
+
+    from node_parts.grid import BackgroundGrid, brightness_lut, grid_image
+
+    assert brightness_lut(50)[0x6D] == 0x6D
+    assert brightness_lut(100)[200] == 255
+    grid = BackgroundGrid()
+    assert grid.level(1.0) == 1.0
+    assert grid.level(0.3) == 0.5
+    assert grid.level(10) == grid.levels[-1]
+    tile = grid_image(1.0)
+    assert tile.width() == 64
+    image = grid.pixmap(1.0).toImage()
+    assert qGray(image.pixel(5, 5)) == 0x6D
+    assert qGray(image.pixel(0, 5)) < qGray(image.pixel(15, 5)) < 0x6D
+    grid.setBrightness(25)
+    assert qGray(grid.pixmap(1.0).toImage().pixel(5, 5)) == 0x6D // 2
+    # the tile itself is shared, only its colors change
+    assert grid_image(1.0) is tile
+
+
+def test_static_title_edited_with_text_item(qtbot):
+    from qtpy.QtCore import Qt
+    from qtpy.QtWidgets import QApplication, QGraphicsScene
+
+    from node_parts.parts import StaticTitleItem, TitleItem
+    from node_types import Node
+
+    scene = QGraphicsScene()
+    node = Node({"name": "Node0", "id": 0})
+    scene.addItem(node)
+    title = node.nameItem
+    assert isinstance(title, StaticTitleItem)
+    assert title.toPlainText() == "Node"
+    assert not [x for x in title.childItems() if isinstance(x, TitleItem)]
+    width = title.boundingRect().width()
+    title.setPlainText("Longer title")
+    assert title.boundingRect().width() > width
+
+    title.setTextInteractionFlags(Qt.TextInteractionFlag.TextEditorInteraction)
+    editor = title.editor
+    assert isinstance(editor, TitleItem) and editor.parentItem() is title
+    assert editor.parent_item is node
+    editor.setPlainText("Edited")
+    title.setTextInteractionFlags(Qt.TextInteractionFlag.NoTextInteraction)
+    assert title.editor is None
+    assert title.toPlainText() == "Edited"
+    QApplication.processEvents()
+    assert editor.scene() is None
+
+
+def test_icons_decoded_in_background(qtbot, tmp_path):
+    from qtpy.QtGui import QColor, QPixmap
+
+    import node_utils
+    from node_parts.icon_loader import icon_loader
+    from node_types import Node
+
+    path = str(tmp_path / "icon.png")
+    pix = QPixmap(64, 64)
+    pix.fill(QColor("red"))
+    pix.save(path)
+    jobs = icon_loader.jobs
+    a = Node({"name": "Node0", "id": 0, "icon": path})
+    b = Node({"name": "Node1", "id": 1, "icon": path})
+    missing = Node({"name": "Node2", "id": 2, "icon": str(tmp_path / "x.png")})
+    placeholder = icon_loader.placeholder().cacheKey()
+    assert a.iconPixmap.cacheKey() == placeholder
+    assert b.iconPixmap.cacheKey() == placeholder
+    # both nodes wait for one decode of the file
+    assert icon_loader.jobs == jobs + 2
+    icon_loader.wait()
+    size = node_utils.options.iconSize
+    assert a.iconPixmap.width() == size
+    assert a.iconPixmap.toImage().pixelColor(1, 1) == QColor("red")
+    assert missing.iconPixmap is None
+    # decoded icons are cached
+    c = Node({"name": "Node3", "id": 3, "icon": path})
+    assert c.iconPixmap.width() == size
+    assert icon_loader.jobs == jobs + 2
+    # a file that couldn't be read is read again once it's there
+    pix.save(str(tmp_path / "x.png"))
+    missing.fromDict({"icon": str(tmp_path / "x.png")})
+    icon_loader.wait()
+    assert missing.iconPixmap.width() == size
+
+    types = []
+    icon_loader.requestType(path, lambda p, t: types.append((p, t)))
+    icon_loader.wait()
+    assert types and types[0][0] == path and types[0][1] != "Unknown"
+
+
+def test_icon_atlas_packs_icons(qtbot):
+    from qtpy.QtCore import QPointF
+    from qtpy.QtGui import QColor, QImage, QPainter, QPixmap
+
+    from node_parts.icon_atlas import IconAtlas
+
+    atlas = IconAtlas()
+    atlas.pageSize = 40
+    icons = []
+    for color in ("red", "green", "blue", "yellow"):
+        pix = QPixmap(16, 16)
+        pix.fill(QColor(color))
+        icons.append(pix)
+    tiles = [atlas.tile(x) for x in icons]
+    assert atlas.tile(icons[0]) is tiles[0]
+    # two icons per row and two rows per page
+    assert [t[0] for t in tiles] == [0, 0, 0, 0]
+    assert len({(t[1].x(), t[1].y()) for t in tiles}) == 4
+    fifth = QPixmap(16, 16)
+    fifth.fill(QColor("black"))
+    assert atlas.tile(fifth)[0] == 1 and len(atlas.pages) == 2
+    assert atlas.tile(QPixmap(100, 100)) is None
+
+    image = QImage(20, 20, QImage.Format.Format_ARGB32)
+    image.fill(0)
+    painter = QPainter(image)
+    atlas.draw(painter, QPointF(2, 2), icons[2])
+    painter.end()
+    assert image.pixelColor(10, 10) == QColor("blue")
+    atlas.clear()
+    assert not atlas.pages and not atlas.tiles
+
+
+def test_lite_nodes_selected_per_type(qtbot):
+    from qtpy.QtCore import QPointF, QRectF
+    from qtpy.QtGui import QImage, QPainter
+    from qtpy.QtWidgets import QGraphicsScene, QGraphicsWidget
+
+    import node_utils
+    from node_types import LiteBookmark, LiteNode, Node, NodeBase
+    from node_utils import get_node_class
+
+    opts = node_utils.options
+    assert get_node_class("Node") is Node
+    opts.liteNodes = {"Node", "NodeBookmark"}
+    try:
+        assert get_node_class("Node") is LiteNode
+        assert get_node_class("NodeBookmark") is LiteBookmark
+        assert get_node_class("NodeNote").__name__ == "NodeNote"
+    finally:
+        opts.liteNodes = set()
+
+    node = LiteNode({"name": "Node0", "id": 0, "width": 120, "height": 40})
+    assert isinstance(node, NodeBase) and not isinstance(node, QGraphicsWidget)
+    assert not node.childItems()
+    d = node.toDict()
+    assert d["type"] == "Node" and d["width"] == 120
+    assert node.connectorPos() == QPointF(120, 20)
+    # the connector and, once selected, the resize handle are hit
+    assert node.contains(QPointF(123, 20))
+    assert not node.contains(QPointF(124, 44))
+    node.setSelected(True)
+    assert node.contains(QPointF(124, 44))
+
+    bookmark = LiteBookmark(
+        {"name": "Bookmark0", "id": 1, "url": "https://example.com"}
+    )
+    d = bookmark.toDict()
+    assert d["type"] == "NodeBookmark" and d["url"] == "https://example.com"
+    assert bookmark.connectorPos() is None
+    assert bookmark.rect().height() >= opts.iconSize + 24
+
+    scene = QGraphicsScene()
+    scene.addItem(node)
+    scene.addItem(bookmark)
+    bookmark.setPos(0, 100)
+    image = QImage(200, 200, QImage.Format.Format_ARGB32)
+    image.fill(0)
+    painter = QPainter(image)
+    rect = QRectF(0, 0, 200, 200)
+    scene.render(painter, rect, rect)
+    painter.end()
+    assert image.pixelColor(60, 20).alpha() > 0
+
+    # the title is edited with a TitleItem that only exists meanwhile
+    node.fromDict({"display_name": "Title"})
+    node.editTitle()
+    editor = node.editor
+    assert editor is not None and editor.toPlainText() == "Title"
+    node.stopEditing()
+    assert node.editor is None
+    qtbot.waitUntil(lambda: editor.scene() is None)